@@ -1,23 +1,14 @@
-import streamlit as st
-import pandas as pd
-import datetime
+import importlib
 import time
-import random
-import base64
-import io
-import requests  # 추가됨
-import json      # 추가됨
-from PIL import Image
-from openai import OpenAI, APIError, RateLimitError, APIConnectionError, APITimeoutError
+
+import streamlit as st
+
+script_started = time.perf_counter()  # 리런 한 번에 걸린 스크립트 시간 (지표: app_script_seconds)
 
 # --- [1] 기본 설정 ---
 st.set_page_config(page_title="Pika 영상 제작 GPT 도우미", layout="wide")
 
-# --- [2] 구글 시트 웹 앱 URL 설정 ---
-# 선생님이 알려주신 URL로 고정했습니다.
-GSHEET_WEBAPP_URL = "https://script.google.com/macros/s/AKfycbwu0ZU69GTrkYmXjo7V2t4Vskvo56_dOBLcDrw0heRSQZrw4_ZmKzsrHQdPjx3ZzJ7z3g/exec"
-
-# --- [3] 로그인 시스템 (Gatekeeper) ---
+# --- [2] 로그인 시스템 (Gatekeeper) ---
 if "student_name" not in st.session_state:
     st.session_state["student_name"] = ""
 
@@ -37,745 +28,49 @@ if not st.session_state["student_name"]:
     
     st.stop() # 로그인 안 하면 여기서 멈춤
 
-# =========================================================
-# ⚙️ 시스템 함수 정의 (랜덤 키 + 로깅)
-# =========================================================
-
-def get_random_client():
-    """Secrets의 openai_keys에서 랜덤으로 키를 하나 뽑아 클라이언트 생성"""
-    try:
-        api_keys = list(st.secrets["openai_keys"].values())
-        selected_key = random.choice(api_keys)
-        return OpenAI(api_key=selected_key)
-    except Exception as e:
-        st.error(f"API 키 로드 실패: {e}. Secrets에 [openai_keys]가 설정되었는지 확인하세요.")
-        st.stop()
-
-def save_log_to_sheet(action_type, question, answer, latency, status, tokens=0):
-    """구글 앱스 스크립트로 데이터를 전송하여 시트에 실시간 기록"""
-    try:
-        payload = {
-            "student_name": st.session_state.get("student_name", "Unknown"),
-            "user_question": f"[{action_type}] {question}",
-            "ai_answer": str(answer)[:1000], 
-            "latency": latency,
-            "status": status,
-            "tokens": tokens
-        }
-        # 앱스 스크립트 웹 앱으로 데이터 쏘기
-        requests.post(
-            GSHEET_WEBAPP_URL, 
-            data=json.dumps(payload),
-            headers={"Content-Type": "application/json"},
-            timeout=10
-        )
-    except Exception as e:
-        print(f"로그 저장 실패 (콘솔 로그): {e}")
-
-# --- [핵심] ask_gpt 함수 (웹 앱 로깅 적용) ---
-def ask_gpt(messages, model="gpt-4o"):
-    client = get_random_client()
-    start_time = time.time()
-    
-    try:
-        response = client.chat.completions.create(
-            model=model,
-            messages=messages
-        )
-        content = response.choices[0].message.content
-        
-        # 데이터 수집 및 전송
-        end_time = time.time()
-        latency = round(end_time - start_time, 2)
-        tokens = response.usage.total_tokens
-        
-        last_user_msg = next((m['content'] for m in reversed(messages) if m['role'] == 'user'), "System Prompt")
-        save_log_to_sheet("대화", last_user_msg, content, latency, "SUCCESS", tokens)
-        
-        return content
-
-    except Exception as e:
-        save_log_to_sheet("대화에러", str(messages), str(e), 0, "ERROR")
-        st.error(f"오류가 발생했습니다: {e}")
-        return "미안해, 잠시 문제가 생겼어. 다시 시도해줄래?"
-
-# --- [핵심] generate_image 함수 (웹 앱 로깅 적용) ---
-def generate_image(prompt):
-    client = get_random_client()
-    start_time = time.time()
-    
-    try:
-        response = client.images.generate(
-            model="dall-e-3",
-            prompt=prompt,
-            size="1024x1024",
-            response_format="b64_json"
-        )
-        
-        end_time = time.time()
-        latency = round(end_time - start_time, 2)
-        save_log_to_sheet("이미지생성", prompt, "이미지 생성 성공", latency, "SUCCESS")
-        
-        image_data = base64.b64decode(response.data[0].b64_json)
-        return Image.open(io.BytesIO(image_data))
-
-    except Exception as e:
-        save_log_to_sheet("이미지에러", prompt, str(e), 0, "ERROR")
-        
-        if isinstance(e, RateLimitError):
-            st.error("잠시만요! 너무 많은 이미지 요청이 있었어요. 1분 후에 다시 시도해 주세요.")
-            st.session_state.image_generation_disabled = True
-            st.session_state.image_generation_disable_until = time.time() + 60
-        elif isinstance(e, APIConnectionError):
-            st.error("인터넷 연결 문제로 이미지 생성에 실패했어요.")
-        elif isinstance(e, APITimeoutError):
-            st.error("이미지 생성 요청이 너무 오래 걸려 취소되었어요.")
-        else:
-            st.error(f"예상치 못한 오류가 발생했습니다: {e}")
-        return None
+# --- [3] 섹션 공용 기능 ---
+# 로그인 화면에서는 불러오지 않도록 여기서 import (처음 한 번만 실행되고 이후 리런에서는 그대로 재사용)
+from app_core import get_metrics, get_quota, persist_session, restore_session, clear_session
 
-# =========================================================
-# 🎬 선생님의 오리지널 코드 내용 (프롬프트 포함)
-# =========================================================
+if not st.session_state.get("session_restored"):
+    st.session_state.session_restored = True
+    if restore_session():
+        st.toast("💾 이전에 하던 활동을 불러왔어요. 이어서 해 보세요!")
+persist_session()  # st.rerun()으로 끝난 지난 실행의 변경분까지 저장
 
 # 사이드바 (학생 정보 표시 및 로그아웃)
 with st.sidebar:
     st.header(f"👋 {st.session_state['student_name']} 학생")
     if st.button("로그아웃 (이름 다시 쓰기)"):
+        clear_session()
         st.session_state["student_name"] = ""
         st.rerun()
     st.markdown("---")
+    # 오늘 남은 GPT 사용량
+    remaining = get_quota().remaining(st.session_state["student_name"])
+    if remaining is not None:
+        st.progress(remaining / get_quota().student_daily_tokens, text=f"🎟️ 오늘 남은 사용량: {remaining:,}토큰")
+    # 턴별 프롬프트 토큰 (대화 압축 효과 확인용)
+    if st.session_state.get("prompt_token_log"):
+        with st.expander("📉 프롬프트 토큰 기록"):
+            import pandas as pd
+            st.dataframe(pd.DataFrame(st.session_state.prompt_token_log[-10:]), hide_index=True)
 
 st.title("🎬 Pika 영상 제작 GPT 도우미")
 
-# 사이드바에서 작업 선택
-chat_option = st.sidebar.radio("작업을 선택하세요:", [
-    "1. 이야기 점검하기",
-    "2. 이야기 나누기",
-    "3. 캐릭터/배경 이미지 생성",
-    "4. 장면별 영상 Prompt 점검"
-])
-
-# 모든 GPT 시스템 프롬프트에 공통으로 들어갈 지침 (이 부분은 전역으로 유지)
-GLOBAL_GPT_DIRECTIVES = (
-"""
-**[공통 지침]**
-- 이 프로그램의 최종 목표는 Pika를 활용하여 1분에서 1분 30초 정도의 영상을 창작하는 것이야.
-- GPT는 창작물을 대신 완성하지 않고, 질문을 통해 학생 스스로 수정과 구체화를 유도하는 조력자 역할을 수행해. 학생의 창의성을 존중하고, 칭찬과 격려의 말투를 꼭 유지해줘.
-- **콘텐츠 제한:** 폭력적이거나, 혐오스러운장면, 특정인을 등장시키거나, 선정적인 내용은 절대 금지해.
----
-"""
-)
-
-# 1. 이야기 점검하기
-if chat_option.startswith("1"):
-    st.header("1. 이야기 점검하기")
-    st.markdown("💬 **목표:** 여러분의 이야기가 영상으로 만들기에 적절한지 GPT와 함께 대화하며 점검하고 다듬어 보세요.")
-
-    # 이야기 점검하기의 시스템 프롬프트 정의
-    STORY_REVIEW_SYSTEM_PROMPT = (
-        GLOBAL_GPT_DIRECTIVES +
-        """
-**[GPT 역할 및 대화 방식]**
-너는 초등학생이 창작한 이야기를 영상으로 만들 수 있도록 점검해주는 GPT 도우미야. 학생이 쓴 이야기를 먼저 면밀히 읽고, 다음 기준을 중심으로 점검해. 
-
-**질문 방식**
-- 반드시 하나씩만 질문하고, 학생의 답변을 듣고 다음 질문을 이어가야 해.
-- 전체 질문은 최대 10개 이내로, 이야기의 완성도에 따라 더 적게 해도 좋아.
-- 중복된 질문이나 이미 잘 표현된 요소는 건너뛰어도 돼.
-- 소크라테스식 질문으로 학생이 스스로 더 나은 표현을 찾게 유도하고, 반드시 초등학교 5학년 수준의 언어로 질문해.
-
-**질문 대상 영역 (확장 가능하고 유기적인 질문 구조)**
-질문은 아래 항목에서 이야기 흐름과 표현이 부족하거나 불분명한 부분을 중심으로 골라서 자유롭게 구성해. 학생의 이야기 흐름에 따라 유연하게 확장할 수 있도록 설계되어야 해.
-
-**🧾 질문 항목별 설계**
-
-**1. 주제**
-- "이 이야기를 읽는 사람이 어떤 기분을 느끼면 좋겠어?"
-- "이야기에서 가장 전하고 싶은 메시지는 뭐야?"
-
-**2. 창작 아이디어**
-- "이야기 속 설정(장소, 물건, 마법 등)이 특별한데, 어디서 떠올렸어?"
-- "이 이야기를 더 흥미롭거나 감동적으로 만들 수 있는 요소가 있을까?"
-
-**3. 인물**
-- "이야기의 주인공은 누구야?"
-- "그 인물이 왜 그렇게 행동했는지 설명해줄 수 있어?"
-- "이 사건이 그 인물에게 어떤 영향을 줬을까?"
-- "주인공은 몇 살쯤 되는 아이야?"
-- "이 친구는 여자야? 남자야? 다른 특별한 특징이 있어?"
-- "어떤 환경에서 살고 있을까? 도시? 시골? 특별한 가족이 있어?"
-
-**4. 사건**
-- "이야기 속 사건은 어떻게 시작됐어?"
-- "이 사건은 앞뒤로 자연스럽게 이어지는 것 같아?"
-- "이 부분이 왜 일어났는지 설명할 수 있을까?"
-
-**5. 배경**
-- "이야기의 장소나 시간이 잘 떠오르도록 묘사돼 있다고 생각해?"
-- "이 배경이 인물의 감정이나 사건과 연결되는 느낌이 있어?"
-
-**6. 문체(문장)**
-- "이 문장을 조금 더 쉽게 바꾸거나, 짧게 나눠볼 수 있을까?"
-- "혹시 이 표현이 너무 어렵거나 어색하게 느껴질 수도 있을까?"
-
-**7. 지문(서술과 묘사)**
-- "이 장면을 상상하기 쉽도록 충분히 묘사된 것 같아?"
-- "이 서술 또는 묘사가 무슨 뜻인지 헷갈릴 수도 있을까?"
-- "이 부분에서 어떤 감정이나 분위기를 표현하려고 했어?"
-
-※ ‘대화’ 항목은 대사가 없는 이야기일 경우 생략함.
-
----
-
-**[질문 종료 조건]**
-- 질문은 10개 이내이고, 주인공/배경/사건/표현/주제가 충분히 구체화되었으며 영상 제작에 필요한 흐름이 명확하면, 아래 전환 문구로 넘어가.
-
-**[전환 문구]**
-“이제 여러분의 이야기가 영상으로 만들기에 충분히 풍성해졌어요! 정말 멋진 상상력이에요. 마지막으로 제가 몇 가지 조언을 해드릴게요.”
-
----
-
-**[최종 이야기 평가 및 보완 제안]**
-- 지금까지 대화 속에서 나온 핵심 아이디어를 정리해서 다시 제시해줘.
-- 학생의 표현 의도를 존중하면서, 이야기에서 인상 깊었던 점을 짧게 칭찬하고, 표현을 더 구체화하거나 보완하면 좋은 부분을 함께 정리해.
-- 글이 더 좋아지기 위한 간단한 조언과 격려를 덧붙여줘.
-  (예: “이 장면을 조금 더 자세히 표현하면 너의 이야기가 훨씬 멋져질 거야! 정말 잘하고 있어 😊”)
-- 영상 제작 관점에서 강조하거나 시각적으로 표현할 만한 요소를 1~2개 제안해줘.
-  (예: “냉장고 속 얼음 궁전이라는 아이디어는 정말 멋져요! 영상으로 만들 땐 엘사가 마법을 처음 사용하는 순간의 표정을 집중해서 표현하면 좋겠어요.”)
-"""
-    )
-
-    if "messages_story_review" not in st.session_state:
-        st.session_state.messages_story_review = [
-            {"role": "system", "content": STORY_REVIEW_SYSTEM_PROMPT}
-        ]
-        # story_input_submitted가 없으면 초기 입력창만 보이고 채팅은 안 보임
-        if "story_input_submitted" not in st.session_state:
-            st.session_state.story_input_submitted = False
-
-    # Display chat messages from history
-    for message in st.session_state.messages_story_review:
-        if message["role"] != "system": # Don't display system messages directly
-            with st.chat_message(message["role"]):
-                st.markdown(message["content"])
-
-    # Initial story input area
-    if not st.session_state.story_input_submitted:
-        story = st.text_area("여러분이 창작한 이야기를 입력하세요.", key="initial_story_input")
-        if st.button("이야기 점검 시작") and story:
-            st.session_state.messages_story_review.append({"role": "user", "content": story})
-            st.session_state.story_input_submitted = True # 스토리 제출 시 이 플래그를 True로 설정
-            # Get initial GPT response
-            with st.spinner("GPT가 이야기를 점검 중입니다..."):
-                gpt_response = ask_gpt(st.session_state.messages_story_review)
-                st.session_state.messages_story_review.append({"role": "assistant", "content": gpt_response})
-            st.rerun() # 플래그 변경 후 페이지를 새로고침하여 채팅 UI를 표시
-
-    # Chat input for ongoing conversation (only visible after initial story submission)
-    if st.session_state.story_input_submitted: # story_input_submitted가 True일 때만 채팅창 표시
-        if prompt := st.chat_input("GPT에게 답변하거나 추가 질문을 해보세요."):
-            st.session_state.messages_story_review.append({"role": "user", "content": prompt})
-            with st.spinner("GPT가 답변을 생성 중입니다..."):
-                gpt_response = ask_gpt(st.session_state.messages_story_review)
-                st.session_state.messages_story_review.append({"role": "assistant", "content": gpt_response})
-            st.rerun()
-
-    # Optional: A button to reset the conversation
-    if st.session_state.story_input_submitted and st.button("대화 초기화", key="reset_story_review_chat"):
-        st.session_state.messages_story_review = [
-            {"role": "system", "content": STORY_REVIEW_SYSTEM_PROMPT}
-        ]
-        st.session_state.story_input_submitted = False
-        st.rerun()
-
-# 2. 이야기 나누기 (장면 분할)
-elif chat_option.startswith("2"):
-    st.header("2. 이야기 나누기")
-    st.markdown("📝 **목표:** 여러분의 이야기를 영상 제작을 위한 여러 장면으로 나누어 보세요. 각 장면은 어떤 내용으로 구성될까요?")
-
-    # '이야기 나누기'의 새로운 시스템 프롬프트 정의
-    SEGMENTATION_SYSTEM_PROMPT = (
-        GLOBAL_GPT_DIRECTIVES +
-        """
-너는 스토리보드 작가가 되어 초등학생이 창작한 이야기를 Pika 영상 제작에 적합한 장면으로 나누는 GPT 도우미야.
-학생이 제공한 이야기를 면밀히 읽고, 원본 이야기의 내용을 최대한 유지하면서 **6장면에서 10장면 사이**로 분할해줘.
-각 장면은 **최대 10초**를 넘지 않도록 짧고 명확하게 구성해야 해.
-
-장면 분할의 주요 기준은 다음과 같아:
-- **배경의 변화**: 장소가 바뀌는 지점
-- **시간의 변화**: 아침에서 밤으로, 어제에서 오늘로 등 시간이 바뀌는 지점
-- **등장인물의 변화**: 새로운 인물이 등장하거나, 주요 인물이 사라지는 지점
-- **사건의 변화**: 이야기의 중요한 사건이 시작되거나 전환되는 지점 (발단, 전개, 위기, 절정, 결말)
-- **분위기의 변화**: 밝은 분위기에서 어두운 분위기로, 긴장에서 평화로 등 감정이나 분위기가 바뀌는 지점
-
-각 장면은 다음 형식으로 명확하게 제시해줘:
-**[장면 번호]**: [장면 요약 (20자 이내)] - [원본 이야기에서 해당 장면 내용]
-
-모든 장면을 분할한 후, 다음 문구를 추가하여 이 결과가 예시일 뿐임을 강조해줘:
-"이 장면 분할은 여러분의 이야기를 영상으로 만들 때 참고할 수 있는 **하나의 예시**일 뿐이에요. 여러분의 상상력으로 얼마든지 더 멋지게 바꿔볼 수 있답니다! 😊"
-"""
-    )
-
-    if "segmented_story_input" not in st.session_state:
-        st.session_state.segmented_story_input = ""
-    if "messages_segmentation" not in st.session_state:
-        st.session_state.messages_segmentation = [
-            {"role": "system", "content": SEGMENTATION_SYSTEM_PROMPT}
-        ]
-    if "segmentation_completed" not in st.session_state:
-        st.session_state.segmentation_completed = False
-
-    story_for_segmentation = st.text_area("점검이 완료된 이야기를 여기에 붙여넣어 주세요.", value=st.session_state.segmented_story_input, key="segment_input_area")
-
-    if st.button("이야기 장면 나누기 시작") and story_for_segmentation:
-        st.session_state.segmented_story_input = story_for_segmentation
-        st.session_state.messages_segmentation.append({"role": "user", "content": story_for_segmentation})
-        with st.spinner("GPT가 장면을 나누는 중입니다..."):
-            gpt_response = ask_gpt(st.session_state.messages_segmentation)
-            st.session_state.messages_segmentation.append({"role": "assistant", "content": gpt_response})
-        st.rerun()
-
-    for message in st.session_state.messages_segmentation:
-        if message["role"] != "system":
-            with st.chat_message(message["role"]):
-                st.markdown(message["content"])
-
-    if st.button("장면 나누기 초기화", key="reset_segmentation_chat"):
-        st.session_state.messages_segmentation = [
-            {"role": "system", "content": SEGMENTATION_SYSTEM_PROMPT}
-        ]
-        st.session_state.segmented_story_input = ""
-        st.session_state.segmentation_completed = False
-        st.rerun()
-
-# 3. 캐릭터/배경 이미지 생성
-elif chat_option.startswith("3"):
-    st.header("3. 캐릭터/배경 이미지 생성")
-    st.markdown("🎨 **목표:** 여러분의 이야기에 등장하는 캐릭터나 배경 이미지를 직접 만들어 볼 수 있어요.")
-
-    # 3번 섹션을 위한 GPT 시스템 프롬프트 (최신 논의 반영)
-    IMAGE_GENERATION_SYSTEM_PROMPT = (
-        GLOBAL_GPT_DIRECTIVES +
-        r"""너는 초등학생이 설명한 캐릭터 또는 배경을 이미지 생성에 적합한 프롬프트로 구체화하는 GPT 도우미야.
-학생의 창의성을 존중하고, 칭찬과 격려의 말투를 꼭 유지해줘.
-
-**[GPT 역할 및 대화 방식]**
-- 학생이 제공한 정보가 아래 항목 중 누락되었거나 불분명하면, **해당 항목에 대한 질문과 함께 적절한 예시를 하나씩 제시**하여 학생이 스스로 더 나은 표현을 찾도록 유도해줘.
-- 반드시 한 번에 하나씩만 질문하고, 학생의 답변을 듣고 다음 질문을 이어가야 해.
-- 전체 질문은 최대 5개 이내로, 이야기의 완성도에 따라 더 적게 해도 좋아.
-- 중복된 질문이나 이미 잘 표현된 요소는 건너뛰어도 돼.
-
-**[질문 대상 항목 및 예시]**
-
-1.  **대상 (가장 먼저 질문)**: "만들고 싶은 이미지가 어떤 대상인가요? 사람 캐릭터, 동물 캐릭터, 아니면 움직이는 물건 같은 건가요?"
-    * **예시:** '용감한 기사 (사람 캐릭터)', '말하는 고양이 (동물 캐릭터)', '움직이는 장난감 로봇 (물건 캐릭터)'
-
-2.  **나이/연령대 (캐릭터가 사람일 경우만 해당)**: "이 캐릭터는 몇 살쯤 되는 것 같아? 아니면 어떤 연령대의 느낌이야?"
-    * **예시:** '10살 여자아이', '고등학생 남자', '친절한 할머니'
-
-3.  **성별 (캐릭터가 사람일 경우만 해당)**: "이 친구는 여자 캐릭터야, 남자 캐릭터야, 아니면 성별을 딱 정하지 않은 중성적인 느낌이야?"
-    * **예시:** '여자', '남자', '중성적인'
-
-4.  **외형 특징**: "캐릭터의 머리 모양, 머리색, 피부색, 눈색, 체형 같은 특별한 특징이 있어? (동물이나 물건이라면 어떤 색깔이나 모양인가요?)"
-    * **예시:** '긴 갈색 머리', '파란 눈의 하얀 피부', '통통한 몸매', '빨간색 털을 가진 고양이', '반짝이는 금속 로봇'
-
-5.  **의상/소품**: "이 캐릭터는 어떤 옷을 입고 있거나 어떤 소품을 가지고 있으면 좋겠어? (동물이나 물건이라면 특징적인 액세서리나 부품이 있나요?)"
-    * **예시:** '노란색 후드티', '낡은 청바지', '빨간색 망토', '마법 지팡이', '낡은 책가방', '작은 탐정 모자를 쓴 고양이'
-
-6.  **표정/감정**: "지금 캐릭터가 어떤 표정을 짓고 있으면 좋을까? 어떤 감정을 보여줬으면 좋겠어?" (배경 없이 캐릭터의 기본 표정)
-    * **예시:** '밝게 웃는 표정', '호기심 가득한 표정', '살짝 찡그린 얼굴'
-
-7.  **스타일/화풍**: "이 그림이 어떤 스타일로 보이면 좋겠어? 만화 같을까, 그림책 같을까?"
-    * **예시:** '디즈니 애니메이션 스타일', '픽사 3D 애니메이션 스타일', '디지털 수채화 느낌', '스누피 펜화 스타일'
-
-**[캐릭터 이미지 생성 규칙 (GPT가 자동으로 적용)]**
-- 무조건 정면을 보고 서 있는 중립적인 자세(standing facing front, neutral pose)를 프롬프트에 자동으로 포함**하여 가장 활용하기 좋게 만들어줘. (단, 동물이나 물건 캐릭터의 경우, '서 있는' 대신 '자연스럽게 놓여 있는' 등 해당 대상에게 적합한 중립적인 상태를 반영해줘.)
-- 학생이 어떤 자세를 언급했든 관계없이, **배경은 없도록(no background)** 프롬프트에 포함해줘.
-- 캐릭터 이미지는 항상 **전신이 보이도록(full-body, head to toe)** 생성해야 해. 대표이미지로서 활용될 수 있게.
-
-**[프롬프트 완성 및 전달]**
-모든 필요한 정보가 수집되면, **DALL-E 모델에 전달할 영어 프롬프트와 함께, 그것의 자연스러운 한국어 번역본을 다음 형식으로 출력해줘. 다른 불필요한 설명은 일절 추가하지 마.**
-
-**DALL-E 프롬프트 (영어):** [여기에 영어 프롬프트 텍스트]
-**한국어 번역:** [여기에 한국어 번역 텍스트]
-
-**예시:**
-**DALL-E 프롬프트 (영어):** A 10-year-old girl, female, with short brown hair and bright blue eyes, wearing a pink dress and holding a small teddy bear, brightly smiling expression, Disney animation style, standing facing front, no background, full body.
-**한국어 번역:** 10살 여자아이, 짧은 갈색 머리와 파란 눈을 가졌고, 분홍색 원피스를 입고 작은 곰인형을 들고 있는 모습. 밝게 웃는 표정. 디즈니 애니메이션 스타일. 정면을 보고 서 있는 전신 이미지. 배경 없음.
-
-**주의사항:** 학생에게 바로 이미지 프롬프트를 제공하지 않고, 질문을 통해 구체화해야 해. 질문은 자연스럽고 흐름에 맞게 진행해줘."""
-    )
-
-    # 세션 상태 초기화 또는 로드
-    if "messages_image_generation" not in st.session_state or \
-       st.session_state.messages_image_generation[0]["content"] != IMAGE_GENERATION_SYSTEM_PROMPT:
-        st.session_state.messages_image_generation = [
-            {"role": "system", "content": IMAGE_GENERATION_SYSTEM_PROMPT}
-        ]
-        st.session_state.image_prompt_collected = False
-        st.session_state.generated_image_display = None
-        st.session_state.image_input_submitted = False
-        st.session_state.final_dalle_prompt = "" # 최종 DALL-E 프롬프트 저장용
-        st.session_state.image_generation_disabled = False
-        st.session_state.image_generation_disable_until = 0
-
-    # 캐릭터/배경 선택 라디오 버튼
-    image_type = st.radio("어떤 이미지를 만들고 싶나요?", ["캐릭터 이미지", "배경 이미지"], key="image_type_radio")
-    
-    # 초기 프롬프트 입력창 (첫 제출 전까지 보임)
-    if not st.session_state.image_input_submitted:
-        initial_prompt = st.text_area(f"{image_type}에 대해 설명해주세요. (예: '용감한 기사', '신비로운 숲')", key="initial_image_prompt")
-        if st.button("프롬프트 구체화 시작") and initial_prompt:
-            st.session_state.messages_image_generation.append({"role": "user", "content": initial_prompt})
-            st.session_state.image_input_submitted = True # 스토리 제출 시 이 플래그를 True로 설정
-            with st.spinner("GPT가 질문을 생성 중입니다..."):
-                gpt_response = ask_gpt(st.session_state.messages_image_generation)
-                st.session_state.messages_image_generation.append({"role": "assistant", "content": gpt_response})
-            st.rerun() # 플래그 변경 후 페이지를 새로고침하여 채팅 UI를 표시
-        if not st.session_state.image_input_submitted and initial_prompt:
-              st.info("⬆️ '프롬프트 구체화 시작' 버튼을 눌러 GPT와 대화를 시작하세요!")
-
-
-    # 대화 기록 표시
-    for message in st.session_state.messages_image_generation:
-        if message["role"] != "system":
-            with st.chat_message(message["role"]):
-                st.markdown(message["content"])
-
-    # 지속적인 채팅 입력창 (초기 프롬프트 제출 후 보임)
-    if st.session_state.image_input_submitted:
-        if current_prompt := st.chat_input("GPT의 질문에 답하거나 설명을 추가해주세요."):
-            st.session_state.messages_image_generation.append({"role": "user", "content": current_prompt})
-            with st.spinner("GPT가 답변을 생성 중입니다..."):
-                gpt_response = ask_gpt(st.session_state.messages_image_generation)
-                st.session_state.messages_image_generation.append({"role": "assistant", "content": gpt_response})
-            st.rerun()
-
-        # GPT의 마지막 메시지에서 '완성된 프롬프트:'를 찾아 추출 (파싱 로직 개선)
-        if st.session_state.messages_image_generation and \
-           st.session_state.messages_image_generation[-1]["role"] == "assistant" and \
-           "DALL-E 프롬프트 (영어):" in st.session_state.messages_image_generation[-1]["content"] and \
-           "한국어 번역:" in st.session_state.messages_image_generation[-1]["content"] and \
-           not st.session_state.messages_image_generation[-1]["content"].strip().endswith("?") and \
-           not st.session_state.image_prompt_collected: # '?'로 끝나는 질문이 아닐 때만 프롬프트로 인식
-            
-            gpt_final_prompt_content = st.session_state.messages_image_generation[-1]["content"]
-            
-            try:
-                # 영어 프롬프트 추출
-                start_english_index = gpt_final_prompt_content.find("DALL-E 프롬프트 (영어):")
-                if start_english_index != -1:
-                    english_prompt_start = start_english_index + len("DALL-E 프롬프트 (영어):")
-                    # '한국어 번역:' 시작 전까지의 내용을 영어 프롬프트로 간주
-                    end_english_index = gpt_final_prompt_content.find("한국어 번역:", english_prompt_start)
-                    if end_english_index == -1: # 한국어 번역이 없을 경우, 끝까지
-                        final_dalle_prompt = gpt_final_prompt_content[english_prompt_start:].strip()
-                    else:
-                        final_dalle_prompt = gpt_final_prompt_content[english_prompt_start:end_english_index].strip()
-                    
-                    # 한국어 번역 추출
-                    start_korean_index = gpt_final_prompt_content.find("한국어 번역:")
-                    if start_korean_index != -1:
-                        korean_translation_start = start_korean_index + len("한국어 번역:")
-                        korean_dalle_prompt = gpt_final_prompt_content[korean_translation_start:].strip()
-                    else:
-                        korean_dalle_prompt = "번역을 가져올 수 없습니다." # 번역이 없을 경우
-
-                    st.session_state.image_prompt_collected = True
-                    st.session_state.final_dalle_prompt = final_dalle_prompt # DALL-E 모델에 전달할 영어 프롬프트
-                    st.session_state.korean_dalle_prompt_display = korean_dalle_prompt # 사용자에게 보여줄 한국어 번역
-
-                    st.info(f"✨ GPT가 최종 이미지 프롬프트를 완성했어요 (DALL-E용): `{final_dalle_prompt}`")
-                    st.success(f"💡 **[한국어 번역]** : {korean_dalle_prompt}")
-                else:
-                    st.session_state.image_prompt_collected = False # 아직 프롬프트 완성 안 됨
-                    st.session_state.final_dalle_prompt = ""
-                    st.session_state.korean_dalle_prompt_display = ""
-            except Exception as e:
-                st.error(f"프롬프트 파싱 중 오류가 발생했습니다: {e}. GPT 응답 형식을 확인해주세요.")
-                st.session_state.image_prompt_collected = False
-                st.session_state.final_dalle_prompt = ""
-                st.session_state.korean_dalle_prompt_display = ""
-
-    # 최종 프롬프트가 수집되었을 때 이미지 생성 버튼 및 이미지 표시
-    if st.session_state.get("image_prompt_collected", False):
-        # 버튼 활성화 여부 확인
-        is_button_disabled = st.session_state.get("image_generation_disabled", False)
-        if is_button_disabled:
-            # 비활성화 시간 확인
-            remaining_time = int(st.session_state.get("image_generation_disable_until", 0) - time.time())
-            if remaining_time > 0:
-                st.warning(f"⏰ 이미지 생성은 {remaining_time}초 후에 다시 가능합니다. 잠시 기다려주세요.")
-                # 버튼을 비활성화 상태로 렌더링
-                st.button("이미지 생성 중 (잠시 기다려주세요)", disabled=True) 
-            else:
-                # 시간 만료, 버튼 다시 활성화
-                st.session_state.image_generation_disabled = False
-                is_button_disabled = False # 버튼 상태 업데이트
-
-        # 버튼이 활성화된 경우에만 클릭 가능하도록
-        if not is_button_disabled:
-            if st.button("이 프롬프트로 이미지 생성하기"):
-                if st.session_state.get("final_dalle_prompt"):
-                    with st.spinner("이미지를 생성 중입니다... 잠시만 기다려주세요!"):
-                        generated_img = generate_image(st.session_state.final_dalle_prompt) 
-                        if generated_img:
-                            st.session_state.generated_image_display = generated_img
-                            st.success("이미지가 성공적으로 생성되었습니다!")
-                        # 오류 메시지는 generate_image 함수 내에서 이미 표시됨
-                else:
-                    st.warning("먼저 GPT로부터 완성된 이미지 프롬프트를 받아야 합니다.")
-        
-        # 생성된 이미지가 있으면 화면에 표시하고 다운로드 버튼 제공
-        if st.session_state.generated_image_display:
-            st.image(st.session_state.generated_image_display, caption=f"생성된 {image_type} (프롬프트: {st.session_state.korean_dalle_prompt_display})", use_container_width=True)
-            buf = io.BytesIO()
-            st.session_state.generated_image_display.save(buf, format="PNG")
-            byte_im = buf.getvalue()
-            st.download_button(
-                label="이미지 다운로드",
-                data=byte_im,
-                file_name=f"{image_type}_generated.png",
-                mime="image/png"
-            )
-
-    # 대화 초기화 버튼
-    if st.button("이미지 생성 초기화", key="reset_image_generation_chat"):
-        st.session_state.messages_image_generation = [
-            {"role": "system", "content": IMAGE_GENERATION_SYSTEM_PROMPT} 
-        ]
-        st.session_state.image_prompt_collected = False
-        st.session_state.generated_image_display = None
-        st.session_state.image_input_submitted = False
-        st.session_state.final_dalle_prompt = ""
-        st.session_state.image_generation_disabled = False 
-        st.session_state.image_generation_disable_until = 0 
-        st.rerun()
-
-# 4. 장면별 영상 Prompt 점검
-elif chat_option.startswith("4"):
-    st.header("4. 장면별 영상 Prompt 점검")
-    st.markdown("🎬 **목표:** 각 장면에 맞는 Pika 영상 프롬프트를 만들고, 더 좋은 프롬프트로 다듬어 보세요.")
-
-    st.warning("이 기능은 '2. 이야기 나누기'에서 장면 구분이 완료된 후에 사용하는 것이 좋습니다.")
-
-    # --- ✨ Pika 버전 선택 기능 (4번 섹션 내) ✨ ---
-    st.subheader("어떤 Pika 버전을 위한 프롬프트를 만드시겠어요?")
-    pika_version = st.radio(
-        "Pika 2.1은 간단한 애니메이션에, Pika 2.2는 영화 같은 영상에 적합해요.",
-        ["Pika 2.1 (간단한 애니메이션)", "Pika 2.2 (영화 같은 영상)"],
-        key="pika_version_selector_section_4" # 섹션별 고유 키 사용
-    )
-    st.info(f"선택: **{pika_version}** 버전에 맞춰 프롬프트를 도와드릴게요!")
-    st.markdown("---")
-    # --- Pika 버전 선택 기능 끝 ---
-
-    # --- Pika 버전에 따른 시스템 프롬프트 정의 시작 ---
-    # Pika 2.1 전용 시스템 프롬프트
-    PIKA_2_1_SYSTEM_PROMPT = (
-        GLOBAL_GPT_DIRECTIVES +
-        """너는 초등학생이 작성한 장면 설명을 기반으로, **5초 이내의 GIF 같은 애니메이션 영상**을 Pika 2.1로 만들 수 있도록 프롬프트를 구체적이고 생생하게 개선해주는 GPT 도우미야. 너의 목표는 학생의 아이디어를 **캐릭터의 명확한 행동**을 중심으로 한 Pika 2.1에 최적화된 시각적인 프롬프트로 변환하는 것이야. 컴퓨터는 '푸근한 아줌마'처럼 모호한 표현을 이해하기 어렵다는 것을 학생들이 잘 모른다는 점을 항상 기억하고, 이를 구체적인 시각적 묘사로 바꾸도록 적극적으로 도와줘.
-
-**[GPT 역할 및 대화 방식]**
-- 학생의 프롬프트 초안을 면밀히 검토하고, **모호하거나(예: '좋은 분위기'), 한 장면에 너무 많은 이야기가 담겨있거나, 설명이 부족한 부분이 있다면 구체적으로 지적**해줘.
-- 부족하거나 더 구체화할 수 있는 부분이 있다면 다음 요소들을 중심으로 **최대 3개 이내의 단일 질문**을 통해 정보를 채워나가줘.
-- 반드시 한 번에 하나씩만 질문하고, 학생의 답변을 듣고 다음 질문을 이어가야 해.
-- 전체 질문은 최대 7개 이내로, 대화의 효율성을 중요하게 생각해줘. 중복된 질문이나 이미 잘 표현된 요소는 건너뛰어도 돼.
-- 질문은 항상 초등학교 5학년 수준의 언어로, 친절하고 격려하는 말투로 해줘. 학생의 창의성을 존중하면서도, 영상 제작 관점에서 필요한 부분을 놓치지 않도록 도와줘.
-
-**[문제점 지적 및 질문 대상 항목 (누락 또는 모호할 시 질문)]**
-
-1.  **장면 길이/정보 과다**: "이 한 장면에 혹시 여러 가지 일이 동시에 일어나고 있지는 않을까? Pika 영상은 한 장면이 **5초** 정도라서 너무 많은 이야기가 담기면 복잡해 보일 수 있어. 만약 그렇다면, **이 장면을 2개 또는 3개의 더 작은 장면으로 나누어 볼 수 있을까요?** 각 장면에 가장 중요하게 보여주고 싶은 것 하나씩만 생각해 볼까?"
-2.  **영상 스타일**: "이 장면이 어떤 그림 스타일로 보이면 좋을까? **만화처럼 귀여운 느낌? 아니면 물감으로 그린 수채화 느낌? 동화책 느낌?** (Pika 2.1은 실사보다 애니메이션 스타일에 더 잘 어울려!)"
-3.  **모호한 표현 구체화 (매우 중요!)**: "네가 말한 '**[학생의 모호한 표현, 예: '좋은 분위기']**'를 영상으로 어떻게 보여줄 수 있을까? 컴퓨터는 그걸 바로 알 수 없어. 예를 들어, '좋은 분위기'라면 **'따뜻한 햇살이 비치고 꽃잎이 휘날리는 배경에서 인물들이 밝게 웃고 있는 모습'**처럼 어떤 장면을 상상했는지 좀 더 구체적으로 말해줄 수 있을까?"
-4.  **동작**: "인물이나 사물이 어떤 움직임을 보이는지 더 자세히 말해줄 수 있을까? 단순히 '걷는다'고만 하면 Pika가 어떤 모습으로 걸어야 할지 알기 어려워. **'주인공이 신나서 팔짝팔짝 뛰는 모습'**처럼 더 생생하게 표현해 볼까?"
-5.  **감정/표정**: "이 장면에서 인물이 어떤 감정을 느끼고 어떤 표정을 짓고 있는지 알려줄 수 있을까? **'슬픔'이라면 눈물을 흘리거나 고개를 숙인 모습**처럼, 감정을 직접적으로 드러내는 행동이나 표정이 필요해!"
-6.  **구도/시점**: "카메라가 인물을 어떻게 보여줬으면 좋겠어? 전체 몸이 다 보이는 **'전신 샷'**, 얼굴이 크게 보이는 **'클로즈업 샷'** 같은 것들이 있어. 어떤 구도가 가장 좋을까? (Pika 2.1은 복잡한 카메라 움직임보다는 고정된 시점이 더 효과적이야!)"
-7.  **강조하고 싶은 요소**: "이 장면에 특별히 반짝이거나, 움직이거나, 가장 눈에 띄게 하고 싶은 것이 있다면 무엇이니? 예를 들어, '마법 효과'만 있다면 **'주인공의 손에서 반짝이는 파란색 마법 불꽃이 피어오르는 모습'**처럼 더 구체적으로 말해줄 수 있을까?"
-
-**[Pika 2.1 최적화 프롬프트 작성 지침 (GPT가 항상 염두에 둘 것)]**
-- Pika 2.1 AI는 **짧고 간결하며 시각적인 영어 프롬프트**에 가장 잘 반응하고 멋진 영상을 만들 수 있어.
-- 최종 프롬프트는 한 장면당 **1~2개의 핵심적인 시각적 요소를 중심으로, 명확한 동작과 분위기를 담아** 구성해야 해.
-- 문장이 너무 길거나 불필요한 설명은 최대한 줄여야 해.
-- 캐릭터나 배경의 외형 묘사는 이 창에서 다루지 않아. (이는 '캐릭터/배경 이미지 생성'에서 이미 결정된 부분임을 명심해.)
-- **Pika 2.1은 `-ar` (가로세로 비율), `-seed` (영상 고정) 정도의 명령어가 주로 사용돼.** (예: 'A smiling girl running in a park --ar 16:9')
-
-**[대화 지속 및 종료 조건]**
-- **학생이 '장면 완성!' 또는 '이제 이대로 괜찮아요!'와 같이 명확하게 대화 종료를 선언할 때까지는 계속 대화를 이어가며 프롬프트 구체화 및 수정을 도와줘.**
-- 만약 학생이 **"이대로 프롬프트 만들어주세요!"**라고 요청하면, 현재까지의 대화 내용을 바탕으로 최종 프롬프트를 생성해줘.
-- 학생이 **"영상이 이상해요"**, **"이 부분이 마음에 들지 않아요"**, **"다르게 표현하고 싶어요"** 와 같이 구체적인 피드백을 주면, **GPT는 별도의 질문 없이 해당 피드백을 바탕으로 프롬프트를 바로 수정하고 새로운 최종 프롬프트 제안을 해줘.**
-- **최대 7번의 대화 질문(초기 프롬프트 제출 후 이어지는 질문)을 모두 사용하거나, 학생이 명확히 종료를 선언하면,** 지금까지 논의된 내용을 바탕으로 **Pika 영상 제작에 활용될 최종 프롬프트를 아래 형식으로 단 1~2문장으로 간결하게 정리하여 제시**하고 격려 문구를 덧붙여줘. **반드시 Pika AI가 잘 이해할 수 있는 시각적인 언어로 변환해야 해. 학생이 모호한 표현을 썼더라도 네가 가장 적합하게, 그리고 구체적으로 변환해줘.**
-
-**[최종 프롬프트 출력 형식]**
----
-✨ **완성된 영상 프롬프트 (한국어):** [여기에 최종적으로 정리된 간결하고 시각적인 Pika 영상 프롬프트 한국어 번역]
-🎬 **Pika AI용 영어 프롬프트:** [여기에 최종적으로 정리된 Pika AI용 영어 프롬프트]
-이제 이 프롬프트로 멋진 영상을 만들 수 있을 거예요! 정말 잘했어요! 😊
----
-"""
-    )
-
-    # Pika 2.2 전용 시스템 프롬프트
-    PIKA_2_2_SYSTEM_PROMPT = (
-        GLOBAL_GPT_DIRECTIVES +
-        """너는 초등학생이 작성한 장면 설명을 기반으로, **5초 또는 10초 길이의 영화 같은 시퀀스 영상**을 Pika 2.2로 만들 수 있도록 프롬프트를 구체적이고 생생하게 개선해주는 GPT 도우미야. 너의 목표는 학생의 아이디어를 **카메라 움직임, 조명, 분위기, 시점 등을 포함한 영화적인 Pika 2.2 최적화 프롬프트**로 변환하는 것이야. 컴퓨터는 '푸근한 아줌마'처럼 모호한 표현을 이해하기 어렵다는 것을 학생들이 잘 모른다는 점을 항상 기억하고, 이를 구체적인 시각적 묘사로 바꾸도록 적극적으로 도와줘.
-
-**[GPT 역할 및 대화 방식]**
-- 학생의 프롬프트 초안을 면밀히 검토하고, **모호하거나(예: '좋은 분위기'), 한 장면에 너무 많은 이야기가 담겨있거나, 영상으로 표현하기에 설명이 부족한 부분이 있다면 구체적으로 지적**해줘.
-- 부족하거나 더 구체화할 수 있는 부분이 있다면 다음 요소들을 중심으로 **최대 3개 이내의 단일 질문**을 통해 정보를 채워나가줘.
-- 반드시 한 번에 하나씩만 질문하고, 학생의 답변을 듣고 다음 질문을 이어가야 해.
-- 전체 질문은 최대 7개 이내로, 대화의 효율성을 중요하게 생각해줘. 중복된 질문이나 이미 잘 표현된 요소는 건너뛰어도 돼.
-- 질문은 항상 초등학교 5학년 수준의 언어로, 친절하고 격려하는 말투로 해줘. 학생의 창의성을 존중하면서도, 영상 제작 관점에서 필요한 부분을 놓치지 않도록 도와줘.
-
-**[문제점 지적 및 질문 대상 항목 (누락 또는 모호할 시 질문)]**
-
-1.  **장면 길이/정보 과다**: "이 한 장면에 혹시 여러 가지 일이 동시에 일어나고 있지는 않을까? Pika 영상은 한 장면이 5초 또는 10초 정도라서 너무 많은 이야기가 담기면 복잡해 보일 수 있어. 만약 그렇다면, **이 장면을 2개 또는 3개의 더 작은 장면으로 나누어 볼 수 있을까요?** 각 장면에 가장 중요하게 보여주고 싶은 것 하나씩만 생각해 볼까?"
-2.  **영상 스타일**: "이 장면이 어떤 그림 스타일로 보이면 좋을까? **실사처럼 진짜 같았으면 좋겠니? 아니면 애니메이션 느낌?** (Pika 2.2는 사실적인 표현에 강해!)"
-3.  **영상 길이 선택**: "이 장면은 Pika 2.2로 만들 때 **5초와 10초 중에 어떤 길이**가 더 좋을 것 같니? 이야기에 필요한 시간과 보여주고 싶은 내용에 따라 선택할 수 있어."
-4.  **카메라/시점**: "이 장면은 어떤 시점에서 볼까요? **위에서 내려다보는 시점(Bird's eye view), 인물 뒤를 따라가는 시점(Tracking shot), 인물의 눈높이에서(Eye-level shot)** 같은 것들이 있어. 카메라가 움직이나요? 움직인다면 **천천히 줌인(Slow zoom in), 옆으로 이동(Pan shot), 인물을 따라가는(Follow shot)** 등 어떻게 움직이면 좋을까?"
-5.  **조명/시간대**: "장면의 조명은 어떤 느낌인가요? **햇살이 비치는 따뜻한 아침(Warm morning light), 어두운 밤에 가로등 불빛(Street lamp at dark night), 석양(Golden hour sunset)** 처럼 구체적으로 말해줄 수 있을까? 이 장면은 낮인가요 밤인가요? 어떤 시간대인가요?"
-6.  **분위기/톤**: "이 장면에서 느껴지는 분위기는 어떤가요? **아늑한(Cozy), 긴장되는(Tense), 꿈같은(Dreamlike), 밝고 희망찬(Bright and hopeful)** 같은 것들이 있어. 특별히 강조하고 싶은 감정이나 기분이 있니?"
-7.  **모호한 표현 구체화 (매우 중요!)**: "네가 말한 '**[학생의 모호한 표현, 예: '좋은 분위기']**'를 영상으로 어떻게 보여줄 수 있을까? 컴퓨터는 그걸 바로 알 수 없어. 예를 들어, '좋은 분위기'라면 **'따뜻한 햇살이 비치고 꽃잎이 휘날리는 배경에서 인물들이 밝게 웃고 있는 모습'**처럼 어떤 장면을 상상했는지 좀 더 구체적으로 말해줄 수 있을까?"
-8.  **동작/표정**: "인물이나 사물이 어떤 움직임을 보이는지, 어떤 감정을 느끼고 어떤 표정을 짓고 있는지 더 자세히 말해줄 수 있을까? **'주인공이 놀라서 눈을 크게 뜨는 모습'**처럼 구체적인 행동이나 표정이 필요해!"
-9.  **강조하고 싶은 요소**: "이 장면에 특별히 반짝이거나, 움직이거나, 가장 눈에 띄게 하고 싶은 것이 있다면 무엇이니? (예: '반짝이는 마법 효과', '아름다운 노을') Pika 2.2는 작은 디테일도 잘 표현해!"
-
-**[Pika 2.2 최적화 프롬프트 작성 지침 (GPT가 항상 염두에 둘 것)]**
-- Pika AI는 **짧고 간결하며 시각적인 영어 프롬프트**에 가장 잘 반응하고 멋진 영상을 만들 수 있어.
-- 최종 프롬프트는 한 장면당 **1~2개의 핵심적인 시각적 요소를 중심으로, 명확한 동작, 분위기, 구도, 카메라 움직임, 조명까지 담아** 구성해야 해.
-- 문장이 너무 길거나 불필요한 설명은 최대한 줄여야 해.
-- 캐릭터나 배경의 외형 묘사는 이 창에서 다루지 않아. (이는 '캐릭터/배경 이미지 생성'에서 이미 결정된 부분임을 명심해.)
-- **Pika 2.2에서 주로 사용되는 고급 명령어(-gs, -ar, -fps, -camera, -motion, -style, -neg)를 필요하다면 적극적으로 활용하여 프롬프트의 품질을 높여줘.** 특히, 사용자가 영상 길이를 선택했다면 **`-duration [선택된 시간]s`** 명령어를 프롬프트에 포함하는 것을 고려해줘. (예: 'A detective walks down a dimly lit alley, cinematic shot, low angle --camera pan right --gs 10 --ar 16:9 --duration 5s')
-
-**[대화 지속 및 종료 조건]**
-- **학생이 '장면 완성!' 또는 '이제 이대로 괜찮아요!'와 같이 명확하게 대화 종료를 선언할 때까지는 계속 대화를 이어가며 프롬프트 구체화 및 수정을 도와줘.**
-- 만약 학생이 **"이대로 프롬프트 만들어주세요!"**라고 요청하면, 현재까지의 대화 내용을 바탕으로 최종 프롬프트를 생성해줘.
-- 학생이 **"영상이 이상해요"**, **"이 부분이 마음에 들지 않아요"**, **"다르게 표현하고 싶어요"** 와 같이 구체적인 피드백을 주면, **GPT는 별도의 질문 없이 해당 피드백을 바탕으로 프롬프트를 바로 수정하고 새로운 최종 프롬프트 제안을 해줘.**
-- **최대 7번의 대화 질문(초기 프롬프트 제출 후 이어지는 질문)을 모두 사용하거나, 학생이 명확히 종료를 선언하면,** 지금까지 논의된 내용을 바탕으로 **Pika 영상 제작에 활용될 최종 프롬프트를 아래 형식으로 단 1~2문장으로 간결하게 정리하여 제시**하고 격려 문구를 덧붙여줘. **반드시 Pika AI가 잘 이해할 수 있는 시각적인 언어로 변환해야 해. 학생이 모호한 표현을 썼더라도 네가 가장 적합하게, 그리고 구체적으로 변환해줘.**
-
-**[최종 프롬프트 출력 형식]**
----
-✨ **완성된 영상 프롬프트 (한국어):** [여기에 최종적으로 정리된 간결하고 시각적인 Pika 영상 프롬프트 한국어 번역]
-🎬 **Pika AI용 영어 프롬프트:** [여기에 최종적으로 정리된 Pika AI용 영어 프롬프트]
-이제 이 프롬프트로 멋진 영상을 만들 수 있을 거예요! 정말 잘했어요! 😊
----
-"""
-    )
-    # --- Pika 버전에 따른 시스템 프롬프트 정의 끝 ---
-
-
-    # 선택된 Pika 버전에 따라 현재 시스템 프롬프트 설정
-    if pika_version == "Pika 2.1 (간단한 애니메이션)":
-        current_system_prompt = PIKA_2_1_SYSTEM_PROMPT
-    else: # "Pika 2.2 (영화 같은 영상)"
-        current_system_prompt = PIKA_2_2_SYSTEM_PROMPT
-
-    # st.session_state 초기화 시 시스템 프롬프트도 다시 로드하도록 조건 추가
-    if "messages_video_prompt" not in st.session_state or \
-       st.session_state.get("last_pika_version_selected") != pika_version: # 추가된 조건
-        st.session_state.messages_video_prompt = [
-            {"role": "system", "content": current_system_prompt}
-        ]
-        st.session_state.current_scene_prompt = ""
-        st.session_state.video_prompt_finalized = False 
-        st.session_state.last_pika_version_selected = pika_version # 선택된 버전 저장
-
-
-    # --- 입력 칸 구분 명확화 코드 시작 ---
-    st.subheader("1단계: 이 장면은 어떤 내용인가요?")
-    scene_summary = st.text_input(
-        "**이 장면을 한 문장으로 요약해주세요.** (예: 주인공이 마법의 숲에 도착하는 장면)", 
-        key="scene_summary_input",
-        placeholder="예: 주인공이 마법의 숲에 도착하는 장면"
-    )
-
-    st.subheader("2단계: 영상 프롬프트 초안을 작성해주세요.")
-    user_prompt_draft = st.text_area(
-        "**이 장면을 Pika AI 영상으로 만들려면 어떻게 표현할까요?** (구체적으로 작성해보세요!)", 
-        key="video_prompt_draft_input", 
-        value=st.session_state.current_scene_prompt,
-        placeholder="예: 소녀가 신비로운 숲길을 걷는 모습. 나뭇잎 사이로 햇살이 비치고 작은 요정들이 주변을 날아다님."
-    )
-    # --- 입력 칸 구분 명확화 코드 끝 ---
-
-    if st.button("프롬프트 점검 시작") and scene_summary and user_prompt_draft:
-        st.session_state.current_scene_prompt = user_prompt_draft
-        full_user_message = f"장면 요약: {scene_summary}\n프롬프트 초안: {user_prompt_draft}"
-        st.session_state.messages_video_prompt.append({"role": "user", "content": full_user_message})
-        with st.spinner("GPT가 프롬프트를 점검 중입니다..."):
-            gpt_response = ask_gpt(st.session_state.messages_video_prompt)
-            st.session_state.messages_video_prompt.append({"role": "assistant", "content": gpt_response})
-        st.rerun()
-
-    for message in st.session_state.messages_video_prompt:
-        if message["role"] != "system":
-            with st.chat_message(message["role"]):
-                st.markdown(message["content"])
-
-    # video_prompt_finalized가 True가 될 때까지 채팅 입력 필드 표시
-    if not st.session_state.video_prompt_finalized:
-        if prompt := st.chat_input("GPT의 제안에 대해 이야기하거나 프롬프트를 수정해주세요. (예: '주인공이 좀 더 신났으면 좋겠어요', '배경이 더 밝았으면 좋겠어요')"):
-            st.session_state.messages_video_prompt.append({"role": "user", "content": prompt})
-            with st.spinner("GPT가 답변을 생성 중입니다..."):
-                gpt_response = ask_gpt(st.session_state.messages_video_prompt)
-                st.session_state.messages_video_prompt.append({"role": "assistant", "content": gpt_response})
-            st.rerun()
-
-        # GPT가 최종 프롬프트를 제시했는지 확인 (파싱 로직)
-        if st.session_state.messages_video_prompt and \
-           st.session_state.messages_video_prompt[-1]["role"] == "assistant":
-            last_gpt_message = st.session_state.messages_video_prompt[-1]["content"]
-            
-            # 새로운 출력 형식에 맞춰 파싱
-            if "✨ **완성된 영상 프롬프트 (한국어):**" in last_gpt_message and \
-               "🎬 **Pika AI용 영어 프롬프트:**" in last_gpt_message:
-                
-                # 한국어 프롬프트 추출
-                start_korean_index = last_gpt_message.find("✨ **완성된 영상 프롬프트 (한국어):**") + len("✨ **완성된 영상 프롬프트 (한국어):**")
-                end_korean_index = last_gpt_message.find("🎬 **Pika AI용 영어 프롬프트:**", start_korean_index)
-                korean_final_prompt = last_gpt_message[start_korean_index:end_korean_index].strip()
-
-                # 영어 프롬프트 추출
-                start_english_index = last_gpt_message.find("🎬 **Pika AI용 영어 프롬프트:**") + len("🎬 **Pika AI용 영어 프롬프트:**")
-                end_english_index = last_gpt_message.find("이제 이 프롬프트로", start_english_index)
-                if end_english_index != -1:
-                    english_final_prompt = last_gpt_message[start_english_index:end_english_index].strip()
-                else:
-                    english_final_prompt = last_gpt_message[start_english_index:].strip()
-
-                # 격려 메시지 추출
-                encouragement_message = ""
-                encouragement_start_index = last_gpt_message.find("이제 이 프롬프트로", end_english_index if end_english_index != -1 else start_english_index)
-                if encouragement_start_index != -1:
-                    encouragement_message = last_gpt_message[encouragement_start_index:].strip()
-
-                st.success("✅ GPT가 새로운 프롬프트 초안을 제안했어요! 마음에 드나요?")
-                st.markdown("---") 
-
-                st.subheader("💡 완성된 영상 프롬프트")
-                st.write(f"**한국어:** {korean_final_prompt}")
-                st.markdown(f"**Pika AI용 영어:** ```{english_final_prompt}```") # 코드 블록으로 강조
-
-                st.markdown("---") 
-                st.info(f"👍 {encouragement_message}")
-                st.markdown("---")
-                st.markdown("⬆️ 이 프롬프트가 마음에 든다면 **'장면 완성!'** 이라고 말해주세요. 혹시 수정하고 싶은 부분이 있다면 어떤 점이 마음에 들지 않는지 구체적으로 설명해주세요.")
-                
-            # 기존 종료 조건도 함께 유지
-            elif "최종 프롬프트:" in last_gpt_message or \
-                 "이 프롬프트로 멋진 영상을 만들 수 있을 거예요!" in last_gpt_message:
-                if "✨ **완성된 영상 프롬프트 (한국어):**" not in last_gpt_message:
-                    st.success("✅ 영상 프롬프트 점검이 완료되었습니다! (이전 형식)")
-                    with st.chat_message("assistant"):
-                        st.markdown(last_gpt_message)
-                    st.info("⬆️ 이 프롬프트가 마음에 든다면 **'장면 완성!'** 이라고 말해주세요. 혹시 수정하고 싶은 부분이 있다면 어떤 점이 마음에 들지 않는지 구체적으로 설명해주세요.")
-
-
-    if st.button("프롬프트 점검 초기화", key="reset_video_prompt_chat"):
-        # 초기화 시, 현재 선택된 Pika 버전에 맞는 시스템 프롬프트로 다시 로드
-        st.session_state.messages_video_prompt = [
-            {"role": "system", "content": current_system_prompt}
-        ]
-        st.session_state.current_scene_prompt = ""
-        st.session_state.video_prompt_finalized = False 
-        st.rerun()
+# 사이드바에서 작업 선택 -> sections/ 아래 해당 모듈만 불러와서 실행
+SECTIONS = {
+    "1. 이야기 점검하기": "story_review",
+    "2. 이야기 나누기": "segmentation",
+    "3. 캐릭터/배경 이미지 생성": "image_generation",
+    "4. 장면별 영상 Prompt 점검": "video_prompt",
+    "5. 운영 대시보드 (선생님용)": "ops_dashboard",
+}
+chat_option = st.sidebar.radio("작업을 선택하세요:", list(SECTIONS))
+st.session_state.current_section = chat_option.split(".")[0]  # 지표/로그의 섹션 라벨
+
+importlib.import_module(f"sections.{SECTIONS[chat_option]}").render()
+
+persist_session()
+get_metrics().observe("app_script_seconds", time.perf_counter() - script_started,
+                      section=st.session_state.current_section)
@@ -0,0 +1,828 @@
+import streamlit as st
+import datetime
+import time
+import base64
+from context_window import ConversationCompactor, conversation_key, count_tokens, count_message_tokens
+from response_cache import ResponseCache, cache_key
+from scheduler import RequestScheduler, SchedulerBusy
+from image_jobs import ImageJobManager
+from blob_store import BlobStore
+from gallery import Gallery
+from metrics import MetricsRegistry
+from model_router import ModelRouter
+from inflight import InflightRegistry, flight_key
+from session_store import SessionStore
+from quota import TokenQuota, QuotaExceeded, class_of
+import prompts
+import final_prompts
+import scene_batch
+import shared_state
+import chat_view
+
+# =========================================================
+# 🧩 섹션 페이지가 함께 쓰는 기능 (GPT/이미지 호출, 로깅, 세션 보관)
+# =========================================================
+# 모듈이라 프로세스에서 처음 import할 때 한 번만 실행되고, 리런마다 다시 정의되지 않는다.
+# openai / requests / pandas / pyarrow는 무거워서 처음 쓰는 함수 안에서 import한다
+# (로그인 화면이나 첫 화면만 보는 동안에는 불러오지 않음).
+
+# 구글 시트 웹 앱 URL (선생님이 알려주신 URL로 고정)
+GSHEET_WEBAPP_URL = "https://script.google.com/macros/s/AKfycbwu0ZU69GTrkYmXjo7V2t4Vskvo56_dOBLcDrw0heRSQZrw4_ZmKzsrHQdPjx3ZzJ7z3g/exec"
+
+# =========================================================
+# ⚙️ 시스템 함수 정의 (키 풀 + 로깅)
+# =========================================================
+
+@st.cache_resource
+def get_shared_state():
+    """여러 서버 프로세스가 함께 보는 키 상태/요청 토큰/캐시 저장소 (Secrets의 [shared_state], 기본은 프로세스 메모리)"""
+    return shared_state.from_config(st.secrets.get("shared_state", {}))
+
+@st.cache_resource
+def _build_client_pool():
+    from openai_pool import OpenAIClientPool
+    return OpenAIClientPool(
+        dict(st.secrets["openai_keys"]),
+        default_cooldown=st.secrets.get("key_cooldown_seconds", 20),
+        shared=get_shared_state()
+    )
+
+def get_client_pool():
+    """Secrets의 openai_keys로 만든 프로세스 공용 클라이언트 풀 (세션/리런 간 재사용)"""
+    try:
+        return _build_client_pool()
+    except Exception as e:
+        st.error(f"API 키 로드 실패: {e}. Secrets에 [openai_keys]가 설정되었는지 확인하세요.")
+        st.stop()
+
+@st.cache_resource
+def get_log_shipper():
+    """프로세스 전체에서 하나만 쓰는 로그 전송기 (Secrets로 배치 크기/주기 조절)"""
+    from log_shipper import LogShipper
+    return LogShipper(
+        st.secrets.get("gsheet_webapp_url", GSHEET_WEBAPP_URL),  # 부하 테스트에서는 모의 서버로 바꿔 씀
+        batch_size=st.secrets.get("log_batch_size", 1),  # 2 이상은 여러 줄을 받도록 바꾼 앱스 스크립트가 있을 때만
+        flush_interval=st.secrets.get("log_flush_seconds", 5.0),
+        max_queue=st.secrets.get("log_max_queue", 1000),
+        spill_path=st.secrets.get("log_spill_path", "log_spill.jsonl")
+    )
+
+@st.cache_resource
+def get_interaction_log():
+    """글 내용 없이 숫자와 ID만 남기는 로컬 Parquet 기록 (날짜/반별 폴더, 선생님 분석 화면용)"""
+    from interaction_log import InteractionLog
+    return InteractionLog(
+        root=st.secrets.get("interaction_log_dir", "interaction_log"),
+        flush_interval=st.secrets.get("interaction_log_flush_seconds", 5.0),
+        keep_days=st.secrets.get("interaction_log_keep_days", 365)
+    )
+
+def log_sinks():
+    """작업 스레드로 넘길 로그 전송기와 상호작용 기록 (save_log_to_sheet(**log_sinks)로 씀)"""
+    return {"log_shipper": get_log_shipper(), "interaction_log": get_interaction_log()}
+
+def save_log_to_sheet(action_type, question, answer, latency, status, tokens=0, ttft=None, student_name=None, prompt_id=None,
+                      cached_tokens=None, prompt_tokens=None, model=None, route=None, section="-",
+                      log_shipper=None, interaction_log=None):
+    """
+    구글 앱스 스크립트로 보낼 로그를 큐에 넣고, 같은 이벤트를 로컬 상호작용 기록에도 남김
+    (백그라운드 작업에서는 student_name과 log_sinks()로 꺼내 둔 전송기/기록을 직접 넘김)
+    """
+    student_name = student_name or st.session_state.get("student_name", "Unknown")
+    try:
+        (interaction_log or get_interaction_log()).record(
+            student_name, class_of(student_name), section, action_type, status, model=model, route=route,
+            prompt_id=prompt_id, latency=latency, ttft=ttft, tokens=tokens, prompt_tokens=prompt_tokens,
+            cached_tokens=cached_tokens, question_chars=len(str(question)), answer_chars=len(str(answer))
+        )
+    except Exception as e:
+        print(f"상호작용 기록 실패: {e}")
+    try:
+        payload = {
+            "student_name": student_name,
+            "user_question": f"[{action_type}] {question}",
+            "ai_answer": str(answer)[:1000], 
+            "latency": latency,
+            "status": status,
+            "tokens": tokens,
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds")  # 배치 전송이라 발생 시각을 따로 기록
+        }
+        if ttft is not None:
+            payload["ttft"] = ttft  # 스트리밍일 때 첫 토큰까지 걸린 시간
+        if prompt_id:
+            payload["prompt_id"] = prompt_id  # 어떤 버전의 시스템 프롬프트로 대화했는지
+        if model:
+            payload["model"] = model  # 어떤 모델이 답했는지 (route: 라우팅 이유)
+            payload["route"] = route or "explicit"
+        if prompt_tokens:
+            payload["cached_tokens"] = cached_tokens or 0  # 프롬프트 캐시에서 읽은 입력 토큰
+            payload["cached_ratio"] = round((cached_tokens or 0) / prompt_tokens, 3)
+        (log_shipper or get_log_shipper()).submit(payload)
+    except Exception as e:
+        print(f"로그 저장 실패 (콘솔 로그): {e}")
+
+def usage_counts(usage):
+    """응답 usage에서 (전체 토큰, 프롬프트 토큰, 프롬프트 캐시에서 읽은 토큰) 추출"""
+    if usage is None:
+        return 0, 0, 0
+    details = getattr(usage, "prompt_tokens_details", None)
+    return usage.total_tokens, usage.prompt_tokens, (getattr(details, "cached_tokens", None) or 0)
+
+def stream_chat_completion(client, messages, model, start_time, flight, request_options, timeout):
+    """
+    (작업 스레드) 스트리밍 답변을 flight에 조각마다 쌓고, (답변, usage, 첫 토큰 시간) 반환 (답변은 message_reply 참고).
+    timeout초 안에 다 받지 못하면 TimeoutError (요청 타임아웃은 조각 사이 간격에만 걸리므로 전체 시간은 따로 봄)
+    """
+    flight.update(text="")  # 풀이 다른 키로 넘겨 다시 부르면 끊긴 앞부분을 버리고 처음부터 받음
+    give_up_at = time.monotonic() + timeout
+    response = client.chat.completions.create(
+        model=model,
+        messages=messages,
+        stream=True,
+        stream_options={"include_usage": True},  # 마지막 청크에 usage가 실려 옴
+        timeout=timeout,
+        **request_options
+    )
+    usage, ttft, tool_calls = None, None, {}
+    for chunk in response:
+        if time.monotonic() > give_up_at:
+            response.close()
+            raise TimeoutError("답변을 받는 데 허용된 시간이 지났어요.")
+        if chunk.usage:
+            usage = chunk.usage
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta
+        for tool_call in delta.tool_calls or []:  # 함수 호출 인자는 조각으로 나뉘어 옴
+            call = tool_calls.setdefault(tool_call.index, {"name": "", "arguments": ""})
+            call["name"] += tool_call.function.name or ""
+            call["arguments"] += tool_call.function.arguments or ""
+        if delta.content:
+            if ttft is None:
+                ttft = round(time.time() - start_time, 2)
+            flight.append(delta.content)
+    if tool_calls:
+        return final_prompts.parse_tool_call(tool_calls[0]["name"], tool_calls[0]["arguments"]), usage, ttft
+    return flight.text, usage, ttft
+
+def message_reply(message):
+    """스트리밍이 아닌 응답 메시지의 답변: 함수 호출이면 ImagePrompt / PikaPrompt, 아니면 문자열"""
+    if message.tool_calls:
+        return final_prompts.parse_tool_call(message.tool_calls[0].function.name, message.tool_calls[0].function.arguments)
+    return message.content
+
+def retry_policy(kind):
+    """Secrets로 조절하는 재시도 정책 (kind: chat / image)"""
+    from resilience import RetryPolicy
+    return RetryPolicy(
+        max_attempts=st.secrets.get(f"{kind}_retry_attempts", 4),
+        base_delay=st.secrets.get(f"{kind}_retry_base_delay", 0.5),
+        max_delay=st.secrets.get(f"{kind}_retry_max_delay", 8.0),
+        deadline=st.secrets.get(f"{kind}_retry_deadline", 45.0 if kind == "chat" else 120.0)
+    )
+
+@st.cache_resource
+def get_metrics():
+    """지연 시간/토큰/오류 지표 (운영 대시보드와 Prometheus 파일 내보내기에 사용)"""
+    registry = MetricsRegistry(window_seconds=st.secrets.get("metrics_window_seconds", 3600))
+    if st.secrets.get("metrics_export_path"):
+        registry.start_file_exporter(st.secrets["metrics_export_path"])
+    return registry
+
+def record_call(kind, section, model, key_alias, outcome, latency=None, tokens=0, metrics=None):
+    """호출 한 건을 섹션/모델/키 별칭/결과 라벨로 기록 (백그라운드 작업은 metrics를 직접 넘김)"""
+    metrics = metrics or get_metrics()
+    labels = {"section": section, "model": model, "key": key_alias or "-", "outcome": outcome}
+    metrics.inc(f"{kind}_requests_total", **labels)
+    if latency is not None:
+        metrics.observe(f"{kind}_latency_seconds", latency, **labels)
+    if tokens:
+        metrics.inc(f"{kind}_tokens_total", tokens, **labels)
+
+def record_prompt_cache(section, model, prompt_tokens, cached_tokens, metrics=None):
+    """입력 토큰 중 프롬프트 캐시에서 읽은 토큰 수와 비율을 기록"""
+    if not prompt_tokens:
+        return
+    metrics = metrics or get_metrics()
+    metrics.inc("gpt_prompt_tokens_total", prompt_tokens, section=section, model=model)
+    metrics.inc("gpt_cached_tokens_total", cached_tokens, section=section, model=model)
+    metrics.observe("gpt_cached_ratio", cached_tokens / prompt_tokens, buckets=(0, 0.25, 0.5, 0.75, 0.9, 1),
+                    section=section, model=model)
+
+@st.cache_resource
+def get_model_router():
+    """Secrets의 [model_routing]으로 만든 모델 라우터 (질문 턴은 작은 모델, 최종 결과는 큰 모델)"""
+    return ModelRouter.from_config(st.secrets.get("model_routing", {}))
+
+@st.cache_resource
+def get_quota():
+    """학생별/반별 하루 토큰 예산과 한 번에 보낼 수 있는 글 크기 (Secrets의 [token_quota])"""
+    config = st.secrets.get("token_quota", {})
+    return TokenQuota(
+        max_message_tokens=config.get("max_message_tokens", 4000),
+        student_daily_tokens=config.get("student_daily_tokens", 200000),
+        class_daily_tokens=config.get("class_daily_tokens", 3000000),
+        store_path=config.get("store_path", "quota.sqlite3"),
+        flush_interval=config.get("flush_seconds", 10.0),
+        # 메모리 백엔드는 재시작하면 비므로, 그때는 디스크에서 불러온 이 프로세스의 합계를 씀
+        shared=get_shared_state() if get_shared_state().multi_process else None
+    )
+
+def quota_rejected(e, section):
+    """한도 초과를 학생에게 부드럽게 안내하고 기록"""
+    st.warning(f"🎟️ {e}")
+    save_log_to_sheet("한도초과", e.kind, str(e), 0, "QUOTA", section=section)
+    get_metrics().inc("gpt_quota_rejections_total", section=section, kind=e.kind)
+
+@st.cache_resource
+def get_response_cache():
+    """단발성 호출(장면 나누기 등)용 세션 공유 응답 캐시"""
+    return ResponseCache(
+        max_entries=st.secrets.get("response_cache_size", 256),
+        ttl_seconds=st.secrets.get("response_cache_ttl", 24 * 3600),
+        sqlite_path=st.secrets.get("response_cache_path"),  # 지정하면 디스크에도 보관
+        shared=get_shared_state() if get_shared_state().multi_process else None  # 한 프로세스면 자체 LRU로 충분
+    )
+
+@st.cache_resource
+def get_scheduler():
+    """모든 학생 세션이 함께 쓰는 요청 스케줄러 (레인별 동시 실행 수 / 분당 요청 수)"""
+    key_count = max(1, len(st.secrets.get("openai_keys", {})))
+    return RequestScheduler({
+        "chat": {
+            "max_concurrency": st.secrets.get("chat_max_concurrency", 8),
+            "rate_per_minute": st.secrets.get("chat_rate_per_minute", 120 * key_count),
+            "burst": st.secrets.get("chat_burst", 10)
+        },
+        "image": {
+            "max_concurrency": st.secrets.get("image_max_concurrency", 2),
+            "rate_per_minute": st.secrets.get("image_rate_per_minute", 5 * key_count),
+            "burst": st.secrets.get("image_burst", 2)
+        },
+        # 초안 미리보기는 빠르고 싸므로 최종 이미지 뒤에 줄 서지 않게 따로 둠
+        "image_draft": {
+            "max_concurrency": st.secrets.get("image_draft_max_concurrency", 4),
+            "rate_per_minute": st.secrets.get("image_draft_rate_per_minute", 20 * key_count),
+            "burst": st.secrets.get("image_draft_burst", 4)
+        }
+    }, shared=get_shared_state())
+
+# --- 작업 스레드 공용 API 호출 (스케줄러 차례 → 키 풀 → 재시도 → 로그/지표) ---
+def worker_deps(kind):
+    """
+    작업 스레드에서 API를 부를 때 쓰는 공용 객체와 설정 (kind: chat / image).
+    작업 스레드에서는 st.* 를 쓸 수 없으므로 스크립트 스레드에서 미리 꺼내 넘긴다.
+    """
+    return {
+        "pool": get_client_pool(),
+        "scheduler": get_scheduler(),
+        "metrics": get_metrics(),
+        "quota": get_quota(),
+        "sinks": log_sinks(),
+        "policy": retry_policy(kind),
+        "queue_timeout": st.secrets.get(f"{kind}_queue_timeout", 60 if kind == "chat" else 120),
+    }
+
+def run_api_call(request, deps, lane, student_name, section, model, route, action, error_action, question, describe,
+                 metric_kind="gpt", prompt_id=None, log_model=True, on_wait=None, on_retry=None):
+    """
+    (작업 스레드) request(client)를 lane 차례를 받아 키 풀로 실행하고, 일시적인 오류는 재시도.
+    로그/지표/사용량은 여기서 한 번만 남긴다. describe(결과) -> (로그에 남길 답변, usage, 첫 토큰 시간).
+    request(client, timeout)의 timeout은 재시도 시간 예산 중 남은 초 (요청 타임아웃으로 넘길 것).
+    on_wait(앞에 남은 요청 수, 차례가 오면 None), on_retry(시도 번호, 대기 초, 오류)는 화면 안내용.
+    (결과, 프롬프트 캐시에서 읽은 토큰 수) 반환. 끝내 실패하면 오류를 기록하고 그대로 올림.
+    """
+    start_time = time.time()
+    call_info = {}
+    metrics = deps["metrics"]
+    log_labels = {"model": model, "route": route} if log_model else {}
+
+    def attempt(deadline):
+        # 재시도마다 스케줄러 차례를 새로 받음 (기다리는 동안 슬롯을 붙잡지 않도록)
+        # 대기열과 요청 모두 남은 시간 예산 안에서만 기다림 (한 턴이 예산을 훌쩍 넘기지 않도록)
+        queue_timeout = min(deps["queue_timeout"], seconds_left(deadline))
+        with deps["scheduler"].slot(lane, student_name, timeout=queue_timeout, on_wait=on_wait):
+            if on_wait is not None:
+                on_wait(None)
+            return deps["pool"].call(lambda client: request(client, seconds_left(deadline)), call_info)
+
+    def retried(attempt_no, delay, error):
+        metrics.inc(f"{metric_kind}_retries_total", section=section, model=model, error=type(error).__name__)
+        if on_retry is not None:
+            on_retry(attempt_no, delay, error)
+
+    from resilience import call_with_retry, seconds_left  # retry_policy()에서 이미 불러온 모듈
+    try:
+        result = call_with_retry(attempt, deps["policy"], on_retry=retried)
+    except Exception as e:
+        # 메시지 전체(시스템 프롬프트 포함) 대신 마지막 질문과 prompt_id만 남김
+        save_log_to_sheet(error_action, question, str(e), 0, "ERROR", student_name=student_name, prompt_id=prompt_id,
+                          section=section, **log_labels, **deps["sinks"])
+        record_call(metric_kind, section, model, call_info.get("key_alias"), type(e).__name__,
+                    round(time.time() - start_time, 2), metrics=metrics)
+        raise
+
+    answer, usage, ttft = describe(result)
+    tokens, prompt_tokens, cached_tokens = usage_counts(usage)
+    if usage is not None:
+        deps["quota"].record(student_name, prompt_tokens, tokens - prompt_tokens)
+    latency = round(time.time() - start_time, 2)
+    save_log_to_sheet(action, question, answer, latency, "SUCCESS", tokens, ttft=ttft, student_name=student_name,
+                      prompt_id=prompt_id, cached_tokens=cached_tokens, prompt_tokens=prompt_tokens, section=section,
+                      **log_labels, **deps["sinks"])
+    record_call(metric_kind, section, model, call_info.get("key_alias"), "success", latency, tokens, metrics=metrics)
+    record_prompt_cache(section, model, prompt_tokens, cached_tokens, metrics=metrics)
+    if ttft is not None:
+        metrics.observe(f"{metric_kind}_ttft_seconds", ttft, section=section, model=model)
+    return result, cached_tokens
+
+# --- 긴 대화 압축 (오래된 턴 → 롤링 요약) ---
+def summarize_turns(previous_summary, turns):
+    """
+    기존 요약 + 새로 밀려난 대화 턴을 작은 모델로 다시 요약.
+    다른 GPT 호출처럼 chat 레인 차례를 받고 재시도하며, 지표에는 route="summary"로 남김
+    """
+    transcript = "\n".join(
+        f"{'학생' if m['role'] == 'user' else 'GPT'}: {m['content']}" for m in turns
+    )
+    model = st.secrets.get("context_summary_model", "gpt-4o-mini")
+    messages = [
+        {"role": "system", "content": prompts.get_prompt(prompts.SUMMARY)},
+        {"role": "user", "content": f"[기존 요약]\n{previous_summary or '(없음)'}\n\n[새 대화]\n{transcript}"}
+    ]
+    section = st.session_state.get("current_section", "-")
+    get_metrics().inc("gpt_routes_total", section=section, model=model, route="summary")
+
+    def request(client, timeout):
+        response = client.chat.completions.create(model=model, messages=messages, timeout=timeout)
+        return response.choices[0].message.content, response.usage
+
+    (summary, _), _ = run_api_call(
+        request, worker_deps("chat"), "chat", st.session_state.get("student_name", "Unknown"), section, model,
+        "summary", "대화요약", "대화요약에러", f"턴 {len(turns)}개", lambda result: (result[0], result[1], None),
+        prompt_id=prompts.SUMMARY
+    )
+    return summary
+
+def compact_history(messages):
+    """토큰 예산을 넘은 대화는 요약본으로 줄여서 반환하고, 턴별 프롬프트 토큰 수를 기록"""
+    compactor = ConversationCompactor(
+        summarize_turns,
+        token_budget=st.secrets.get("context_token_budget", 6000),
+        keep_turns=st.secrets.get("context_keep_turns", 4)
+    )
+    state = st.session_state.setdefault("context_summaries", {}).setdefault(conversation_key(messages), {})
+    try:
+        to_send, full_tokens, sent_tokens = compactor.compact(messages, state)
+    except Exception as e:
+        print(f"대화 요약 실패 (전체 기록으로 전송): {e}")
+        return messages
+    st.session_state.setdefault("prompt_token_log", []).append({
+        "시각": datetime.datetime.now().strftime("%H:%M:%S"),
+        "전체 토큰": full_tokens,
+        "전송 토큰": sent_tokens
+    })
+    return to_send
+
+@st.cache_resource
+def get_inflight():
+    """진행 중인 GPT 요청 목록 (같은 요청이 겹치면 API를 한 번만 부르고 결과를 나눠 씀)"""
+    return InflightRegistry(
+        max_workers=st.secrets.get("gpt_call_workers", 32),
+        keep_seconds=st.secrets.get("inflight_keep_seconds", 60)
+    )
+
+def run_chat_call(flight, to_send, model, route, stream, request_options, section, prompt_id, last_user_msg,
+                  student_name, deps, cache_put):
+    """(작업 스레드) 재시도를 포함한 실제 API 호출 한 건. 로그/지표도 여기서 한 번만 남김"""
+    start_time = time.time()
+
+    def request(client, timeout):
+        if stream:
+            return stream_chat_completion(client, to_send, model, start_time, flight, request_options, timeout)
+        response = client.chat.completions.create(model=model, messages=to_send, timeout=timeout, **request_options)
+        return message_reply(response.choices[0].message), response.usage, None
+
+    def describe(result):
+        content, usage, ttft = result
+        return (content if isinstance(content, str) else content.to_markdown()), usage, ttft
+
+    def on_retry(attempt_no, delay, error):
+        flight.update(notice=f"🔄 연결이 잠깐 불안정해요. {delay:.0f}초 뒤에 다시 물어볼게요... ({attempt_no}번째 재시도)")
+
+    (content, _, _), cached_tokens = run_api_call(
+        request, deps, "chat", student_name, section, model, route, "대화", "대화에러", last_user_msg, describe,
+        prompt_id=prompt_id, on_wait=lambda position: flight.update(position=position), on_retry=on_retry
+    )
+    if cache_put is not None:
+        cache_put(content)
+    return content, cached_tokens
+
+def follow_flight(flight, area):
+    """요청이 끝날 때까지 대기 순번 / 재시도 안내 / 받은 답변을 area(st.empty)에 그리고 결과 반환"""
+    seen = None
+    while True:
+        version, text, notice, position, done = flight.wait_change(seen, timeout=0.5)
+        if done:
+            break
+        if version != seen:
+            if text:
+                area.markdown(text + " ▌")
+            elif notice:
+                area.info(notice)
+            elif position:
+                area.info(f"⏳ 친구들의 요청이 많아 차례를 기다리고 있어요. (내 앞에 {position}개)")
+            seen = version
+    return flight.outcome()
+
+# --- [핵심] ask_gpt 함수 (웹 앱 로깅 적용) ---
+def ask_gpt(messages, model=None, stream=False, cache=False, tools=None, final=False):
+    """
+    model을 주지 않으면 모델 라우터가 섹션/턴에 맞춰 고름 (final=True면 최종 결과용 큰 모델).
+    stream=True면 호출한 곳의 st.chat_message 안에 답변을 실시간으로 그림.
+    cache=True는 대화 맥락이 없는 단발성 호출에만 사용 (같은 요청이면 저장된 답변 재사용).
+    tools(final_prompts의 함수 정의)를 주면 모델이 최종 프롬프트를 함수로 보낼 수 있고, 그때는
+    문자열 대신 ImagePrompt / PikaPrompt를 반환.
+    같은 요청이 이미 진행 중이면(두 번 누르기, 기다리다 다시 보내기) 새로 부르지 않고 그 결과를 받음.
+    cache=True 요청은 다른 학생의 같은 요청과도 합쳐짐.
+    일시적인 오류는 재시도하고, 끝내 실패하면 오류를 보여주고 None 반환 (대화 기록에 넣지 말 것).
+    """
+    section = st.session_state.get("current_section", "-")
+    student_name = st.session_state.get("student_name", "Unknown")
+    prompt_id = prompts.prompt_id_of(messages)
+    resolved = prompts.resolve_messages(messages)  # 세션에는 ID만 있으므로 여기서 전체 문장으로 채움
+    last_user_msg = next((m['content'] for m in reversed(messages) if m['role'] == 'user'), "System Prompt")
+    route = None
+    if model is None:
+        model, route = get_model_router().route(section, messages, final=final)
+
+    quota = get_quota()
+    try:
+        if messages[-1]["role"] == "user":
+            quota.check_message(count_tokens(messages[-1]["content"]))
+    except QuotaExceeded as e:
+        quota_rejected(e, section)
+        return None
+
+    if cache:
+        key = cache_key(model, resolved, version=prompt_id)
+        cached = get_response_cache().get(key)
+        if cached is not None:
+            if stream:
+                st.markdown(cached)
+            save_log_to_sheet("대화(캐시)", last_user_msg, cached, 0, "SUCCESS", 0, prompt_id=prompt_id, model=model, route=route,
+                              section=section)
+            record_call("gpt", section, model, None, "cache_hit", latency=0)
+            return cached
+
+    # 진행 중인 같은 요청 찾기: 단발성(cache) 요청은 모든 학생이 공유, 대화는 학생별
+    inflight = get_inflight()
+    key_of_flight = flight_key("shared" if cache else student_name, model, resolved, tools)
+    flight = inflight.find(key_of_flight)
+    if flight is None:
+        to_send = compact_history(resolved)  # 합쳐질 요청이면 압축(요약 호출)도 건너뜀
+        try:
+            quota.check_budget(student_name, count_message_tokens(to_send))
+        except QuotaExceeded as e:
+            quota_rejected(e, section)
+            return None
+        # 같은 섹션의 요청은 시스템 프롬프트(접두부)가 바이트 단위로 같으므로, 프롬프트 ID를 캐시 키로 넘겨
+        # 반 전체 학생의 요청이 OpenAI 쪽 같은 프롬프트 캐시로 모이게 함 (첫 토큰 시간·비용 절감)
+        request_options = {"extra_body": {"prompt_cache_key": prompt_id}} if prompt_id else {}
+        if tools:
+            request_options["tools"] = tools
+        # 작업 스레드에서는 st.* 를 쓸 수 없으므로 필요한 것은 여기서 미리 꺼내 둔다
+        response_cache = get_response_cache()
+        call_args = dict(
+            to_send=to_send, model=model, route=route, stream=stream, request_options=request_options,
+            section=section, prompt_id=prompt_id, last_user_msg=last_user_msg, student_name=student_name,
+            deps=worker_deps("chat"),
+            cache_put=(lambda content: response_cache.put(key, content)) if cache else None
+        )
+        flight, started = inflight.start(key_of_flight, lambda flight: run_chat_call(flight, **call_args))
+    else:
+        started = False
+    get_metrics().inc("gpt_routes_total", section=section, model=model, route=route or "explicit")
+    if not started:
+        get_metrics().inc("gpt_coalesced_total", section=section, model=model)
+
+    stream_area = st.empty()
+    try:
+        content, cached_tokens = follow_flight(flight, stream_area)
+    except Exception as e:
+        stream_area.empty()
+        st.error(f"미안해, 잠시 문제가 생겼어. 방금 보낸 내용을 다시 보내줄래? (오류: {e})")
+        return None
+
+    if stream:
+        stream_area.markdown(content if isinstance(content, str) else content.to_markdown())
+    else:
+        stream_area.empty()
+    if started and st.session_state.get("prompt_token_log"):
+        st.session_state.prompt_token_log[-1]["캐시 토큰"] = cached_tokens  # compact_history가 방금 남긴 이번 턴 기록
+    return content
+
+def render_chat_history(messages, key):
+    """대화 기록 표시: 최근 chat_expanded_turns턴만 펼치고 이전 턴은 접어 둠"""
+    chat_view.render_history(messages, key, expanded_turns=st.secrets.get("chat_expanded_turns", 3))
+
+def chat_turn(history, user_content, tools=None):
+    """
+    학생 메시지와 스트리밍 답변을 보여주고, 성공했을 때만 두 메시지를 history에 추가.
+    최종 프롬프트를 함수로 받으면 답변 메시지의 final_prompt에 ImagePrompt / PikaPrompt를 함께 보관.
+    """
+    with st.chat_message("user"):
+        st.markdown(user_content)
+    with st.chat_message("assistant"):  # 답변을 토큰 단위로 바로 보여줌
+        gpt_response = ask_gpt(history + [{"role": "user", "content": user_content}], stream=True, tools=tools)
+    if gpt_response is None:
+        return False  # 실패한 턴은 기록에 남기지 않음 (다음 프롬프트를 오염시키지 않도록)
+    history.append({"role": "user", "content": user_content})
+    if isinstance(gpt_response, str):
+        history.append({"role": "assistant", "content": gpt_response})
+    else:
+        history.append({"role": "assistant", "content": gpt_response.to_markdown(), "final_prompt": gpt_response})
+    return True
+
+# --- 장면별 영상 프롬프트 일괄 초안 (작업 스레드에서 실행) ---
+SCENE_DRAFT_REQUEST = "장면 요약: {summary}\n프롬프트 초안: {content}\n질문 없이 이 장면의 첫 번째 초안을 바로 만들어줘."
+
+def draft_scene_prompt(scene, prompt_id, model, route, student_name, section, deps):
+    """(작업 스레드) 장면 하나의 Pika 프롬프트 첫 초안을 PikaPrompt로 반환. 실패하면 예외를 그대로 올림"""
+    # 시스템 프롬프트는 대화 모드와 같은 것을 그대로 써서 프롬프트 캐시 접두부를 공유
+    messages = prompts.resolve_messages([
+        prompts.system_message(prompt_id),
+        {"role": "user", "content": SCENE_DRAFT_REQUEST.format(**scene)}
+    ])
+    request_options = {
+        "extra_body": {"prompt_cache_key": prompt_id},
+        "tools": [final_prompts.PIKA_PROMPT_TOOL],
+        "tool_choice": final_prompts.forced(final_prompts.PIKA_PROMPT_TOOL),  # 대화 없이 바로 함수로 받음
+    }
+
+    def request(client, timeout):
+        response = client.chat.completions.create(model=model, messages=messages, timeout=timeout, **request_options)
+        return message_reply(response.choices[0].message), response.usage
+
+    (draft, _), _ = run_api_call(
+        request, deps, "chat", student_name, section, model, route, "장면초안", "장면초안에러", scene["summary"],
+        lambda result: (result[0].to_markdown(), result[1], None), prompt_id=prompt_id
+    )
+    return draft
+
+def draft_all_scenes(scenes, prompt_id):
+    """모든 장면의 초안을 동시에 만들고 진행률을 보여줌. 장면 표에 쓸 행 목록 반환 (한도 초과면 None)"""
+    section = st.session_state.get("current_section", "-")
+    model, route = get_model_router().route(section, [], final=True)  # 바로 완성된 프롬프트를 받으므로 최종 결과용 모델
+    quota = get_quota()
+    estimate = sum(
+        count_message_tokens(prompts.resolve_messages([
+            prompts.system_message(prompt_id), {"role": "user", "content": SCENE_DRAFT_REQUEST.format(**scene)}
+        ]))
+        for scene in scenes
+    )
+    try:
+        quota.check_budget(st.session_state.get("student_name", "Unknown"), estimate)
+    except QuotaExceeded as e:
+        quota_rejected(e, section)
+        return None
+    deps = worker_deps("chat")
+    student_name = st.session_state.get("student_name", "Unknown")
+
+    progress = st.progress(0.0, text=f"장면 {len(scenes)}개의 초안을 만드는 중...")
+    results = scene_batch.draft_all(
+        scenes,
+        lambda scene: draft_scene_prompt(scene, prompt_id, model, route, student_name, section, deps),
+        max_workers=st.secrets.get("scene_batch_workers", 4),
+        on_done=lambda done, total: progress.progress(done / total, text=f"장면 초안 {done}/{total}개 완성")
+    )
+    progress.empty()
+
+    rows = []
+    for result in results:
+        scene = result["scene"]
+        if result["error"] is not None:
+            korean, english, status = "", "", f"실패: {type(result['error']).__name__}"
+        else:
+            korean, english, status = result["reply"].korean_prompt, result["reply"].command(), "완료"
+        rows.append({"장면": scene["scene"], "장면 요약": scene["summary"], "한국어 프롬프트": korean,
+                     "Pika 영어 프롬프트": english, "상태": status})
+    return rows
+
+# --- [핵심] generate_image 함수 (웹 앱 로깅 적용, 백그라운드 작업으로 실행) ---
+@st.cache_resource
+def get_blob_store():
+    """생성된 이미지를 인코딩된 바이트 그대로 보관하는 공용 저장소 (세션에는 키만 저장)"""
+    return BlobStore(
+        root_dir=st.secrets.get("image_store_dir", "image_store"),
+        max_memory_bytes=st.secrets.get("image_store_memory_mb", 64) * 1024 * 1024,
+        max_disk_bytes=st.secrets.get("image_store_disk_mb", 500) * 1024 * 1024
+    )
+
+@st.cache_resource
+def get_gallery():
+    """학생별로 만든 이미지를 모아 두는 갤러리 색인"""
+    return Gallery(
+        get_blob_store(),
+        index_path=st.secrets.get("gallery_index_path", "gallery.sqlite3"),
+        per_student_limit=st.secrets.get("gallery_per_student", 30)
+    )
+
+@st.cache_resource
+def get_image_jobs():
+    """모든 세션이 함께 쓰는 이미지 생성 작업 실행기"""
+    return ImageJobManager(max_workers=st.secrets.get("image_job_workers", 4))
+
+# 초안(draft): 작은 크기로 여러 장을 한 번에 빠르게, 최종(final): 고른 프롬프트만 DALL-E 3 고화질로
+IMAGE_TIERS = {
+    "draft": {"model": "dall-e-2", "size": "256x256", "n": 3},
+    "final": {"model": "dall-e-3", "size": "1024x1024", "n": 1},
+}
+DALLE2_PROMPT_LIMIT = 1000  # dall-e-2가 받는 프롬프트 최대 글자 수
+MAX_DRAFT_SETS = 5          # 세션에 남겨 둘 최근 초안 묶음 수
+
+def image_tier(tier):
+    """이미지 생성 설정 (Secrets의 [image_draft] / [image_final]로 model, size, n을 바꿀 수 있음)"""
+    return {**IMAGE_TIERS[tier], **st.secrets.get(f"image_{tier}", {})}
+
+def generate_image(job, prompt, kind, tier, settings, student_name, section, gallery, deps):
+    """
+    (백그라운드 스레드) 이미지를 만들어 저장소에 넣고 키를 반환. 실패하면 예외를 그대로 올림.
+    초안은 후보 키 목록을 반환하고 갤러리에는 넣지 않음. 최종 이미지는 키 하나를 반환하고 갤러리에 추가.
+    """
+    model = settings["model"]
+    metric_kind = "image" if tier == "final" else "image_draft"  # 초안과 최종 지연 시간을 따로 봄
+
+    def request(client, timeout):
+        return client.images.generate(
+            model=model,
+            prompt=prompt[:DALLE2_PROMPT_LIMIT] if model == "dall-e-2" else prompt,
+            size=settings["size"],
+            n=settings["n"],
+            response_format="b64_json",
+            timeout=timeout
+        )
+
+    def describe(response):
+        return ("이미지 생성 성공" if tier == "final" else f"초안 {len(response.data)}장"), None, None
+
+    def on_wait(position):
+        job.position = position
+
+    response, _ = run_api_call(
+        request, deps, metric_kind, student_name, section, model, None,
+        "이미지생성" if tier == "final" else "이미지초안", "이미지에러" if tier == "final" else "이미지초안에러",
+        prompt, describe, metric_kind=metric_kind, log_model=False, on_wait=on_wait
+    )
+    image_keys = [gallery.blobs.put(base64.b64decode(image.b64_json)) for image in response.data]
+    if tier == "draft":
+        return image_keys
+    gallery.add(student_name, prompt, image_keys[0], kind)
+    return image_keys[0]
+
+def start_image_job(prompt, kind="", tier="final"):
+    """이미지 생성을 백그라운드 작업으로 넘기고 작업 ID만 세션에 기록 (tier: draft / final)"""
+    # 작업 스레드에서는 st.* 를 쓸 수 없으므로 필요한 것은 여기서 미리 꺼내 둔다
+    gallery = get_gallery()
+    deps = worker_deps("image")
+    settings = image_tier(tier)
+    student_name = st.session_state.get("student_name", "Unknown")
+    section = st.session_state.get("current_section", "-")
+    job_id = get_image_jobs().submit(
+        lambda job: generate_image(job, prompt, kind, tier, settings, student_name, section, gallery, deps),
+        prompt,
+        tier=tier
+    )
+    st.session_state.setdefault("image_jobs", []).append(job_id)
+
+def show_image_error(e):
+    """이미지 작업 실패 원인을 학생용 안내로 표시"""
+    from openai import RateLimitError, APIConnectionError, APITimeoutError
+    from openai_pool import AllKeysCoolingDown
+    if isinstance(e, (RateLimitError, AllKeysCoolingDown)):
+        # 모든 키가 쉬는 중일 때만 여기로 옴: 가장 먼저 풀리는 키에 맞춰 잠금
+        retry_in = get_client_pool().seconds_until_available() or 60
+        st.error(f"잠시만요! 너무 많은 이미지 요청이 있었어요. {int(retry_in)}초 후에 다시 시도해 주세요.")
+        st.session_state.image_generation_disabled = True
+        st.session_state.image_generation_disable_until = time.time() + retry_in
+    elif isinstance(e, SchedulerBusy):
+        st.error("지금 이미지를 만드는 친구들이 많아요. 조금 뒤에 다시 눌러 주세요.")
+    elif isinstance(e, APIConnectionError):
+        st.error("인터넷 연결 문제로 이미지 생성에 실패했어요.")
+    elif isinstance(e, APITimeoutError):
+        st.error("이미지 생성 요청이 너무 오래 걸려 취소되었어요.")
+    else:
+        st.error(f"예상치 못한 오류가 발생했습니다: {e}")
+
+def collect_image_jobs():
+    """끝난 이미지 작업의 결과를 세션으로 가져옴"""
+    jobs = get_image_jobs()
+    for job_id in list(st.session_state.get("image_jobs", [])):
+        job = jobs.get(job_id)
+        if job is not None and not job.is_finished:
+            continue
+        st.session_state.image_jobs.remove(job_id)
+        if job is None:
+            continue
+        jobs.pop(job_id)
+        if job.status == "done" and job.tier == "draft":
+            drafts = st.session_state.setdefault("image_drafts", [])
+            # 초안을 기다리는 동안 프롬프트가 바뀌었으면 번역은 비워 둠
+            korean = st.session_state.get("korean_dalle_prompt_display", "") \
+                if job.prompt == st.session_state.get("final_dalle_prompt") else ""
+            drafts.append({"prompt": job.prompt, "korean": korean, "image_keys": job.result})
+            del drafts[:-MAX_DRAFT_SETS]
+            st.success("초안이 나왔어요! 마음에 드는 프롬프트를 골라 최종 이미지로 만들어 보세요.")
+        elif job.status == "done":
+            st.session_state.generated_image_id = job.result
+            st.success("이미지가 성공적으로 생성되었습니다!")
+        else:
+            show_image_error(job.error)
+
+@st.fragment(run_every=2)
+def poll_image_jobs():
+    """진행 중인 이미지 작업 상태를 2초마다 확인하고, 끝난 작업이 생기면 화면 전체를 다시 그림"""
+    jobs = get_image_jobs()
+    for job_id in st.session_state.get("image_jobs", []):
+        job = jobs.get(job_id)
+        if job is None or job.is_finished:
+            st.rerun()
+        if job.position:
+            st.info(f"⏳ 이미지 차례를 기다리는 중이에요. (내 앞에 {job.position}개)")
+        elif job.tier == "draft":
+            st.info("🧪 초안을 빠르게 그리는 중이에요...")
+        else:
+            st.info("🎨 이미지를 그리는 중이에요... 기다리는 동안 GPT와 계속 이야기해도 돼요!")
+
+# --- 세션 상태 보관/복원 (와이파이가 끊기거나 새로고침해도 이어서 하기) ---
+@st.cache_resource
+def get_session_store():
+    """학생 이름별 세션 상태 저장소 (모아서 주기적으로 SQLite에 기록)"""
+    return SessionStore(
+        st.secrets.get("session_store_path", "sessions.sqlite3"),
+        flush_interval=st.secrets.get("session_flush_seconds", 2.0),
+        default=final_prompts.to_json,
+        object_hook=final_prompts.from_json
+    )
+
+# 보관할 대화 기록 -> 함께 복원할 상태 (대화 기록이 복원되지 않으면 딸린 상태도 건너뜀)
+PERSISTED_STATE = {
+    "messages_story_review": ("story_input_submitted",),
+    "messages_segmentation": ("segmented_story_input", "segmentation_completed"),
+    "messages_image_generation": ("image_prompt_collected", "image_input_submitted", "final_dalle_prompt",
+                                  "korean_dalle_prompt_display", "image_final_prompt", "generated_image_id",
+                                  "image_drafts"),
+    "video_prompt_histories": ("current_scene_prompt", "video_final_prompts", "scene_drafts"),
+    "context_summaries": (),
+}
+PROMPT_KEYED_STATE = ("video_prompt_histories", "video_final_prompts", "scene_drafts")  # 프롬프트 ID -> 값
+# 저장하지는 않지만 학생마다 따로인 상태: 로그아웃하면 함께 비움 (토큰 기록, 선생님 화면 잠금 해제, 입력 칸 등)
+STUDENT_ONLY_STATE = ("prompt_token_log", "dashboard_unlocked", "image_generation_disabled",
+                      "image_generation_disable_until", "image_jobs", "video_prompt_finalized",
+                      "initial_story_input", "segment_input_area", "initial_image_prompt",
+                      "scene_summary_input", "video_prompt_draft_input")
+STUDENT_ONLY_PREFIXES = ("show_older_", "scene_draft_editor_")  # 섹션/프롬프트별로 키가 붙는 위젯
+
+def persist_session():
+    """현재 세션 상태를 저장 대기열에 넣음 (바뀐 것이 없으면 건너뜀, 실제 기록은 백그라운드)"""
+    keys = [k for key, companions in PERSISTED_STATE.items() for k in (key,) + companions]
+    state = {k: st.session_state[k] for k in keys if k in st.session_state}
+    try:
+        get_session_store().save(st.session_state["student_name"], state)
+    except Exception as e:
+        print(f"세션 저장 실패: {e}")
+
+def restore_session():
+    """로그인 직후 한 번: 저장해 둔 상태를 불러옴. 지금 코드에 없는 프롬프트로 나눈 대화는 건너뜀"""
+    try:
+        state = get_session_store().load(st.session_state["student_name"])
+    except Exception as e:
+        print(f"세션 복원 실패: {e}")
+        return False
+    for key in PROMPT_KEYED_STATE:
+        if key in state:
+            state[key] = {pid: value for pid, value in state[key].items() if prompts.is_registered(pid)}
+    restored = False
+    for key, companions in PERSISTED_STATE.items():
+        value = state.get(key)
+        if not value:
+            continue
+        if isinstance(value, list) and not prompts.is_registered(prompts.prompt_id_of(value)):
+            continue
+        for name in (key,) + companions:
+            if name in state:
+                st.session_state[name] = state[name]
+        restored = True
+    return restored
+
+def clear_session():
+    """로그아웃: 다음 학생에게 이전 학생의 대화가 보이거나 섞여 저장되지 않도록 비움"""
+    persist_session()
+    for key, companions in PERSISTED_STATE.items():
+        for name in (key,) + companions:
+            st.session_state.pop(name, None)
+    for name in STUDENT_ONLY_STATE:
+        st.session_state.pop(name, None)
+    for name in [k for k in st.session_state if k.startswith(STUDENT_ONLY_PREFIXES)]:
+        st.session_state.pop(name, None)
+    st.session_state.pop("session_restored", None)
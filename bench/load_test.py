@@ -0,0 +1,215 @@
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+from mock_server import start_mock_server
+
+# =========================================================
+# 🏫 가상 학생 N명으로 섹션 1~4를 끝까지 돌리는 부하 테스트
+# =========================================================
+# Streamlit AppTest로 app.py를 화면 없이 실행한다. AppTest는 같은 프로세스에서
+# 돌기 때문에 st.cache_resource 객체(키 풀, 스케줄러, 캐시 등)를 실제 서버처럼 함께 쓴다.
+#
+#   python bench/load_test.py --students 30 --rate-limit-ratio 0.05 --save bench/baseline.json
+#   python bench/load_test.py --students 30 --baseline bench/baseline.json
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+# `streamlit run`은 시작할 때 app.py 폴더를 sys.path에 계속 넣어 두지만, AppTest는 실행할 때마다 넣었다 빼서
+# 여러 학생이 동시에 돌면 로그인 뒤 app_core 같은 모듈을 처음 불러오다 못 찾는 일이 생긴다. 서버와 같게 맞춤
+if os.path.dirname(APP_PATH) not in sys.path:
+    sys.path.insert(0, os.path.dirname(APP_PATH))
+
+STORY = ("옛날 어느 작은 마을에 하늘을 나는 고양이 나비가 살았어요. 나비는 매일 밤 별을 모으러 "
+         "구름 위로 올라갔지만, 어느 날 폭풍이 불어 별 주머니를 잃어버렸어요. ") * 3
+
+
+class StepTimer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.records = []  # (단계 이름, 초, 성공 여부)
+
+    def record(self, step, seconds, ok):
+        with self.lock:
+            self.records.append((step, seconds, ok))
+
+
+def _button(at, label):
+    return next(b for b in at.button if b.label == label)
+
+
+def _ok(at):
+    return not at.exception and not at.error
+
+
+def run_student(index, secrets, timer, chat_turns, image_timeout):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=180)
+    for key, value in secrets.items():
+        at.secrets[key] = value
+
+    def step(name, action):
+        start = time.perf_counter()
+        try:
+            action()
+            ok = _ok(at)
+        except Exception as e:
+            print(f"[학생 {index}] {name} 실패: {e}", file=sys.stderr)
+            ok = False
+        timer.record(name, time.perf_counter() - start, ok)
+        return ok
+
+    at.run()
+    at.text_input[0].input(f"5학년1반 학생{index:02d}")
+    step("로그인", lambda: _button(at, "수업 입장하기").click().run())
+
+    # 1. 이야기 점검하기
+    at.text_area(key="initial_story_input").input(STORY)
+    step("1-이야기 제출", lambda: _button(at, "이야기 점검 시작").click().run())
+    for turn in range(chat_turns):
+        step("1-대화", lambda: at.chat_input[0].set_value(f"주인공은 용감해요 {turn}").run())
+
+    # 2. 이야기 나누기
+    at.sidebar.radio[0].set_value("2. 이야기 나누기").run()
+    at.text_area(key="segment_input_area").input(STORY)
+    step("2-장면 나누기", lambda: _button(at, "이야기 장면 나누기 시작").click().run())
+
+    # 3. 캐릭터 이미지 (프롬프트가 완성될 때까지 대화 → 이미지 작업 완료까지 폴링)
+    at.sidebar.radio[0].set_value("3. 캐릭터/배경 이미지 생성").run()
+    at.text_area(key="initial_image_prompt").input("용감한 고양이 나비")
+    step("3-프롬프트 시작", lambda: _button(at, "프롬프트 구체화 시작").click().run())
+    for turn in range(chat_turns):
+        if at.session_state["image_prompt_collected"]:
+            break
+        step("3-대화", lambda: at.chat_input[0].set_value("하얀 털에 파란 망토를 입었어요").run())
+
+    def generate_and_wait(label):
+        _button(at, label).click().run()
+        deadline = time.time() + image_timeout
+        while at.session_state["image_jobs"] and time.time() < deadline:
+            time.sleep(0.5)
+            at.run()
+        if at.session_state["image_jobs"]:
+            raise TimeoutError("이미지 작업이 끝나지 않았어요")
+
+    if at.session_state["image_prompt_collected"]:
+        step("3-이미지 초안", lambda: generate_and_wait(next(b.label for b in at.button if b.label.startswith("🧪 빠른 초안"))))
+        step("3-이미지 생성", lambda: generate_and_wait("이 프롬프트로 이미지 생성하기"))
+
+    # 4. 장면별 영상 프롬프트
+    at.sidebar.radio[0].set_value("4. 장면별 영상 Prompt 점검").run()
+    step("4-장면 일괄 초안", lambda: _button(at, "모든 장면 초안 만들기").click().run())
+    at.text_input(key="scene_summary_input").input("나비가 구름 위로 올라가는 장면")
+    at.text_area(key="video_prompt_draft_input").input("고양이가 밤하늘로 날아올라요")
+    step("4-프롬프트 점검", lambda: _button(at, "프롬프트 점검 시작").click().run())
+    for turn in range(chat_turns):
+        step("4-대화", lambda: at.chat_input[0].set_value("더 밝은 분위기면 좋겠어요").run())
+    return at
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def summarize(timer, wall_seconds, students, memory_bytes, mock_counts):
+    durations = [s for _, s, _ in timer.records]
+    errors = sum(1 for _, _, ok in timer.records if not ok)
+    per_step = {}
+    for name, seconds, ok in timer.records:
+        per_step.setdefault(name, []).append(seconds)
+    return {
+        "students": students,
+        "steps": len(durations),
+        "wall_seconds": round(wall_seconds, 2),
+        "throughput_steps_per_s": round(len(durations) / wall_seconds, 3) if wall_seconds else 0,
+        "p50_s": round(percentile(durations, 0.5), 3),
+        "p99_s": round(percentile(durations, 0.99), 3),
+        "error_rate": round(errors / len(durations), 4) if durations else 0,
+        "memory_per_session_kb": round(memory_bytes / students / 1024, 1),
+        "per_step_p50_s": {name: round(statistics.median(v), 3) for name, v in sorted(per_step.items())},
+        "mock_server": mock_counts,
+    }
+
+
+def compare(result, baseline):
+    print("\n기준선 대비:")
+    for key in ("throughput_steps_per_s", "p50_s", "p99_s", "error_rate", "memory_per_session_kb"):
+        before, after = baseline.get(key), result.get(key)
+        if before:
+            print(f"  {key:<24} {before:>10} → {after:<10} ({(after - before) / before:+.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="가상 학생 부하 테스트")
+    parser.add_argument("--students", type=int, default=30)
+    parser.add_argument("--chat-turns", type=int, default=3)
+    parser.add_argument("--chat-latency", type=float, default=1.5)
+    parser.add_argument("--image-latency", type=float, default=8.0)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0)
+    parser.add_argument("--keys", type=int, default=3, help="가짜 API 키 개수")
+    parser.add_argument("--image-timeout", type=float, default=180)
+    parser.add_argument("--save", help="결과를 JSON으로 저장 (기준선으로 사용)")
+    parser.add_argument("--baseline", help="비교할 기준선 JSON")
+    args = parser.parse_args()
+
+    server, state = start_mock_server(
+        chat_latency=args.chat_latency, image_latency=args.image_latency,
+        rate_limit_ratio=args.rate_limit_ratio, final_after=args.chat_turns
+    )
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    os.environ["OPENAI_BASE_URL"] = base_url + "/v1"
+    workdir = tempfile.mkdtemp(prefix="o6-bench-")
+    secrets = {
+        "openai_keys": {f"key{i}": f"sk-mock-{i}" for i in range(args.keys)},
+        "gsheet_webapp_url": base_url + "/gsheet",
+        "log_spill_path": os.path.join(workdir, "log_spill.jsonl"),
+        "image_store_dir": os.path.join(workdir, "image_store"),
+        "gallery_index_path": os.path.join(workdir, "gallery.sqlite3"),
+        "session_store_path": os.path.join(workdir, "sessions.sqlite3"),
+        "token_quota": {"store_path": os.path.join(workdir, "quota.sqlite3")},
+        "interaction_log_dir": os.path.join(workdir, "interaction_log"),
+    }
+
+    timer = StepTimer()
+    sessions = []
+    tracemalloc.start()
+    baseline_memory = tracemalloc.get_traced_memory()[0]
+    start = time.perf_counter()
+    threads = [
+        threading.Thread(target=lambda i=i: sessions.append(
+            run_student(i, secrets, timer, args.chat_turns, args.image_timeout)))
+        for i in range(args.students)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+    memory = tracemalloc.get_traced_memory()[0] - baseline_memory  # 세션(AppTest)을 살려 둔 상태에서 측정
+    tracemalloc.stop()
+
+    with state.lock:
+        mock_counts = dict(state.counts)
+    result = summarize(timer, wall, args.students, memory, mock_counts)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            compare(result, json.load(f))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+import argparse
+import base64
+import json
+import random
+import struct
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# =========================================================
+# 🧪 부하 테스트용 모의 서버 (OpenAI + 구글 앱스 스크립트)
+# =========================================================
+# /v1/chat/completions (스트리밍 포함), /v1/images/generations, /gsheet 를 흉내 낸다.
+# 지연 시간과 429 비율을 설정할 수 있어서 실제 키를 쓰지 않고 수업 상황을 재현할 수 있다.
+
+def _tiny_png(size=64):
+    """PIL 없이 만드는 단색 PNG (이미지 응답용)"""
+    def chunk(tag, data):
+        return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF)
+    raw = b"".join(b"\x00" + b"\x80\xc0\xff" * size for _ in range(size))
+    return (b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b""))
+
+
+PNG_B64 = base64.b64encode(_tiny_png()).decode("ascii")
+DRAFT_LATENCY_RATIO = 0.2  # dall-e-2 작은 초안은 최종 이미지 지연 시간의 이 비율만큼
+
+
+FINAL_TOOL_ARGUMENTS = {
+    "submit_image_prompt": {
+        "english_prompt": "A 10-year-old girl with short brown hair, Disney animation style, full body.",
+        "korean_translation": "짧은 갈색 머리의 10살 여자아이, 디즈니 애니메이션 스타일, 전신.",
+    },
+    "submit_pika_prompt": {
+        "korean_prompt": "소녀가 숲길을 걷는다.",
+        "english_prompt": "A girl walks along a sunlit forest path, camera tracking.",
+        "flags": {"aspect_ratio": "16:9", "duration_seconds": None, "fps": None, "camera": None, "motion": None,
+                  "style": None, "guidance_scale": None, "negative_prompt": None, "seed": None},
+        "encouragement": "이제 이 프롬프트로 멋진 영상을 만들 수 있을 거예요! 정말 잘했어요! 😊",
+    },
+}
+
+
+def mock_tool_call(body, final_after):
+    """함수 정의가 함께 오면, 강제 호출이거나 최종 단계일 때 (함수 이름, 인자 JSON) 반환"""
+    tools = {t["function"]["name"] for t in body.get("tools") or []}
+    if not tools:
+        return None
+    choice = body.get("tool_choice")
+    if isinstance(choice, dict):
+        name = choice["function"]["name"]
+    elif sum(1 for m in body.get("messages", []) if m["role"] == "user") >= final_after:
+        name = next(iter(tools))
+    else:
+        return None
+    return name, json.dumps(FINAL_TOOL_ARGUMENTS[name], ensure_ascii=False)
+
+
+def mock_reply(messages):
+    """함수 호출이 아닌 일반 답변: 장면 나누기는 앱이 읽는 **[장면 번호]** 형식, 나머지는 질문"""
+    system = messages[0]["content"] if messages and messages[0]["role"] == "system" else ""
+    if "장면 번호" in system:
+        scenes = "\n".join(f"**[{i}]**: 장면 {i} 요약 - 원본 이야기의 {i}번째 부분" for i in range(1, 7))
+        return scenes + "\n이 장면 분할은 여러분의 이야기를 영상으로 만들 때 참고할 수 있는 **하나의 예시**일 뿐이에요."
+    return "정말 멋진 생각이야! 주인공은 어떤 표정을 하고 있을까?"
+
+
+class MockState:
+    def __init__(self, chat_latency, image_latency, jitter, rate_limit_ratio, final_after):
+        self.chat_latency = chat_latency
+        self.image_latency = image_latency
+        self.jitter = jitter
+        self.rate_limit_ratio = rate_limit_ratio
+        self.final_after = final_after
+        self.lock = threading.Lock()
+        self.counts = {"chat": 0, "image": 0, "image_draft": 0, "gsheet_rows": 0, "rate_limited": 0}
+        self.seen_prefixes = set()  # 프롬프트 캐시 흉내: 한 번 본 (캐시 키, 시스템 프롬프트)
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counts[name] += n
+
+    def cached_tokens(self, body, prompt_tokens):
+        """OpenAI처럼 1024토큰 이상인 접두부를 두 번째 요청부터 128토큰 단위로 캐시에서 읽은 것으로 계산"""
+        messages = body.get("messages", [])
+        system = (messages[0].get("content") or "") if messages and messages[0]["role"] == "system" else ""
+        prefix_tokens = len(system) // 3
+        key = (body.get("prompt_cache_key"), system)
+        with self.lock:
+            hit = key in self.seen_prefixes
+            self.seen_prefixes.add(key)
+        if not hit or prefix_tokens < 1024:
+            return 0
+        return min(prompt_tokens, prefix_tokens // 128 * 128)
+
+    def sleep(self, base):
+        time.sleep(max(0.0, random.gauss(base, base * self.jitter)))
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _read_json(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def _send_json(self, status, body, headers=None):
+            data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _maybe_rate_limit(self):
+            if random.random() < state.rate_limit_ratio:
+                state.count("rate_limited")
+                self._send_json(429, {"error": {"message": "Rate limit reached (mock)", "type": "requests",
+                                                "code": "rate_limit_exceeded"}}, {"retry-after": "2"})
+                return True
+            return False
+
+        def do_POST(self):
+            body = self._read_json()
+            if self.path.endswith("/chat/completions"):
+                if self._maybe_rate_limit():
+                    return
+                state.count("chat")
+                self._chat(body)
+            elif self.path.endswith("/images/generations"):
+                if self._maybe_rate_limit():
+                    return
+                if body.get("model") == "dall-e-2":  # 작은 초안은 훨씬 빨리 나옴
+                    state.count("image_draft")
+                    state.sleep(state.image_latency * DRAFT_LATENCY_RATIO)
+                else:
+                    state.count("image")
+                    state.sleep(state.image_latency)
+                data = [{"b64_json": PNG_B64}] * int(body.get("n") or 1)
+                self._send_json(200, {"created": int(time.time()), "data": data})
+            elif self.path.startswith("/gsheet"):
+                state.count("gsheet_rows", len(body.get("rows", [body])))
+                self._send_json(200, {"result": "ok", "ok": True})  # 여러 줄 형식을 읽는 스크립트처럼 확인해 줌
+            else:
+                self._send_json(404, {"error": {"message": f"unknown path {self.path}"}})
+
+        def do_GET(self):
+            if self.path == "/stats":
+                with state.lock:
+                    self._send_json(200, dict(state.counts))
+            else:
+                self._send_json(404, {})
+
+        def _chat(self, body):
+            tool_call = mock_tool_call(body, state.final_after)
+            content = "" if tool_call else mock_reply(body.get("messages", []))
+            prompt_tokens = sum(len(m.get("content") or "") for m in body.get("messages", [])) // 3
+            usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(content) // 3,
+                     "total_tokens": prompt_tokens + len(content) // 3,
+                     "prompt_tokens_details": {"cached_tokens": state.cached_tokens(body, prompt_tokens)}}
+            base = {"id": "chatcmpl-mock", "created": int(time.time()), "model": body.get("model", "mock")}
+
+            tool_calls = [{"id": "call_mock", "type": "function",
+                           "function": {"name": tool_call[0], "arguments": tool_call[1]}}] if tool_call else None
+
+            if not body.get("stream"):
+                state.sleep(state.chat_latency)
+                message = {"role": "assistant", "content": content or None, "tool_calls": tool_calls}
+                self._send_json(200, {**base, "object": "chat.completion", "usage": usage, "choices": [
+                    {"index": 0, "message": message, "finish_reason": "tool_calls" if tool_calls else "stop"}]})
+                return
+
+            # 스트리밍: 첫 토큰까지 지연의 1/5, 나머지는 조각마다 나눠서 보냄
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            state.sleep(state.chat_latency / 5)
+            if tool_call:  # 함수 인자도 실제 API처럼 조각으로 나눠 보냄
+                arguments = tool_call[1]
+                pieces = [arguments[i:i + 16] for i in range(0, len(arguments), 16)]
+                deltas = [{"tool_calls": [{"index": 0, "id": "call_mock", "type": "function",
+                                           "function": {"name": tool_call[0], "arguments": ""}}]}]
+                deltas += [{"tool_calls": [{"index": 0, "function": {"arguments": p}}]} for p in pieces]
+            else:
+                deltas = [{"content": content[i:i + 8]} for i in range(0, len(content), 8)]
+            for delta in deltas:
+                self._event({**base, "object": "chat.completion.chunk", "choices": [
+                    {"index": 0, "delta": delta, "finish_reason": None}]})
+                time.sleep(state.chat_latency * 0.8 / max(1, len(deltas)))
+            self._event({**base, "object": "chat.completion.chunk", "choices": [], "usage": usage})
+            self._write_chunk(b"data: [DONE]\n\n")
+            self._write_chunk(b"")
+
+        def _event(self, payload):
+            self._write_chunk(b"data: " + json.dumps(payload, ensure_ascii=False).encode("utf-8") + b"\n\n")
+
+        def _write_chunk(self, data):
+            self.wfile.write(f"{len(data):X}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+    return Handler
+
+
+def start_mock_server(port=0, chat_latency=1.5, image_latency=8.0, jitter=0.3, rate_limit_ratio=0.0, final_after=3):
+    """백그라운드 스레드로 모의 서버를 띄우고 (server, state) 반환. 주소는 server.server_address"""
+    state = MockState(chat_latency, image_latency, jitter, rate_limit_ratio, final_after)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="mock-openai", daemon=True).start()
+    return server, state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="OpenAI / 앱스 스크립트 모의 서버")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--chat-latency", type=float, default=1.5)
+    parser.add_argument("--image-latency", type=float, default=8.0)
+    parser.add_argument("--jitter", type=float, default=0.3)
+    parser.add_argument("--rate-limit-ratio", type=float, default=0.0)
+    parser.add_argument("--final-after", type=int, default=3)
+    args = parser.parse_args()
+
+    server, _ = start_mock_server(args.port, args.chat_latency, args.image_latency, args.jitter,
+                                  args.rate_limit_ratio, args.final_after)
+    print(f"모의 서버 실행 중: http://127.0.0.1:{args.port}  (OPENAI_BASE_URL=http://127.0.0.1:{args.port}/v1)")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,117 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from load_test import APP_PATH, _button, percentile
+
+# =========================================================
+# ⏱️ 시작 시간 / 리런 시간 측정
+# =========================================================
+# 매번 새 파이썬 프로세스에서 app.py를 AppTest로 실행해 콜드 스타트를 잰다.
+#   - login_page_s   : 첫 실행(로그인 화면)까지
+#   - first_section_s: 로그인 버튼을 누른 뒤 첫 섹션 화면까지 (섹션 공용 모듈을 처음 불러옴)
+#   - rerun_s        : 같은 화면을 다시 실행할 때 한 번에 걸리는 시간
+# 바꾸기 전 커밋에서 --save로 기준선을 남기고, 바꾼 뒤 --baseline으로 비교한다.
+#
+#   python bench/startup.py --runs 5 --save bench/startup_baseline.json
+#   python bench/startup.py --runs 5 --baseline bench/startup_baseline.json
+
+SECTIONS = ("1. 이야기 점검하기", "4. 장면별 영상 Prompt 점검")
+
+
+def measure_once(reruns):
+    """(자식 프로세스) 콜드 스타트 한 번을 재서 dict로 반환"""
+    from streamlit.testing.v1 import AppTest  # AppTest 자체를 불러오는 시간은 빼고 잰다
+
+    workdir = tempfile.mkdtemp(prefix="o6-startup-")
+    at = AppTest.from_file(APP_PATH, default_timeout=60)
+    for key, value in {
+        "openai_keys": {"key0": "sk-mock-0"},
+        "log_spill_path": os.path.join(workdir, "log_spill.jsonl"),
+        "image_store_dir": os.path.join(workdir, "image_store"),
+        "gallery_index_path": os.path.join(workdir, "gallery.sqlite3"),
+        "session_store_path": os.path.join(workdir, "sessions.sqlite3"),
+        "token_quota": {"store_path": os.path.join(workdir, "quota.sqlite3")},
+        "interaction_log_dir": os.path.join(workdir, "interaction_log"),
+    }.items():
+        at.secrets[key] = value
+
+    start = time.perf_counter()
+    at.run()
+    result = {"login_page_s": time.perf_counter() - start}
+
+    at.text_input[0].input("5학년1반 측정용")
+    start = time.perf_counter()
+    _button(at, "수업 입장하기").click().run()
+    result["first_section_s"] = time.perf_counter() - start
+
+    rerun_times = []
+    for section in SECTIONS:
+        at.sidebar.radio[0].set_value(section).run()
+        for _ in range(reruns):
+            start = time.perf_counter()
+            at.run()
+            rerun_times.append(time.perf_counter() - start)
+    result["rerun_s"] = rerun_times
+    result["ok"] = not at.exception
+    return result
+
+
+def summarize(samples):
+    reruns = [t for s in samples for t in s["rerun_s"]]
+    return {
+        "runs": len(samples),
+        "login_page_p50_s": round(statistics.median(s["login_page_s"] for s in samples), 3),
+        "first_section_p50_s": round(statistics.median(s["first_section_s"] for s in samples), 3),
+        "rerun_p50_s": round(percentile(reruns, 0.5), 4),
+        "rerun_p95_s": round(percentile(reruns, 0.95), 4),
+        "failed_runs": sum(1 for s in samples if not s["ok"]),
+    }
+
+
+def compare(result, baseline):
+    print("\n기준선 대비:")
+    for key in ("login_page_p50_s", "first_section_p50_s", "rerun_p50_s", "rerun_p95_s"):
+        before, after = baseline.get(key), result.get(key)
+        if before:
+            print(f"  {key:<22} {before:>8} → {after:<8} ({(after - before) / before:+.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="app.py 시작 시간 / 리런 시간 측정")
+    parser.add_argument("--runs", type=int, default=5, help="콜드 스타트 반복 횟수 (매번 새 프로세스)")
+    parser.add_argument("--reruns", type=int, default=10, help="섹션마다 다시 실행할 횟수")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--save", help="결과를 JSON으로 저장 (기준선으로 사용)")
+    parser.add_argument("--baseline", help="비교할 기준선 JSON")
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure_once(args.reruns)))
+        return
+
+    samples = []
+    for _ in range(args.runs):
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", "--reruns", str(args.reruns)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    result = summarize(samples)
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            compare(result, json.load(f))
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
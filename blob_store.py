@@ -0,0 +1,122 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+
+# =========================================================
+# 📦 콘텐츠 주소 기반 이미지 저장소 (메모리 LRU + 디스크)
+# =========================================================
+# 이미지를 디코딩하지 않고 원래 인코딩된 바이트 그대로 보관한다.
+# 키는 내용의 SHA-256이라 같은 이미지는 한 번만 저장되고,
+# 세션에는 이 키(문자열)만 들고 있으면 된다.
+
+class BlobStore:
+    def __init__(self, root_dir=None, max_memory_bytes=64 * 1024 * 1024, max_disk_bytes=None):
+        self.root_dir = root_dir
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()  # 키 -> 바이트 (LRU 순서)
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        if root_dir:
+            os.makedirs(root_dir, exist_ok=True)
+
+    def put(self, data):
+        """바이트를 저장하고 내용 해시 키를 반환"""
+        key = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            self._remember(key, data)
+        if self.root_dir:
+            path = self._path(key)
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                tmp_path = f"{path}.{threading.get_ident()}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+                self._evict_disk()
+        return key
+
+    def get(self, key):
+        """저장된 바이트 또는 None (메모리에 없으면 디스크에서 읽어 캐시)"""
+        with self._lock:
+            data = self._memory.get(key)
+            if data is not None:
+                self._memory.move_to_end(key)
+                return data
+        if not self.root_dir:
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+            os.utime(self._path(key))  # 디스크 LRU 정리 순서를 위해 최근 사용 표시
+        except FileNotFoundError:
+            return None
+        with self._lock:
+            self._remember(key, data)
+        return data
+
+    def contains(self, key):
+        with self._lock:
+            if key in self._memory:
+                return True
+        return bool(self.root_dir) and os.path.exists(self._path(key))
+
+    def thumbnail(self, key, max_side=512, fmt="WEBP", quality=80):
+        """화면 표시용 작은 이미지 바이트 (한 번 만들면 메모리 캐시에 보관)"""
+        thumb_key = f"{key}.{max_side}.{fmt.lower()}"
+        cached = self.get(thumb_key)
+        if cached is not None:
+            return cached
+        data = self.get(key)
+        if data is None:
+            return None
+        from PIL import Image  # 썸네일을 만들 때만 필요
+
+        image = Image.open(io.BytesIO(data))
+        image.thumbnail((max_side, max_side))
+        if fmt.upper() == "JPEG" and image.mode != "RGB":
+            image = image.convert("RGB")
+        buf = io.BytesIO()
+        image.save(buf, format=fmt, quality=quality)
+        thumb = buf.getvalue()
+        with self._lock:
+            self._remember(thumb_key, thumb)
+        return thumb
+
+    # --- 내부 동작 ---
+    def _path(self, key):
+        return os.path.join(self.root_dir, key[:2], key)
+
+    def _remember(self, key, data):
+        # lock을 잡은 상태에서 호출
+        if key in self._memory:
+            self._memory.move_to_end(key)
+            return
+        self._memory[key] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.max_memory_bytes and len(self._memory) > 1:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+
+    def _evict_disk(self):
+        """디스크 사용량이 상한을 넘으면 가장 오래 안 쓴 파일부터 지움"""
+        if not self.max_disk_bytes:
+            return
+        files = []
+        for dirpath, _, filenames in os.walk(self.root_dir):
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                stat = os.stat(path)
+                files.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
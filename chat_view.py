@@ -0,0 +1,68 @@
+import threading
+import uuid
+from collections import OrderedDict
+
+import streamlit as st
+
+
+# =========================================================
+# 💬 대화 기록 화면 (최근 K턴만 펼치고 이전 턴은 접어 둠)
+# =========================================================
+# Streamlit은 위젯을 건드릴 때마다 스크립트를 처음부터 다시 실행하고, 그때마다 화면에 그린
+# 메시지를 모두 브라우저로 다시 보낸다. 대화가 길어져도 리런 시간과 전송량이 늘지 않도록
+# 최근 expanded_turns턴만 그리고, 이전 턴은 학생이 펼쳤을 때만 그린다
+# (st.expander는 접혀 있어도 내용을 모두 보내므로 토글로 아예 그리지 않음).
+# 메시지마다 id를 붙여 두고, 화면에 쓸 글(마크다운/한 줄 미리보기)은 id별로 한 번만 만든다.
+
+PREVIEW_CHARS = 40
+_CACHE_SIZE = 4096
+_rendered = OrderedDict()  # 메시지 id -> (마크다운, 한 줄 미리보기). 프로세스 전체 공용 LRU
+_rendered_lock = threading.Lock()
+
+
+def message_id(message):
+    """메시지 dict에 붙은 id (없으면 새로 붙임). 세션 저장에도 함께 남는다"""
+    if "id" not in message:
+        message["id"] = uuid.uuid4().hex[:12]
+    return message["id"]
+
+
+def _rendered_message(message):
+    """(마크다운, 한 줄 미리보기)를 id별로 한 번만 만듦"""
+    key = message_id(message)
+    with _rendered_lock:
+        if key in _rendered:
+            _rendered.move_to_end(key)
+            return _rendered[key]
+    final_prompt = message.get("final_prompt")
+    markdown = final_prompt.to_markdown() if final_prompt is not None else message["content"]
+    first_line = next((line.strip() for line in markdown.splitlines() if line.strip()), "")
+    preview = first_line if len(first_line) <= PREVIEW_CHARS else first_line[:PREVIEW_CHARS] + "…"
+    with _rendered_lock:
+        _rendered[key] = (markdown, preview)
+        while len(_rendered) > _CACHE_SIZE:
+            _rendered.popitem(last=False)
+    return markdown, preview
+
+
+def _render_messages(messages):
+    for message in messages:
+        with st.chat_message(message["role"]):
+            st.markdown(_rendered_message(message)[0])
+
+
+def render_history(messages, key, expanded_turns=3):
+    """
+    시스템 메시지를 뺀 대화 기록을 그림. 최근 expanded_turns턴(학생+GPT 한 쌍)은 항상 펼쳐 보이고,
+    그 이전은 토글을 켰을 때만 그린다. key: 섹션별로 다른 문자열 (토글 상태 구분용)
+    """
+    visible = [m for m in messages if m["role"] != "system"]
+    split = max(0, len(visible) - expanded_turns * 2)
+    older, recent = visible[:split], visible[split:]
+    if older:
+        first_preview = _rendered_message(older[0])[1]
+        label = f"📜 이전 대화 {len(older)}개 펼쳐 보기 (처음: {first_preview})"
+        if st.toggle(label, key=f"show_older_{key}"):
+            with st.container(border=True):
+                _render_messages(older)
+    _render_messages(recent)
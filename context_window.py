@@ -0,0 +1,87 @@
+import hashlib
+import threading
+
+
+# =========================================================
+# 🧮 대화 기록 압축 (프롬프트 토큰 상한 유지)
+# =========================================================
+# 토큰 예산을 넘으면 오래된 대화를 "이전 대화 요약" 한 덩어리로 바꾼다.
+# 시스템 프롬프트, 학생이 처음 낸 이야기(첫 user 메시지), 최근 K턴은 항상 그대로 보낸다.
+
+MESSAGE_OVERHEAD_TOKENS = 4  # role/구분자 등 메시지마다 붙는 토큰
+SUMMARY_PREFIX = "[이전 대화 요약]\n"
+
+# tiktoken 인코딩은 처음 셀 때 불러온다 (처음 한 번은 BPE 파일을 내려받을 수 있어 import 시점에 하지 않음)
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        with _encoding_lock:
+            if not _encoding_loaded:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding("o200k_base")
+                except Exception as e:  # tiktoken이 없거나 내려받지 못하면 대략적인 추정치 사용
+                    print(f"tiktoken을 쓸 수 없어 토큰 수를 추정합니다: {e}")
+                _encoding_loaded = True
+    return _encoding
+
+
+def count_tokens(text):
+    """문자열의 토큰 수 (tiktoken을 쓸 수 없으면 UTF-8 바이트/3으로 추정: 한글 1자≈1토큰)"""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    return max(1, len(text.encode("utf-8")) // 3)
+
+
+def count_message_tokens(messages):
+    return sum(count_tokens(m["content"]) + MESSAGE_OVERHEAD_TOKENS for m in messages)
+
+
+def conversation_key(messages):
+    """시스템 프롬프트 + 첫 user 메시지로 대화를 식별 (초기화하면 새 키가 됨)"""
+    anchor = next((m["content"] for m in messages if m["role"] == "user"), "")
+    return hashlib.sha1((messages[0]["content"] + "\x00" + anchor).encode("utf-8")).hexdigest()[:16]
+
+
+class ConversationCompactor:
+    def __init__(self, summarize_fn, token_budget=6000, keep_turns=4):
+        """summarize_fn(previous_summary, turns) -> 새 요약 문자열"""
+        self.summarize_fn = summarize_fn
+        self.token_budget = token_budget
+        self.keep_turns = keep_turns
+
+    def compact(self, messages, state):
+        """
+        API에 보낼 메시지 목록과 (원래 토큰 수, 실제 보낼 토큰 수)를 반환.
+        state는 대화별로 유지되는 dict: {"covered": 요약에 포함된 메시지 수, "summary": 요약문}
+        """
+        full_tokens = count_message_tokens(messages)
+        if full_tokens <= self.token_budget:
+            return messages, full_tokens, full_tokens
+
+        # [시스템] [첫 user(원본 이야기)] [중간 ...] [최근 K턴]
+        anchor_end = next((i + 1 for i, m in enumerate(messages) if m["role"] == "user"), 1)
+        tail_start = max(anchor_end, len(messages) - self.keep_turns * 2)
+        # 요약 경계를 매 턴 옮기면 [시스템][원본][요약] 접두부가 매번 바뀌어 프롬프트 캐시가 깨진다.
+        # 새로 밀려난 턴이 keep_turns턴 쌓일 때까지는 기존 요약 경계를 그대로 쓴다.
+        covered = state.get("covered", 0)
+        if covered and anchor_end + covered <= tail_start < anchor_end + covered + self.keep_turns * 2:
+            tail_start = anchor_end + covered
+        head, middle, tail = messages[:anchor_end], messages[anchor_end:tail_start], messages[tail_start:]
+        if not middle:
+            return messages, full_tokens, full_tokens
+
+        # 이미 요약한 부분 이후에 새로 밀려난 턴만 요약에 합친다 (롤링 요약)
+        if covered < len(middle):
+            state["summary"] = self.summarize_fn(state.get("summary", ""), middle[covered:])
+            state["covered"] = len(middle)
+
+        summary_message = {"role": "system", "content": SUMMARY_PREFIX + state["summary"]}
+        compacted = head + [summary_message] + tail
+        return compacted, full_tokens, count_message_tokens(compacted)
@@ -0,0 +1,198 @@
+import datetime
+import time
+
+import pandas as pd
+import streamlit as st
+
+from metrics import LATENCY_BUCKETS
+
+
+# =========================================================
+# 📈 운영 대시보드 (선생님용, 수업 중 실시간 상태 확인)
+# =========================================================
+
+def _latency_frame(metrics, name, since_seconds):
+    samples = metrics.samples(name, since_seconds)
+    if not samples:
+        return None
+    df = pd.DataFrame(samples)
+    df["time"] = pd.to_datetime(df["time"], unit="s")
+    return df
+
+
+def _rolling_percentiles(df):
+    """1분 단위 p50 / p95 추이"""
+    grouped = df.set_index("time")["value"].resample("1min")
+    return pd.DataFrame({"p50": grouped.quantile(0.5), "p95": grouped.quantile(0.95)}).dropna()
+
+
+def _summary_row(label, df):
+    if df is None:
+        return {"구분": label, "요청 수": 0, "오류율": "-", "p50(초)": "-", "p95(초)": "-"}
+    errors = (~df["outcome"].isin(["success", "cache_hit"])).sum()
+    return {
+        "구분": label,
+        "요청 수": len(df),
+        "오류율": f"{errors / len(df):.1%}",
+        "p50(초)": round(df["value"].quantile(0.5), 2),
+        "p95(초)": round(df["value"].quantile(0.95), 2),
+    }
+
+
+def _prompt_cache_table(counters):
+    """섹션별 입력 토큰 중 OpenAI 프롬프트 캐시에서 읽은 비율"""
+    cache = counters[counters["name"].isin(["gpt_prompt_tokens_total", "gpt_cached_tokens_total"])]
+    if cache.empty:
+        return None
+    table = cache.pivot_table(index="section", columns="name", values="value", aggfunc="sum", fill_value=0)
+    table = table.rename(columns={"gpt_prompt_tokens_total": "입력 토큰", "gpt_cached_tokens_total": "캐시 토큰"})
+    table["캐시 비율"] = (table["캐시 토큰"] / table["입력 토큰"]).map("{:.1%}".format)
+    return table
+
+
+def render_dashboard(metrics, component_stats, window_minutes=30):
+    """metrics: MetricsRegistry, component_stats: {"이름": stats dict 또는 {별칭: dict}}"""
+    since = window_minutes * 60
+    gpt = _latency_frame(metrics, "gpt_latency_seconds", since)
+    image = _latency_frame(metrics, "image_latency_seconds", since)
+    image_draft = _latency_frame(metrics, "image_draft_latency_seconds", since)
+
+    st.caption(f"최근 {window_minutes}분 기준 · {datetime.datetime.now():%H:%M:%S} 갱신")
+    st.dataframe(pd.DataFrame([_summary_row("GPT 대화", gpt), _summary_row("이미지 생성", image),
+                               _summary_row("이미지 초안", image_draft)]), hide_index=True)
+
+    col_gpt, col_image, col_draft = st.columns(3)
+    with col_gpt:
+        st.subheader("GPT 지연 시간 (초)")
+        if gpt is not None:
+            st.line_chart(_rolling_percentiles(gpt))
+    with col_image:
+        st.subheader("이미지 지연 시간 (초)")
+        if image is not None:
+            st.line_chart(_rolling_percentiles(image))
+    with col_draft:
+        st.subheader("이미지 초안 지연 시간 (초)")
+        if image_draft is not None:
+            st.line_chart(_rolling_percentiles(image_draft))
+
+    counters = pd.DataFrame(metrics.counters())
+    if not counters.empty:
+        st.subheader("섹션 / 모델 / 키별 누적")
+        requests = counters[counters["name"].str.endswith("_requests_total")]
+        st.dataframe(
+            requests.pivot_table(index=["section", "model", "key"], columns="outcome", values="value",
+                                 aggfunc="sum", fill_value=0),
+        )
+        tokens = counters[counters["name"] == "gpt_tokens_total"]
+        if not tokens.empty:
+            st.bar_chart(tokens.groupby("section")["value"].sum(), y_label="토큰")
+        prompt_cache = _prompt_cache_table(counters)
+        if prompt_cache is not None:
+            st.subheader("프롬프트 캐시 적중 (입력 토큰 기준)")
+            st.dataframe(prompt_cache)
+
+    st.subheader("구성 요소 상태")
+    for name, stats in component_stats.items():
+        with st.expander(name):
+            if stats and all(isinstance(v, dict) for v in stats.values()):
+                st.dataframe(pd.DataFrame(stats).T)
+            else:
+                st.json(stats)
+
+    st.download_button(
+        "Prometheus 지표 내려받기",
+        data=metrics.to_prometheus(),
+        file_name="metrics.prom",
+        mime="text/plain"
+    )
+
+
+# =========================================================
+# 🗂️ 사용 기록 분석 (로컬 Parquet 기록, 학기 전체 조회)
+# =========================================================
+
+TURN_ACTIONS = ("대화", "대화(캐시)")
+ANALYTICS_COLUMNS = ["ts", "day", "class_name", "student", "section", "action", "status", "model", "latency", "tokens"]
+
+
+def _student_table(df):
+    """학생별 대화 턴 수, 이미지 수, 토큰 합계, 평균 지연, 오류 수"""
+    grouped = df.groupby(["class_name", "student"])
+    table = pd.DataFrame({
+        "대화 턴": grouped["action"].apply(lambda a: a.isin(TURN_ACTIONS).sum()),
+        "이미지": grouped["action"].apply(lambda a: (a == "이미지생성").sum()),
+        "토큰 합계": grouped["tokens"].sum(),
+        "평균 지연(초)": grouped["latency"].mean().round(2),
+        "오류": grouped["status"].apply(lambda s: (s == "ERROR").sum()),
+        "마지막 활동": grouped["ts"].max(),
+    })
+    return table.sort_values("대화 턴", ascending=False).rename_axis(["반", "학생"])
+
+
+def _latency_histogram(df):
+    """성공한 GPT 대화의 지연 시간 구간별 건수"""
+    latency = df.loc[(df["action"] == "대화") & (df["status"] == "SUCCESS"), "latency"].dropna()
+    if latency.empty:
+        return None
+    bins = [0, *LATENCY_BUCKETS, float("inf")]
+    labels = [f"~{b}초" for b in LATENCY_BUCKETS] + [f"{LATENCY_BUCKETS[-1]}초~"]
+    return pd.cut(latency, bins=bins, labels=labels).value_counts(sort=False).rename("건수")
+
+
+def _latency_percentiles(df):
+    """섹션/모델별 p50 / p95 지연 시간"""
+    calls = df[(df["status"] == "SUCCESS") & df["latency"].gt(0)]
+    if calls.empty:
+        return None
+    grouped = calls.groupby(["section", "model"], dropna=False)["latency"]
+    return pd.DataFrame({
+        "요청 수": grouped.size(),
+        "p50(초)": grouped.quantile(0.5).round(2),
+        "p95(초)": grouped.quantile(0.95).round(2),
+    })
+
+
+def render_usage_analytics(interaction_log):
+    """interaction_log: InteractionLog. 기간과 반을 골라 학생별 사용량, 지연 분포, 토큰 합계를 보여줌"""
+    today = datetime.date.today()
+    col_range, col_class = st.columns(2)
+    with col_range:
+        period = st.date_input("기간", (today - datetime.timedelta(days=30), today), max_value=today)
+    with col_class:
+        classes = st.multiselect("반 (비우면 전체)", interaction_log.classes())
+    if not isinstance(period, tuple) or len(period) != 2:
+        st.info("시작일과 종료일을 모두 골라 주세요.")
+        return
+
+    started = time.perf_counter()
+    df = interaction_log.load(since=period[0], until=period[1], classes=classes, columns=ANALYTICS_COLUMNS)
+    st.caption(f"{len(df):,}건 · {time.perf_counter() - started:.2f}초 만에 불러옴")
+    if df.empty:
+        st.info("이 기간에 남은 기록이 없어요.")
+        return
+
+    st.subheader("학생별 사용량")
+    students = _student_table(df)
+    st.dataframe(students)
+    st.download_button(
+        "학생별 사용량 CSV 내려받기",
+        data=students.to_csv().encode("utf-8-sig"),  # 엑셀에서 한글이 깨지지 않게 BOM 포함
+        file_name=f"usage_{period[0]}_{period[1]}.csv",
+        mime="text/csv"
+    )
+
+    col_hist, col_pct = st.columns(2)
+    with col_hist:
+        st.subheader("GPT 대화 지연 분포")
+        histogram = _latency_histogram(df)
+        if histogram is not None:
+            st.bar_chart(histogram)
+    with col_pct:
+        st.subheader("섹션 / 모델별 지연")
+        percentiles = _latency_percentiles(df)
+        if percentiles is not None:
+            st.dataframe(percentiles)
+
+    st.subheader("날짜 / 반별 토큰 합계")
+    st.bar_chart(df.pivot_table(index="day", columns="class_name", values="tokens", aggfunc="sum", fill_value=0),
+                 y_label="토큰")
@@ -0,0 +1,147 @@
+import json
+
+
+# =========================================================
+# 🧾 최종 프롬프트 구조화 (OpenAI 함수 호출)
+# =========================================================
+# 섹션 3(DALL-E)과 4(Pika)의 최종 프롬프트는 글 속 표시 문구를 찾아 자르지 않고,
+# 모델이 정해진 스키마로 함수를 호출하게 해서 한 번에 받는다 (strict 모드라 형식이 어긋나지 않음).
+# 받은 값은 아래 클래스로 바꿔 세션 상태에 그대로 보관하고, 대화 기록에는 기존 형식의 글로 보여준다.
+
+def _function_tool(name, description, properties):
+    return {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": description,
+            "strict": True,
+            "parameters": {
+                "type": "object",
+                "properties": properties,
+                "required": list(properties),
+                "additionalProperties": False,
+            },
+        },
+    }
+
+
+IMAGE_PROMPT_TOOL = _function_tool(
+    "submit_image_prompt",
+    "모든 정보가 모였을 때 DALL-E에 보낼 최종 이미지 프롬프트를 전달한다.",
+    {
+        "english_prompt": {"type": "string", "description": "DALL-E에 보낼 영어 프롬프트"},
+        "korean_translation": {"type": "string", "description": "영어 프롬프트의 자연스러운 한국어 번역"},
+    },
+)
+
+PIKA_PROMPT_TOOL = _function_tool(
+    "submit_pika_prompt",
+    "장면의 최종 Pika 영상 프롬프트를 전달한다. Pika 명령어는 english_prompt에 쓰지 말고 flags에 나눠 담는다.",
+    {
+        "korean_prompt": {"type": "string", "description": "간결하고 시각적인 한국어 영상 프롬프트"},
+        "english_prompt": {"type": "string", "description": "명령어를 뺀 Pika AI용 영어 프롬프트 (1~2문장)"},
+        "flags": {
+            "type": "object",
+            "description": "필요한 Pika 명령어만 채우고 나머지는 null",
+            "properties": {
+                "aspect_ratio": {"type": ["string", "null"], "description": "--ar, 예: 16:9"},
+                "duration_seconds": {"type": ["integer", "null"], "enum": [5, 10, None], "description": "--duration (Pika 2.2)"},
+                "fps": {"type": ["integer", "null"], "description": "--fps, 초당 프레임 8~24 (Pika 2.2)"},
+                "camera": {"type": ["string", "null"], "description": "--camera, 예: pan right, zoom in"},
+                "motion": {"type": ["integer", "null"], "enum": [0, 1, 2, 3, 4, None], "description": "--motion, 움직임 세기 0~4 (Pika 2.2)"},
+                "style": {"type": ["string", "null"], "description": "--style, 예: anime, watercolor (Pika 2.2)"},
+                "guidance_scale": {"type": ["number", "null"], "description": "--gs"},
+                "negative_prompt": {"type": ["string", "null"], "description": "--neg"},
+                "seed": {"type": ["integer", "null"], "description": "--seed"},
+            },
+            "required": ["aspect_ratio", "duration_seconds", "fps", "camera", "motion", "style", "guidance_scale",
+                         "negative_prompt", "seed"],
+            "additionalProperties": False,
+        },
+        "encouragement": {"type": "string", "description": "학생에게 건네는 짧은 격려 문구"},
+    },
+)
+
+# flags 항목 -> Pika 명령어 (붙이는 순서대로)
+PIKA_FLAG_OPTIONS = (
+    ("aspect_ratio", "--ar"),
+    ("duration_seconds", "--duration"),
+    ("fps", "--fps"),
+    ("camera", "--camera"),
+    ("motion", "--motion"),
+    ("style", "--style"),
+    ("guidance_scale", "--gs"),
+    ("negative_prompt", "--neg"),
+    ("seed", "--seed"),
+)
+
+
+class ImagePrompt:
+    tool_name = "submit_image_prompt"
+
+    def __init__(self, english_prompt, korean_translation):
+        self.english_prompt = english_prompt.strip()
+        self.korean_translation = korean_translation.strip()
+
+    def arguments(self):
+        return {"english_prompt": self.english_prompt, "korean_translation": self.korean_translation}
+
+    def to_markdown(self):
+        return f"**DALL-E 프롬프트 (영어):** {self.english_prompt}\n**한국어 번역:** {self.korean_translation}"
+
+
+class PikaPrompt:
+    tool_name = "submit_pika_prompt"
+
+    def __init__(self, korean_prompt, english_prompt, flags, encouragement):
+        self.korean_prompt = korean_prompt.strip()
+        self.english_prompt = english_prompt.strip()
+        self.flags = {k: v for k, v in (flags or {}).items() if v not in (None, "")}
+        self.encouragement = encouragement.strip()
+
+    def arguments(self):
+        return {"korean_prompt": self.korean_prompt, "english_prompt": self.english_prompt,
+                "flags": self.flags, "encouragement": self.encouragement}
+
+    def command(self):
+        """Pika에 그대로 붙여 넣을 영어 프롬프트 + 명령어"""
+        options = []
+        for key, option in PIKA_FLAG_OPTIONS:
+            if key in self.flags:
+                value = self.flags[key]
+                options.append(f"{option} {value}s" if key == "duration_seconds" else f"{option} {value}")
+        return " ".join([self.english_prompt] + options)
+
+    def to_markdown(self):
+        return (f"✨ **완성된 영상 프롬프트 (한국어):** {self.korean_prompt}\n"
+                f"🎬 **Pika AI용 영어 프롬프트:** {self.command()}\n"
+                f"{self.encouragement}")
+
+
+_PARSERS = {cls.tool_name: cls for cls in (ImagePrompt, PikaPrompt)}
+
+
+def forced(tool):
+    """tool_choice 값: 질문 없이 이 함수를 바로 호출하게 함 (일괄 초안 등)"""
+    return {"type": "function", "function": {"name": tool["function"]["name"]}}
+
+
+def parse_tool_call(name, arguments):
+    """함수 이름과 JSON 인자 문자열로 ImagePrompt / PikaPrompt 생성 (모르는 함수면 ValueError)"""
+    if name not in _PARSERS:
+        raise ValueError(f"알 수 없는 함수 호출: {name}")
+    return _PARSERS[name](**json.loads(arguments))
+
+
+def to_json(obj):
+    """json.dumps(default=...)용: ImagePrompt / PikaPrompt를 함수 이름과 인자로 바꿈 (세션 저장)"""
+    if isinstance(obj, tuple(_PARSERS.values())):
+        return {"__final_prompt__": obj.tool_name, "arguments": obj.arguments()}
+    raise TypeError(f"변환할 수 없는 값: {type(obj).__name__}")
+
+
+def from_json(value):
+    """json.loads(object_hook=...)용: to_json으로 바꾼 dict를 다시 객체로"""
+    if "__final_prompt__" in value:
+        return _PARSERS[value["__final_prompt__"]](**value["arguments"])
+    return value
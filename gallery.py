@@ -0,0 +1,68 @@
+import hashlib
+import sqlite3
+import threading
+import time
+
+
+# =========================================================
+# 🖼️ 학생별 이미지 갤러리 (디스크 저장소 + SQLite 색인)
+# =========================================================
+# 이미지 바이트는 BlobStore(콘텐츠 주소)에 두고, 여기서는 누가 어떤 프롬프트로
+# 언제 만들었는지만 색인한다. 학생별 보관 개수를 넘으면 오래된 것부터 지우고,
+# 저장소 용량 정리로 파일이 사라진 항목은 조회할 때 걸러낸다.
+
+def prompt_hash(prompt):
+    return hashlib.sha256(prompt.strip().encode("utf-8")).hexdigest()[:16]
+
+
+class Gallery:
+    def __init__(self, blobs, index_path="gallery.sqlite3", per_student_limit=30):
+        self.blobs = blobs
+        self.per_student_limit = per_student_limit
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(index_path, check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS gallery ("
+            " student TEXT, prompt_hash TEXT, prompt TEXT, image_key TEXT, kind TEXT, created REAL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS gallery_student ON gallery (student, created)")
+        self._db.execute("CREATE INDEX IF NOT EXISTS gallery_prompt ON gallery (prompt_hash)")
+        self._db.commit()
+
+    def add(self, student, prompt, image_key, kind=""):
+        """생성된 이미지를 색인에 추가하고 학생별 보관 개수 초과분을 정리"""
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO gallery VALUES (?, ?, ?, ?, ?, ?)",
+                (student, prompt_hash(prompt), prompt.strip(), image_key, kind, time.time())
+            )
+            self._db.execute(
+                "DELETE FROM gallery WHERE student = ? AND rowid NOT IN ("
+                " SELECT rowid FROM gallery WHERE student = ? ORDER BY created DESC LIMIT ?)",
+                (student, student, self.per_student_limit)
+            )
+            self._db.commit()
+
+    def list(self, student, limit=None):
+        """학생의 이미지 목록 (최신순, 저장소에서 사라진 것은 제외)"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT prompt, image_key, kind, created FROM gallery WHERE student = ? ORDER BY created DESC",
+                (student,)
+            ).fetchall()
+        items = [
+            {"prompt": prompt, "image_key": key, "kind": kind, "created": created}
+            for prompt, key, kind, created in rows
+            if self.blobs.contains(key)
+        ]
+        return items[:limit] if limit else items
+
+    def find_by_prompt(self, prompt, student=None):
+        """같은 프롬프트로 이미 만든 이미지 (본인 것을 먼저, 없으면 다른 학생 것)"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT student, image_key FROM gallery WHERE prompt_hash = ? ORDER BY created DESC",
+                (prompt_hash(prompt),)
+            ).fetchall()
+        rows.sort(key=lambda row: row[0] != student)
+        return next((key for _, key in rows if self.blobs.contains(key)), None)
@@ -0,0 +1,72 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+
+# =========================================================
+# 🖼️ 이미지 생성 백그라운드 작업 관리
+# =========================================================
+# DALL-E 호출을 공용 스레드 풀에서 돌리고, 세션에는 작업 ID만 들고 있게 한다.
+# 화면은 주기적으로 상태를 확인(폴링)해서 끝난 작업의 결과를 가져간다.
+# 작업 함수는 Streamlit 스크립트 밖에서 실행되므로 st.* 를 호출하면 안 된다.
+
+class ImageJob:
+    def __init__(self, prompt, tier="final"):
+        self.id = uuid.uuid4().hex[:12]
+        self.prompt = prompt
+        self.tier = tier        # draft(빠른 초안 미리보기) / final
+        self.status = "queued"  # queued → running → done / error
+        self.position = None    # 스케줄러 대기 순번 (앞에 남은 요청 수)
+        self.result = None
+        self.error = None
+        self.created = time.time()
+        self.finished = None
+
+    @property
+    def is_finished(self):
+        return self.status in ("done", "error")
+
+
+class ImageJobManager:
+    def __init__(self, max_workers=4, keep_seconds=30 * 60):
+        self.keep_seconds = keep_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, fn, prompt, tier="final"):
+        """fn(job) -> 결과를 백그라운드에서 실행하고 작업 ID 반환"""
+        job = ImageJob(prompt, tier)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, fn, job)
+        return job.id
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def pop(self, job_id):
+        """끝난 작업을 꺼내고 목록에서 지움"""
+        with self._lock:
+            return self._jobs.pop(job_id, None)
+
+    def _run(self, fn, job):
+        job.status = "running"
+        # status는 다른 세션의 폴링과 _prune이 lock 없이 보므로 결과와 finished를 먼저 채운 뒤 마지막에 바꾼다
+        try:
+            job.result = fn(job)
+            job.finished = time.time()
+            job.status = "done"
+        except Exception as e:
+            job.error = e
+            job.finished = time.time()
+            job.status = "error"
+
+    def _prune(self):
+        # 결과를 가져가지 않고 떠난 세션의 작업은 일정 시간 뒤 정리
+        cutoff = time.time() - self.keep_seconds
+        for job_id in [j.id for j in self._jobs.values() if j.is_finished and j.finished is not None and j.finished < cutoff]:
+            del self._jobs[job_id]
@@ -0,0 +1,125 @@
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+# =========================================================
+# 🛬 진행 중인 요청 합치기 (중복 제출 방지)
+# =========================================================
+# 같은 키(세션 + 메시지 목록 해시)의 요청이 아직 진행 중이면 API를 다시 부르지 않고
+# 기존 요청(Flight)에 붙는다. 버튼을 두 번 누르거나 답변을 기다리다 다시 보내면
+# Streamlit이 이전 실행을 멈추고 새로 실행하는데, 실제 호출은 작업 스레드에서 계속되므로
+# 새 실행이 그 결과를 이어받는다. 성공한 결과는 keep_seconds 동안 남겨 두어
+# 결과를 받기 직전에 끊긴 실행도 이어받을 수 있게 하고, 실패한 요청은 바로 지운다.
+# 작업 함수는 스크립트 밖에서 실행되므로 st.* 를 호출하면 안 된다.
+
+def flight_key(scope, *parts):
+    """scope(학생 이름, 또는 세션 간 공유면 "shared")와 요청 내용으로 만든 키"""
+    payload = json.dumps(parts, ensure_ascii=False, sort_keys=True, default=str)
+    return f"{scope}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()[:24]}"
+
+
+class Flight:
+    def __init__(self, key):
+        self.key = key
+        self.text = ""          # 지금까지 받은 답변 (재시도하면 비움)
+        self.notice = None      # 재시도 안내 문구
+        self.position = None    # 스케줄러 대기 순번
+        self.done = False
+        self.result = None
+        self.error = None
+        self.followers = 0      # 이 요청에 붙은 중복 제출 수
+        self.finished = None
+        self._version = 0
+        self._cond = threading.Condition()
+
+    def _changed(self):
+        self._version += 1
+        self._cond.notify_all()
+
+    def append(self, text):
+        with self._cond:
+            self.text += text
+            self.notice = None
+            self._changed()
+
+    def update(self, **fields):
+        """text / notice / position 갱신"""
+        with self._cond:
+            for name, value in fields.items():
+                setattr(self, name, value)
+            self._changed()
+
+    def finish(self, result=None, error=None):
+        with self._cond:
+            self.finished = time.time()  # _prune은 lock 없이 done을 보므로 finished를 먼저 채움
+            self.result, self.error, self.done = result, error, True
+            self._changed()
+
+    def wait_change(self, seen_version, timeout):
+        """seen_version 이후 바뀌거나 끝날 때까지 기다린 뒤 (버전, 텍스트, 안내, 순번, 완료 여부) 반환"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._version != seen_version or self.done, timeout=timeout)
+            return self._version, self.text, self.notice, self.position, self.done
+
+    def outcome(self):
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class InflightRegistry:
+    def __init__(self, max_workers=32, keep_seconds=60):
+        self.keep_seconds = keep_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="gpt-call")
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._started = 0
+        self._coalesced = 0
+
+    def find(self, key):
+        """진행 중이거나 최근에 성공한 요청 (없으면 None)"""
+        with self._lock:
+            self._prune()
+            return self._flights.get(key)
+
+    def start(self, key, fn):
+        """
+        같은 키의 요청이 있으면 거기에 붙고, 없으면 fn(flight) -> 결과를 작업 스레드에서 시작.
+        (flight, 새로 시작했는지) 반환.
+        """
+        with self._lock:
+            self._prune()
+            flight = self._flights.get(key)
+            if flight is not None:
+                flight.followers += 1
+                self._coalesced += 1
+                return flight, False
+            flight = Flight(key)
+            self._flights[key] = flight
+            self._started += 1
+        self._executor.submit(self._run, fn, flight)
+        return flight, True
+
+    def stats(self):
+        with self._lock:
+            return {
+                "in_flight": sum(1 for f in self._flights.values() if not f.done),
+                "started": self._started,
+                "coalesced": self._coalesced,
+            }
+
+    def _run(self, fn, flight):
+        try:
+            flight.finish(result=fn(flight))
+        except Exception as e:
+            with self._lock:
+                self._flights.pop(flight.key, None)  # 실패한 요청은 다시 보내면 새로 시도
+            flight.finish(error=e)
+
+    def _prune(self):
+        cutoff = time.time() - self.keep_seconds
+        for key in [k for k, f in self._flights.items() if f.done and f.finished < cutoff]:
+            del self._flights[key]
@@ -0,0 +1,180 @@
+import atexit
+import datetime
+import glob
+import os
+import shutil
+import threading
+import time
+import urllib.parse
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+
+# =========================================================
+# 🗂️ 로컬 상호작용 기록 (Parquet, 날짜/반별 파티션)
+# =========================================================
+# 시트로 보내는 로그와 같은 이벤트를 글 내용 없이 숫자와 ID만 남겨 Parquet로 쌓는다.
+# 프롬프트 원문 대신 prompt_id, 질문/답변 대신 글자 수만 저장한다.
+# record()는 메모리에 모으기만 하고, 백그라운드 스레드가 flush_interval초마다
+# root/day=YYYY-MM-DD/class_name=반/ 아래에 새 파일로 쓴다.
+# 지난 날짜의 조각 파일은 한 파일로 합치고(compact), keep_days보다 오래된 날짜는 지운다.
+# 파일 쓰기/읽기에는 pyarrow가 필요하다.
+
+COLUMNS = {
+    "ts": "datetime64[ns]",
+    "day": "string",
+    "class_name": "string",
+    "student": "string",
+    "section": "string",
+    "action": "string",
+    "status": "string",
+    "model": "string",
+    "route": "string",
+    "prompt_id": "string",
+    "latency": "float32",
+    "ttft": "float32",
+    "tokens": "int32",
+    "prompt_tokens": "int32",
+    "cached_tokens": "int32",
+    "question_chars": "int32",
+    "answer_chars": "int32",
+}
+PARTITION_COLS = ["day", "class_name"]
+# 반 이름이 숫자뿐이어도 정수로 추측하지 않도록 파티션 형식을 고정
+PARTITIONING = ds.partitioning(pa.schema([("day", pa.string()), ("class_name", pa.string())]), flavor="hive")
+COMPACTED_NAME = "compacted.parquet"
+
+
+class InteractionLog:
+    def __init__(self, root="interaction_log", flush_interval=5.0, keep_days=365, compact_interval=3600):
+        self.root = root
+        self.flush_interval = flush_interval
+        self.keep_days = keep_days
+        self.compact_interval = compact_interval
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()  # flush와 compact가 같은 폴더를 동시에 건드리지 않게
+        self._buffer = []
+        self._counters = {"recorded": 0, "written": 0, "files": 0, "compacted": 0}
+        self._last_compact = 0.0
+        os.makedirs(root, exist_ok=True)
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="interaction-log", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, student, class_name, section, action, status, model=None, route=None, prompt_id=None,
+               latency=None, ttft=None, tokens=0, prompt_tokens=0, cached_tokens=0, question_chars=0, answer_chars=0):
+        """이벤트 하나를 버퍼에 넣음 (요청 경로에서 호출, 파일은 건드리지 않음)"""
+        now = datetime.datetime.now()
+        row = {
+            "ts": now, "day": now.date().isoformat(), "class_name": class_name or "-",
+            "student": student, "section": section or "-", "action": action, "status": status,
+            "model": model, "route": route, "prompt_id": prompt_id,
+            "latency": latency, "ttft": ttft, "tokens": tokens or 0, "prompt_tokens": prompt_tokens or 0,
+            "cached_tokens": cached_tokens or 0, "question_chars": question_chars, "answer_chars": answer_chars,
+        }
+        with self._lock:
+            self._buffer.append(row)
+            self._counters["recorded"] += 1
+
+    def flush(self):
+        """모아 둔 이벤트를 파티션별 새 Parquet 파일로 기록"""
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+        if not rows:
+            return
+        frame = pd.DataFrame(rows, columns=list(COLUMNS)).astype(COLUMNS)
+        try:
+            with self._write_lock:
+                frame.to_parquet(self.root, partition_cols=PARTITION_COLS, index=False)
+        except Exception:
+            with self._lock:
+                self._buffer = rows + self._buffer  # 다음 주기에 다시 시도
+            raise
+        with self._lock:
+            self._counters["written"] += len(rows)
+            self._counters["files"] += frame.groupby(PARTITION_COLS).ngroups
+
+    def load(self, since=None, until=None, classes=None, columns=None):
+        """
+        기간(date, 포함)과 반으로 걸러 DataFrame으로 읽음. 해당 폴더만 읽고 필요한 열만 읽는다.
+        아직 쓰지 않은 이벤트도 먼저 기록해서 포함.
+        """
+        self.flush()
+        if not glob.glob(os.path.join(self.root, "day=*")):
+            return pd.DataFrame({name: pd.Series(dtype=dtype) for name, dtype in COLUMNS.items()})
+        filters = []
+        if since is not None:
+            filters.append(("day", ">=", since.isoformat()))
+        if until is not None:
+            filters.append(("day", "<=", until.isoformat()))
+        if classes:
+            filters.append(("class_name", "in", list(classes)))
+        frame = pd.read_parquet(self.root, columns=columns, filters=filters or None, partitioning=PARTITIONING)
+        for name in PARTITION_COLS:  # 파일 속 열과 같은 문자열 형식으로 맞춤
+            if name in frame:
+                frame[name] = frame[name].astype("string")
+        return frame
+
+    def classes(self):
+        """기록이 있는 반 이름 목록 (폴더 이름만 훑음)"""
+        names = {
+            urllib.parse.unquote(os.path.basename(path).split("=", 1)[1])
+            for path in glob.glob(os.path.join(self.root, "day=*", "class_name=*"))
+        }
+        return sorted(names)
+
+    def compact(self):
+        """오늘 이전 날짜의 조각 파일을 반별 한 파일로 합치고, 보관 기간이 지난 날짜는 삭제"""
+        today = datetime.date.today()
+        cutoff = (today - datetime.timedelta(days=self.keep_days)).isoformat() if self.keep_days else None
+        with self._write_lock:
+            for day_dir in glob.glob(os.path.join(self.root, "day=*")):
+                day = os.path.basename(day_dir).split("=", 1)[1]
+                if cutoff and day < cutoff:
+                    shutil.rmtree(day_dir, ignore_errors=True)
+                    continue
+                if day >= today.isoformat():
+                    continue
+                for class_dir in glob.glob(os.path.join(day_dir, "class_name=*")):
+                    self._compact_dir(class_dir)
+        self._last_compact = time.time()
+
+    def _compact_dir(self, class_dir):
+        parts = glob.glob(os.path.join(class_dir, "*.parquet"))
+        if len(parts) <= 1:
+            return
+        frame = pd.concat([pd.read_parquet(path) for path in parts], ignore_index=True).sort_values("ts")
+        tmp_path = os.path.join(class_dir, "." + COMPACTED_NAME)  # 점으로 시작하는 파일은 읽을 때 무시됨
+        frame.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, os.path.join(class_dir, COMPACTED_NAME))
+        for path in parts:
+            if os.path.basename(path) != COMPACTED_NAME:
+                os.remove(path)
+        with self._lock:
+            self._counters["compacted"] += len(parts)
+
+    def stats(self):
+        with self._lock:
+            snapshot = dict(self._counters)
+            snapshot["pending"] = len(self._buffer)
+        return snapshot
+
+    def close(self, timeout=5.0):
+        self._stopped.set()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stopped.wait(self.flush_interval):
+            try:
+                self.flush()
+                if time.time() - self._last_compact > self.compact_interval:
+                    self.compact()
+            except Exception as e:
+                print(f"상호작용 기록 저장 실패 (다음 주기에 다시 시도): {e}")
+        try:
+            self.flush()
+        except Exception as e:
+            print(f"상호작용 기록 저장 실패: {e}")
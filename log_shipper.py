@@ -0,0 +1,179 @@
+import atexit
+import json
+import os
+import queue
+import threading
+import time
+
+import requests
+
+
+# =========================================================
+# 📮 구글 시트 로그 전송기 (백그라운드 배치 전송)
+# =========================================================
+# 요청 처리 중에는 큐에 넣기만 하고, 실제 전송은 백그라운드 스레드가
+# N줄 또는 T초마다 모아서 한 번에 보낸다. 웹 앱이 죽어 있으면
+# 로컬 스필 파일(JSON Lines)에 쌓아 두었다가 복구되면 다시 보낸다.
+# 배포된 앱스 스크립트는 한 줄짜리 형식만 읽으므로 batch_size 기본값은 1이다.
+# 2 이상으로 올리려면 {"rows": [...]}를 풀어서 기록하고 {"ok": true}를 돌려주도록 스크립트를 먼저 바꿔야 한다.
+
+class LogShipper:
+    def __init__(self, url, batch_size=1, flush_interval=5.0, max_queue=1000,
+                 spill_path="log_spill.jsonl", timeout=10):
+        self.url = url
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+        self.timeout = timeout
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._spill_lock = threading.Lock()
+        self._counters = {"queued": 0, "shipped": 0, "dropped": 0, "spilled": 0, "replayed": 0}
+        self._stopped = threading.Event()
+
+        self._session = requests.Session()
+        self._thread = threading.Thread(target=self._run, name="log-shipper", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    # --- 요청 경로에서 호출 (절대 블로킹하지 않음) ---
+    def submit(self, row):
+        """로그 한 줄을 큐에 넣는다. 큐가 가득 차면 버리고 False 반환"""
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            self._count("dropped")
+            return False
+        self._count("queued")
+        return True
+
+    def stats(self):
+        """queued / shipped / dropped / spilled / replayed 카운터와 현재 대기 수"""
+        with self._lock:
+            snapshot = dict(self._counters)
+        snapshot["pending"] = self._queue.qsize()
+        return snapshot
+
+    def close(self, timeout=5.0):
+        """남은 로그를 최대한 보내고 워커를 종료"""
+        self._stopped.set()
+        self._thread.join(timeout)
+
+    # --- 내부 동작 ---
+    def _count(self, name, n=1):
+        with self._lock:
+            self._counters[name] += n
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            if not batch and self._stopped.is_set():
+                return
+            try:
+                if not batch:
+                    # 한가할 때도 스필 파일이 남아 있으면 재전송 시도
+                    self._replay_spill()
+                elif self._post(batch):
+                    self._count("shipped", len(batch))
+                    self._replay_spill()
+                else:
+                    self._spill(batch)
+            except Exception as e:
+                # 워커가 죽으면 이후 로그가 모두 큐에 쌓였다가 버려지므로 어떤 오류든 여기서 멈춘다
+                print(f"로그 전송기 오류 (계속 진행): {e}")
+
+    def _collect_batch(self):
+        """batch_size개가 모이거나 flush_interval이 지날 때까지 모은다"""
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                if self._stopped.is_set():
+                    # 종료 중에는 기다리지 않고 남은 것만 비운다
+                    batch.append(self._queue.get_nowait())
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _post(self, rows):
+        # 한 줄이면 기존 앱스 스크립트가 받던 형식 그대로, 여러 줄이면 {"rows": [...]}
+        payload = rows[0] if len(rows) == 1 else {"rows": rows}
+        try:
+            response = self._session.post(
+                self.url,
+                data=json.dumps(payload, ensure_ascii=False).encode("utf-8"),
+                headers={"Content-Type": "application/json"},
+                timeout=self.timeout
+            )
+            if response.status_code >= 400:
+                return False
+            if len(rows) > 1:
+                # 앱스 스크립트는 형식을 못 읽어도 200을 돌려주므로, 여러 줄은 스크립트가 확인해 줘야 보낸 것으로 침
+                try:
+                    return response.json().get("ok") is True
+                except ValueError:
+                    print("로그 전송 실패: 앱스 스크립트가 여러 줄 형식을 확인하지 않음 (스필 파일에 보관)")
+                    return False
+            return True
+        except Exception as e:
+            print(f"로그 전송 실패 (스필 파일에 보관): {e}")
+            return False
+
+    def _spill(self, rows, count=True):
+        try:
+            with self._spill_lock, open(self.spill_path, "a", encoding="utf-8") as f:
+                for row in rows:
+                    f.write(json.dumps(row, ensure_ascii=False) + "\n")
+            if count:
+                self._count("spilled", len(rows))
+        except OSError as e:
+            print(f"스필 파일 기록 실패 (로그 유실): {e}")
+            self._count("dropped", len(rows))
+
+    def _read_spill(self, path):
+        """스필 파일의 줄을 읽는다. 기록 중에 프로세스가 죽어 잘린 줄은 건너뜀"""
+        rows, broken = [], 0
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    rows.append(json.loads(line))
+                except ValueError:
+                    broken += 1
+        if broken:
+            print(f"스필 파일의 깨진 줄 {broken}개를 건너뜀")
+            self._count("dropped", broken)
+        return rows
+
+    def _replay_spill(self):
+        """
+        스필 파일을 통째로 가져와 batch_size 단위로 다시 보낸다.
+        .replay 파일은 모든 줄을 보내거나 다시 스필한 뒤에 지우므로, 그 전에 죽으면 다음 실행에서 이어서 보낸다.
+        """
+        replay_path = self.spill_path + ".replay"
+        if not os.path.exists(replay_path):  # 지난번에 다 못 보낸 파일이 있으면 그것부터
+            if not os.path.exists(self.spill_path):
+                return
+            with self._spill_lock:
+                try:
+                    os.replace(self.spill_path, replay_path)
+                except OSError:
+                    return
+        rows = self._read_spill(replay_path)
+
+        for i in range(0, len(rows), self.batch_size):
+            chunk = rows[i:i + self.batch_size]
+            if self._post(chunk):
+                self._count("replayed", len(chunk))
+            else:
+                # 아직 복구 안 됨: 남은 줄 전부 다시 스필하고 다음 기회에
+                self._spill(rows[i:], count=False)
+                break
+        os.remove(replay_path)
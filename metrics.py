@@ -0,0 +1,131 @@
+import os
+import threading
+import time
+from collections import defaultdict, deque
+
+
+# =========================================================
+# 📊 지연 시간 / 토큰 지표 (프로세스 내 카운터 + 히스토그램)
+# =========================================================
+# 라벨(섹션, 모델, 키 별칭, 결과)별로 카운터와 히스토그램을 모은다.
+# 최근 샘플은 시간 창 안에서만 보관해 대시보드의 p50/p95 추이 차트에 쓰고,
+# 누적값은 Prometheus 텍스트 형식으로 내보낼 수 있다.
+
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 20, 30, 60)
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(label_key, extra=()):
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (
+        k + '="' + v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for k, v in pairs
+    )
+    return "{" + ",".join(escaped) + "}"
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # 마지막 칸은 +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    def __init__(self, window_seconds=3600, max_samples=50000):
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)       # (이름, 라벨) -> 값
+        self._histograms = {}                     # (이름, 라벨) -> Histogram
+        self._samples = deque(maxlen=max_samples)  # (시각, 이름, 값, 라벨 dict)
+        self._exporter = None
+
+    def inc(self, name, value=1, **labels):
+        with self._lock:
+            self._counters[(name, _label_key(labels))] += value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        now = time.time()
+        with self._lock:
+            key = (name, _label_key(labels))
+            if key not in self._histograms:
+                self._histograms[key] = Histogram(buckets)
+            self._histograms[key].observe(value)
+            self._samples.append((now, name, value, labels))
+            while self._samples and self._samples[0][0] < now - self.window_seconds:
+                self._samples.popleft()
+
+    def samples(self, name, since_seconds=None):
+        """최근 관측값 목록: [{"time": 시각, "value": 값, **라벨}]"""
+        cutoff = time.time() - (since_seconds or self.window_seconds)
+        with self._lock:
+            return [
+                {"time": ts, "value": value, **labels}
+                for ts, sample_name, value, labels in self._samples
+                if sample_name == name and ts >= cutoff
+            ]
+
+    def counters(self):
+        """누적 카운터 목록: [{"name": 이름, "value": 값, **라벨}]"""
+        with self._lock:
+            return [
+                {"name": name, "value": value, **dict(label_key)}
+                for (name, label_key), value in self._counters.items()
+            ]
+
+    def to_prometheus(self):
+        """Prometheus 텍스트 노출 형식"""
+        lines = []
+        with self._lock:
+            for name in sorted({name for name, _ in self._counters}):
+                lines.append(f"# TYPE {name} counter")
+                for (counter_name, label_key), value in self._counters.items():
+                    if counter_name == name:
+                        lines.append(f"{name}{_format_labels(label_key)} {value}")
+            for name in sorted({name for name, _ in self._histograms}):
+                lines.append(f"# TYPE {name} histogram")
+                for (hist_name, label_key), hist in self._histograms.items():
+                    if hist_name != name:
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(list(hist.buckets) + ["+Inf"], hist.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(label_key, [('le', str(bound))])} {cumulative}")
+                    lines.append(f"{name}_sum{_format_labels(label_key)} {hist.total}")
+                    lines.append(f"{name}_count{_format_labels(label_key)} {hist.count}")
+        return "\n".join(lines) + "\n"
+
+    def start_file_exporter(self, path, interval=15):
+        """interval초마다 Prometheus 텍스트를 파일로 기록 (node_exporter textfile 수집기 등에서 읽음)"""
+        if self._exporter is not None:
+            return
+
+        def run():
+            while True:
+                try:
+                    tmp_path = path + ".tmp"
+                    with open(tmp_path, "w", encoding="utf-8") as f:
+                        f.write(self.to_prometheus())
+                    os.replace(tmp_path, path)
+                except OSError as e:
+                    print(f"지표 파일 기록 실패: {e}")
+                time.sleep(interval)
+
+        self._exporter = threading.Thread(target=run, name="metrics-exporter", daemon=True)
+        self._exporter.start()
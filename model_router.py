@@ -0,0 +1,47 @@
+# =========================================================
+# 🔀 모델 라우팅 (질문하는 턴은 작은 모델, 최종 결과는 큰 모델)
+# =========================================================
+# 섹션 1·3·4의 대화는 대부분 "한 번에 하나씩" 묻는 짧은 질문이라 작은 모델로 충분하다.
+# 최종 평가/프롬프트가 나올 차례(학생 발화 수가 기준 이상이거나, 학생이 마무리를 요청했거나,
+# 호출한 곳이 최종 결과를 기대한다고 알린 경우)에만 큰 모델을 쓴다.
+# 기준은 Secrets의 [model_routing]으로 바꿀 수 있다.
+
+DEFAULT_FINAL_FROM_TURN = {"1": 8, "3": 5, "4": 6}  # 섹션별로 이 번째 학생 발화부터 최종 모델
+DEFAULT_FINAL_KEYWORDS = ("장면 완성", "이대로", "만들어주세요", "만들어 주세요", "괜찮아요", "완성해")
+
+
+class ModelRouter:
+    def __init__(self, clarify_model="gpt-4o-mini", final_model="gpt-4o",
+                 final_from_turn=None, final_keywords=DEFAULT_FINAL_KEYWORDS, enabled=True):
+        self.clarify_model = clarify_model
+        self.final_model = final_model
+        self.final_from_turn = {str(k): int(v) for k, v in (final_from_turn or DEFAULT_FINAL_FROM_TURN).items()}
+        self.final_keywords = tuple(final_keywords)
+        self.enabled = enabled
+
+    @classmethod
+    def from_config(cls, config):
+        """Secrets의 [model_routing] 표(dict)로 생성. 없는 항목은 기본값"""
+        config = dict(config or {})
+        return cls(
+            clarify_model=config.get("clarify_model", "gpt-4o-mini"),
+            final_model=config.get("final_model", "gpt-4o"),
+            final_from_turn=config.get("final_from_turn"),
+            final_keywords=config.get("final_keywords", DEFAULT_FINAL_KEYWORDS),
+            enabled=config.get("enabled", True),
+        )
+
+    def route(self, section, messages, final=False):
+        """(모델, 이유) 반환. 이유는 로그/지표용: disabled / final / unrouted / keyword / turn / clarify"""
+        if not self.enabled:
+            return self.final_model, "disabled"
+        if final:
+            return self.final_model, "final"
+        if section not in self.final_from_turn:
+            return self.final_model, "unrouted"  # 라우팅 기준이 없는 섹션은 안전하게 큰 모델
+        user_messages = [m["content"] for m in messages if m["role"] == "user"]
+        if user_messages and any(keyword in user_messages[-1] for keyword in self.final_keywords):
+            return self.final_model, "keyword"
+        if len(user_messages) >= self.final_from_turn[section]:
+            return self.final_model, "turn"
+        return self.clarify_model, "clarify"
@@ -0,0 +1,173 @@
+import threading
+import time
+import uuid
+
+from openai import OpenAI, RateLimitError, APIConnectionError
+
+
+# =========================================================
+# 🔑 OpenAI 클라이언트 풀 (키별 장기 클라이언트 + 429 쿨다운 + 장애 조치)
+# =========================================================
+# 키마다 OpenAI 클라이언트를 한 번만 만들어 HTTP 연결 풀을 재사용한다.
+# 호출할 때는 진행 중인 요청이 가장 적은 키를 고르고(동률이면 가장 오래 쉰 키),
+# 429를 받은 키는 Retry-After 동안 빼 두고 다음 키로 넘어간다.
+# shared(shared_state 백엔드)를 주면 키별 진행 중 요청 수와 쿨다운을 다른 프로세스와 함께 본다
+# (여러 서버 프로세스가 같은 키를 따로 두드리지 않게). 진행 중 요청 수는 프로세스마다
+# key:{별칭}:in_flight:{프로세스 id}에 따로 세고 읽을 때 합친다. 그래서 죽은 프로세스의 값은
+# 다른 프로세스가 그 키를 계속 써도 만료된다.
+
+DEFAULT_COOLDOWN_SECONDS = 20
+
+
+class AllKeysCoolingDown(Exception):
+    """모든 키가 429 쿨다운 중이라 요청을 보낼 수 없음"""
+
+    def __init__(self, retry_in):
+        super().__init__(f"모든 API 키가 잠시 쉬는 중입니다. {retry_in:.0f}초 후 다시 시도하세요.")
+        self.retry_in = retry_in
+
+
+class KeyState:
+    def __init__(self, alias, client):
+        self.alias = alias
+        self.client = client
+        self.in_flight = 0
+        self.last_used = 0.0
+        self.cooldown_until = 0.0
+        self.rate_limited = 0
+        self.errors = 0
+
+    def is_healthy(self, now):
+        return now >= self.cooldown_until
+
+
+def retry_after_seconds(error, default=DEFAULT_COOLDOWN_SECONDS):
+    """429 응답 헤더(retry-after-ms / retry-after)에서 쉬어야 할 시간을 읽는다"""
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        pass
+    return default
+
+
+class OpenAIClientPool:
+    def __init__(self, api_keys, default_cooldown=DEFAULT_COOLDOWN_SECONDS, timeout=60, shared=None):
+        """api_keys: {별칭: 키} (st.secrets["openai_keys"] 그대로). 별칭은 모든 프로세스에서 같아야 함"""
+        if not api_keys:
+            raise ValueError("openai_keys가 비어 있습니다.")
+        self.default_cooldown = default_cooldown
+        self._shared = shared
+        self._replica = uuid.uuid4().hex[:12]  # 이 프로세스의 진행 중 요청 수를 담는 공유 키 구분용
+        # 진행 중 요청 수는 끝날 때 줄이는데, 프로세스가 죽어 줄이지 못한 값은 이 시간 뒤에 사라짐
+        self._in_flight_ttl = timeout * 2
+        self._lock = threading.Lock()
+        # 재시도는 풀이 다른 키로 넘기는 방식으로 처리하므로 SDK 자체 재시도는 끈다
+        self._keys = [
+            KeyState(alias, OpenAI(api_key=key, max_retries=0, timeout=timeout))
+            for alias, key in api_keys.items()
+        ]
+
+    def _shared_view(self):
+        """모든 프로세스를 합친 키별 (쿨다운이 끝나는 시각, 진행 중 요청 수). shared가 없으면 빈 dict"""
+        if self._shared is None:
+            return {}
+        values = self._shared.values("key:")  # 한 번에 읽음
+        view = {}
+        for k in self._keys:
+            in_flight_prefix = f"key:{k.alias}:in_flight:"
+            view[k.alias] = (
+                values.get(f"key:{k.alias}:cooldown_until", 0.0),
+                sum(max(0, v) for name, v in values.items() if name.startswith(in_flight_prefix)),
+            )
+        return view
+
+    def _in_flight_key(self, key):
+        return f"key:{key.alias}:in_flight:{self._replica}"
+
+    def _acquire(self, exclude):
+        shared = self._shared_view()  # 공유 저장소는 lock 밖에서 읽음
+        now = time.time()
+        with self._lock:
+            candidates = [
+                k for k in self._keys
+                if k.is_healthy(now) and now >= shared.get(k.alias, (0.0, 0))[0] and k.alias not in exclude
+            ]
+            if not candidates:
+                return None
+            key = min(candidates, key=lambda k: (shared[k.alias][1] if shared else k.in_flight, k.last_used))
+            key.in_flight += 1
+            key.last_used = now
+        if self._shared is not None:
+            self._shared.incr(self._in_flight_key(key), 1, ttl=self._in_flight_ttl)
+        return key
+
+    def _release(self, key, error=None):
+        cooldown = None
+        with self._lock:
+            key.in_flight -= 1
+            if isinstance(error, RateLimitError):
+                key.rate_limited += 1
+                cooldown = retry_after_seconds(error, self.default_cooldown)
+                key.cooldown_until = time.time() + cooldown
+            elif error is not None:
+                key.errors += 1
+        if self._shared is not None:
+            self._shared.incr(self._in_flight_key(key), -1, ttl=self._in_flight_ttl)
+            if cooldown is not None:
+                self._shared.set(f"key:{key.alias}:cooldown_until", key.cooldown_until, ttl=cooldown)
+
+    def call(self, fn, info=None):
+        """
+        fn(client)을 실행. 429/연결 오류면 다음 건강한 키로 넘겨 한 바퀴까지 시도.
+        info(dict)를 주면 마지막으로 사용한 키 별칭을 info["key_alias"]에 남긴다.
+        """
+        tried = set()
+        last_error = None
+        while True:
+            key = self._acquire(tried)
+            if key is None:
+                if last_error is not None:
+                    raise last_error
+                raise AllKeysCoolingDown(self.seconds_until_available())
+            tried.add(key.alias)
+            if info is not None:
+                info["key_alias"] = key.alias
+            try:
+                result = fn(key.client)
+            except (RateLimitError, APIConnectionError) as e:
+                self._release(key, e)
+                last_error = e
+                continue
+            except Exception as e:
+                self._release(key, e)
+                raise
+            self._release(key)
+            return result
+
+    def seconds_until_available(self):
+        """모든 키가 쉬는 중이면 가장 먼저 풀리는 키까지 남은 초, 아니면 0"""
+        shared = self._shared_view()
+        now = time.time()
+        with self._lock:
+            return max(0.0, min(max(k.cooldown_until, shared.get(k.alias, (0.0, 0))[0]) for k in self._keys) - now)
+
+    def stats(self):
+        """키 별칭별 진행 중 요청 수(이 프로세스 / 전체), 쿨다운 남은 시간, 429/오류 횟수"""
+        shared = self._shared_view()
+        now = time.time()
+        with self._lock:
+            return {
+                k.alias: {
+                    "in_flight": k.in_flight,
+                    "in_flight_all": shared[k.alias][1] if shared else k.in_flight,
+                    "cooldown_remaining": round(max(0.0, max(k.cooldown_until, shared.get(k.alias, (0.0, 0))[0]) - now), 1),
+                    "rate_limited": k.rate_limited,
+                    "errors": k.errors,
+                }
+                for k in self._keys
+            }
@@ -0,0 +1,142 @@
+import datetime
+import sqlite3
+import threading
+from collections import defaultdict
+
+
+# =========================================================
+# 🎟️ 토큰 사용량 한도 (학생별 / 반별 하루 예산 + 한 번에 보낼 수 있는 양)
+# =========================================================
+# 보내기 전에 로컬 토크나이저로 센 토큰으로 한도를 확인하고, 답을 받은 뒤 실제 usage를 더한다.
+# 사용량은 메모리에서 세고, 백그라운드 스레드가 flush_interval초마다 SQLite에 모아서 쓴다
+# (다시 시작해도 오늘 사용량이 이어짐). 한도는 0이나 None이면 적용하지 않는다.
+# shared(shared_state 백엔드)를 주면 한도 확인은 모든 프로세스의 합계로 한다
+# (stats()의 반별/학생별 표는 이 프로세스가 센 값).
+
+SHARED_USAGE_TTL = 2 * 24 * 3600
+
+class QuotaExceeded(Exception):
+    def __init__(self, kind, message):
+        super().__init__(message)
+        self.kind = kind  # message / student / class
+
+
+def class_of(student):
+    """'5학년1반 김철수' -> '5학년1반' (띄어쓰기가 없으면 반 구분 없음)"""
+    parts = student.split()
+    return parts[0] if len(parts) > 1 else "-"
+
+
+def _today():
+    return datetime.date.today().isoformat()
+
+
+class TokenQuota:
+    def __init__(self, max_message_tokens=4000, student_daily_tokens=200000, class_daily_tokens=3000000,
+                 store_path=None, flush_interval=10.0, shared=None):
+        self.max_message_tokens = max_message_tokens
+        self.student_daily_tokens = student_daily_tokens
+        self.class_daily_tokens = class_daily_tokens
+        self.flush_interval = flush_interval
+        self._shared = shared
+        self._lock = threading.Lock()
+        self._usage = defaultdict(lambda: [0, 0])  # (날짜, "student"/"class", 이름) -> [프롬프트, 답변]
+        self._dirty = set()
+        self._db = None
+        if store_path:
+            self._db = sqlite3.connect(store_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS token_usage ("
+                " day TEXT, scope TEXT, name TEXT, prompt INTEGER, completion INTEGER, PRIMARY KEY (day, scope, name))"
+            )
+            self._db.commit()
+            for day, scope, name, prompt, completion in self._db.execute(
+                "SELECT day, scope, name, prompt, completion FROM token_usage WHERE day = ?", (_today(),)
+            ):
+                self._usage[(day, scope, name)] = [prompt, completion]
+            self._wake = threading.Event()
+            threading.Thread(target=self._run, name="quota-flush", daemon=True).start()
+
+    def _used(self, scope, name):
+        if self._shared is not None:
+            return self._shared.get(f"quota:{_today()}:{scope}:{name}", 0)
+        with self._lock:
+            prompt, completion = self._usage.get((_today(), scope, name), (0, 0))
+        return prompt + completion
+
+    def check_message(self, message_tokens):
+        """학생이 이번에 보낸 글 하나의 크기 확인"""
+        if self.max_message_tokens and message_tokens > self.max_message_tokens:
+            raise QuotaExceeded(
+                "message",
+                f"한 번에 보내기에는 글이 너무 길어요. (약 {message_tokens:,}토큰 / 최대 {self.max_message_tokens:,}토큰) "
+                "중요한 부분만 남겨서 조금 줄여 다시 보내 줄래요?"
+            )
+
+    def check_budget(self, student, prompt_tokens):
+        """오늘 남은 예산으로 이번 요청(보낼 프롬프트 토큰)을 감당할 수 있는지 확인"""
+        student_used = self._used("student", student)
+        class_used = self._used("class", class_of(student))
+        if self.student_daily_tokens and student_used + prompt_tokens > self.student_daily_tokens:
+            raise QuotaExceeded(
+                "student",
+                "오늘 쓸 수 있는 GPT 사용량을 모두 썼어요. 지금까지 만든 내용을 정리해 보고, 내일 다시 이어서 해요! 😊"
+            )
+        if self.class_daily_tokens and class_used + prompt_tokens > self.class_daily_tokens:
+            raise QuotaExceeded(
+                "class",
+                "우리 반이 오늘 쓸 수 있는 GPT 사용량이 다 찼어요. 선생님께 말씀드려 주세요."
+            )
+
+    def record(self, student, prompt_tokens, completion_tokens):
+        """API가 알려준 실제 사용량을 학생과 반에 더함"""
+        day = _today()
+        with self._lock:
+            for key in ((day, "student", student), (day, "class", class_of(student))):
+                self._usage[key][0] += prompt_tokens
+                self._usage[key][1] += completion_tokens
+                self._dirty.add(key)
+        if self._shared is not None:
+            for scope, name in (("student", student), ("class", class_of(student))):
+                self._shared.incr(f"quota:{day}:{scope}:{name}", prompt_tokens + completion_tokens, ttl=SHARED_USAGE_TTL)
+
+    def remaining(self, student):
+        """학생의 오늘 남은 토큰 (한도가 없으면 None)"""
+        if not self.student_daily_tokens:
+            return None
+        return max(0, self.student_daily_tokens - self._used("student", student))
+
+    def stats(self):
+        """오늘 반별 사용량과 많이 쓴 학생 상위 5명"""
+        day = _today()
+        with self._lock:
+            today = {(scope, name): sum(v) for (d, scope, name), v in self._usage.items() if d == day}
+        students = sorted(((n, t) for (s, n), t in today.items() if s == "student"), key=lambda x: -x[1])
+        return {
+            "반별": {name: total for (scope, name), total in today.items() if scope == "class"},
+            "상위 학생": dict(students[:5]),
+        }
+
+    def flush(self):
+        if self._db is None:
+            return
+        with self._lock:
+            rows = [(day, scope, name, *self._usage[(day, scope, name)]) for day, scope, name in self._dirty]
+            if rows:
+                try:
+                    self._db.executemany("INSERT OR REPLACE INTO token_usage VALUES (?, ?, ?, ?, ?)", rows)
+                    self._db.commit()
+                except sqlite3.Error:
+                    self._db.rollback()
+                    raise  # _dirty를 그대로 두고 다음 주기에 다시 시도
+            self._dirty = set()
+            # 지난 날짜는 메모리에서 정리 (DB에는 남음)
+            for key in [k for k in self._usage if k[0] != _today()]:
+                del self._usage[key]
+
+    def _run(self):
+        while not self._wake.wait(self.flush_interval):
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                print(f"토큰 사용량 기록 실패: {e}")
@@ -0,0 +1,62 @@
+import random
+import time
+
+from openai import RateLimitError, APIConnectionError, InternalServerError
+
+from openai_pool import AllKeysCoolingDown, retry_after_seconds
+
+
+# =========================================================
+# 🔁 재시도 (지수 백오프 + 지터 + Retry-After + 호출 전체 시간 예산)
+# =========================================================
+# 일시적인 429 / 연결 끊김 / 5xx는 정해진 횟수와 시간 안에서 다시 시도한다.
+# 기다릴 시간은 서버가 알려준 Retry-After를 우선 따르고, 없으면 full jitter 백오프.
+
+RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, InternalServerError, AllKeysCoolingDown)
+
+
+class RetryPolicy:
+    def __init__(self, max_attempts=4, base_delay=0.5, max_delay=8.0, deadline=45.0):
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.deadline = deadline  # 첫 시도부터 마지막 시도까지 쓸 수 있는 총 시간(초)
+
+    def delay_for(self, attempt, error):
+        """attempt번째(1부터) 실패 후 기다릴 시간"""
+        if isinstance(error, AllKeysCoolingDown):
+            return error.retry_in
+        if isinstance(error, RateLimitError):
+            hinted = retry_after_seconds(error, default=None)
+            if hinted is not None:
+                return hinted
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+def seconds_left(deadline, floor=1.0):
+    """deadline(time.monotonic() 기준)까지 남은 초. 0초 타임아웃이 되지 않도록 최소 floor초"""
+    return max(floor, deadline - time.monotonic())
+
+
+def call_with_retry(fn, policy, on_retry=None, sleep=time.sleep):
+    """
+    fn(deadline)을 재시도 정책에 따라 실행. 재시도할 수 없는 오류, 횟수 초과,
+    시간 예산 초과면 마지막 오류를 그대로 올린다. on_retry(시도 번호, 대기 초, 오류)는 대기 직전에 호출.
+    deadline은 시간 예산이 끝나는 time.monotonic() 값: fn은 대기열/요청 타임아웃을
+    seconds_left(deadline) 안으로 잡아야 한 번의 시도가 예산을 넘기지 않는다.
+    """
+    start = time.monotonic()
+    deadline = start + policy.deadline
+    attempt = 0
+    while True:
+        attempt += 1
+        try:
+            return fn(deadline)
+        except RETRYABLE_ERRORS as e:
+            delay = policy.delay_for(attempt, e)
+            elapsed = time.monotonic() - start
+            if attempt >= policy.max_attempts or elapsed + delay > policy.deadline:
+                raise
+            if on_retry is not None:
+                on_retry(attempt, delay, e)
+            sleep(delay)
@@ -0,0 +1,120 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+# =========================================================
+# 🗃️ 단발성 GPT 호출 응답 캐시 (세션 간 공유)
+# =========================================================
+# (모델, 정규화된 메시지, 프롬프트 버전)으로 키를 만들고 LRU + TTL로 관리한다.
+# sqlite_path를 주면 디스크에도 저장해서 서버를 재시작해도 캐시가 살아 있다.
+# shared(shared_state 백엔드)를 주면 다른 프로세스가 받아 둔 응답도 함께 쓴다.
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_messages(messages):
+    """공백/줄바꿈 차이는 같은 요청으로 본다"""
+    return [{"role": m["role"], "content": _WHITESPACE.sub(" ", m["content"]).strip()} for m in messages]
+
+
+def prompt_version(messages):
+    """시스템 프롬프트 내용 해시 (프롬프트를 고치면 기존 캐시는 자동으로 무효)"""
+    system = next((m["content"] for m in messages if m["role"] == "system"), "")
+    return hashlib.sha256(system.encode("utf-8")).hexdigest()[:12]
+
+
+def cache_key(model, messages, version=None):
+    body = json.dumps(
+        {"model": model, "version": version or prompt_version(messages), "messages": normalize_messages(messages)},
+        ensure_ascii=False, sort_keys=True
+    )
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, max_entries=256, ttl_seconds=24 * 3600, sqlite_path=None, shared=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._shared = shared
+        self._entries = OrderedDict()  # key -> (저장 시각, 응답)
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+        self._db = None
+        if sqlite_path:
+            self._db = sqlite3.connect(sqlite_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS response_cache (key TEXT PRIMARY KEY, created REAL, content TEXT)"
+            )
+            self._db.commit()
+
+    def get(self, key):
+        """캐시된 응답 또는 None"""
+        now = time.time()
+        shared_entry = None
+        if self._shared is not None:
+            with self._lock:
+                local = key in self._entries
+            if not local:
+                shared_entry = self._shared.get(f"cache:{key}")  # [저장 시각, 응답]
+        with self._lock:
+            if shared_entry is not None and key not in self._entries:
+                self._remember(key, tuple(shared_entry))
+            entry = self._entries.get(key)
+            if entry is None and self._db is not None:
+                row = self._db.execute(
+                    "SELECT created, content FROM response_cache WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    entry = row
+                    self._remember(key, entry)
+            if entry is None or now - entry[0] > self.ttl_seconds:
+                if entry is not None:
+                    self._forget(key)
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[1]
+
+    def put(self, key, content):
+        entry = (time.time(), content)
+        if self._shared is not None:
+            self._shared.set(f"cache:{key}", entry, ttl=self.ttl_seconds)
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO response_cache VALUES (?, ?, ?)", (key, *entry))
+                self._db.execute(
+                    "DELETE FROM response_cache WHERE created < ?", (entry[0] - self.ttl_seconds,)
+                )
+                self._db.commit()
+
+    def stats(self):
+        with self._lock:
+            total = self._hits + self._misses
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": round(self._hits / total, 3) if total else 0.0,
+                "entries": len(self._entries),
+            }
+
+    # --- 내부 동작 (lock을 잡은 상태에서 호출) ---
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _forget(self, key):
+        self._entries.pop(key, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM response_cache WHERE key = ?", (key,))
+            self._db.commit()
@@ -0,0 +1,45 @@
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+
+# =========================================================
+# 🎞️ 장면별 영상 프롬프트 일괄 초안
+# =========================================================
+# '이야기 나누기' 결과의 **[장면 번호]** 줄을 장면 목록으로 바꾸고,
+# 모든 장면의 첫 초안을 제한된 스레드 풀에서 동시에 만든다.
+# draft_fn은 스크립트 밖(작업 스레드)에서 실행되므로 st.* 를 호출하면 안 된다.
+
+SCENE_LINE = re.compile(r"^\s*\*\*\[(?:장면\s*)?(\d+)\]\*\*\s*[:：]?\s*(.+?)\s*$")
+
+
+def parse_scenes(text):
+    """장면 나누기 답변에서 [{"scene": 번호, "summary": 요약, "content": 원본 내용}] 목록을 만든다"""
+    scenes = []
+    for line in (text or "").splitlines():
+        match = SCENE_LINE.match(line)
+        if not match:
+            continue
+        summary, _, content = match.group(2).partition(" - ")
+        scenes.append({"scene": int(match.group(1)), "summary": summary.strip(), "content": content.strip()})
+    return scenes
+
+
+def draft_all(scenes, draft_fn, max_workers=4, on_done=None):
+    """
+    장면마다 draft_fn(scene) -> 초안을 동시에 실행하고 장면 순서대로 결과 반환.
+    실패한 장면은 error에 예외를 담고 나머지는 계속 진행. on_done(완료 수, 전체 수)는 호출한 스레드에서 불림.
+    """
+    results = [{"scene": s, "reply": None, "error": None} for s in scenes]
+    if not scenes:
+        return results
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(scenes))), thread_name_prefix="scene-draft") as executor:
+        futures = {executor.submit(draft_fn, s): i for i, s in enumerate(scenes)}
+        for done, future in enumerate(as_completed(futures), start=1):
+            i = futures[future]
+            try:
+                results[i]["reply"] = future.result()
+            except Exception as e:
+                results[i]["error"] = e
+            if on_done is not None:
+                on_done(done, len(scenes))
+    return results
@@ -0,0 +1,188 @@
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+
+
+# =========================================================
+# 🚦 요청 스케줄러 (동시 실행 상한 + 토큰 버킷 + 학생별 공정 순서)
+# =========================================================
+# 모든 세션의 GPT/이미지 호출이 이 스케줄러를 거친다. 레인(chat/image)마다
+# 동시에 실행할 수 있는 요청 수와 분당 요청 수(토큰 버킷)를 제한하고,
+# 대기열은 학생별 라운드로 정렬해서 한 학생이 연달아 누른 요청이 다른 학생을 밀어내지 않게 한다.
+# shared(shared_state 백엔드)를 주면 분당 요청 토큰은 모든 프로세스가 한 버킷을 함께 쓰고,
+# 동시 실행 수와 대기열은 프로세스마다 따로 관리한다.
+
+class SchedulerBusy(Exception):
+    """대기 시간 안에 차례가 오지 않음"""
+
+
+class TokenBucket:
+    remote = False
+
+    def __init__(self, rate_per_minute, burst):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self):
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def seconds_until_token(self):
+        self._refill()
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+
+class SharedTokenBucket:
+    """TokenBucket과 같은 사용법이지만 토큰을 shared_state 백엔드에 보관 (여러 프로세스 공용)"""
+    remote = True  # try_take가 SQLite 잠금/Redis 왕복을 기다리므로 스케줄러 lock 밖에서 부름
+
+    def __init__(self, shared, key, rate_per_minute, burst):
+        self.shared = shared
+        self.key = key
+        self.rate = rate_per_minute / 60.0
+        self.capacity = max(1, burst)
+        self._wait = 0.0
+
+    def try_take(self):
+        ok, self._wait = self.shared.take_token(self.key, self.rate, self.capacity)
+        return ok
+
+    def seconds_until_token(self):
+        return self._wait  # 마지막 try_take 기준 (다른 프로세스가 먼저 가져가면 다시 기다림)
+
+
+class Ticket:
+    def __init__(self, student, seq, round_):
+        self.student = student
+        self.seq = seq
+        self.round = round_
+
+    def sort_key(self):
+        return (self.round, self.seq)
+
+
+class Lane:
+    def __init__(self, name, max_concurrency, rate_per_minute, burst=None, shared=None):
+        self.name = name
+        self.max_concurrency = max_concurrency
+        if shared is not None:
+            self.bucket = SharedTokenBucket(shared, f"bucket:{name}", rate_per_minute, burst or max_concurrency)
+        else:
+            self.bucket = TokenBucket(rate_per_minute, burst or max_concurrency)
+        self.running = 0
+        self.waiting = []
+        self.taking = False     # 공유 버킷에서 토큰을 가져오는 중 (한 번에 한 스레드만)
+        self.spare_tokens = 0   # 가져왔지만 그 사이 차례를 놓쳐 다음 차례에게 넘길 토큰
+        self.rounds = {}  # 학생별 다음 라운드 번호 (대기/실행 중인 요청 수)
+        self.completed = 0
+        self.timed_out = 0
+
+
+class RequestScheduler:
+    def __init__(self, lanes, shared=None):
+        """lanes: {이름: {"max_concurrency": n, "rate_per_minute": r, "burst": b}}"""
+        self._cond = threading.Condition()
+        self._seq = itertools.count()
+        self._lanes = {name: Lane(name, shared=shared, **config) for name, config in lanes.items()}
+
+    @contextmanager
+    def slot(self, lane_name, student, timeout=60.0, on_wait=None):
+        """
+        차례가 올 때까지 기다렸다가 실행 슬롯을 잡는다.
+        on_wait(앞에 남은 요청 수)는 대기 순번이 바뀔 때마다 호출 (UI 안내용).
+        """
+        lane = self._lanes[lane_name]
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            round_ = lane.rounds.get(student, 0)
+            lane.rounds[student] = round_ + 1
+            ticket = Ticket(student, next(self._seq), round_)
+            lane.waiting.append(ticket)
+            try:
+                self._wait_for_turn(lane, ticket, deadline, on_wait)
+            except SchedulerBusy:
+                lane.waiting.remove(ticket)
+                self._finish(lane, student)
+                lane.timed_out += 1
+                self._cond.notify_all()
+                raise
+        try:
+            yield
+        finally:
+            with self._cond:
+                lane.running -= 1
+                lane.completed += 1
+                self._finish(lane, student)
+                self._cond.notify_all()
+
+    def _wait_for_turn(self, lane, ticket, deadline, on_wait):
+        last_position = None
+        while True:
+            lane.waiting.sort(key=Ticket.sort_key)
+            position = lane.waiting.index(ticket)
+            if position == 0 and lane.running < lane.max_concurrency and self._take_token(lane):
+                # 공유 버킷이면 lock을 놓고 토큰을 가져왔으므로 순번과 빈 슬롯을 다시 확인
+                lane.waiting.sort(key=Ticket.sort_key)
+                if lane.waiting[0] is ticket and lane.running < lane.max_concurrency:
+                    lane.waiting.pop(0)
+                    lane.running += 1
+                    self._cond.notify_all()
+                    return
+                lane.spare_tokens += 1
+                self._cond.notify_all()
+                continue
+            if on_wait is not None and position != last_position:
+                on_wait(position)
+                last_position = position
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise SchedulerBusy(f"{lane.name} 요청이 너무 많아 차례를 기다리지 못했어요.")
+            # 토큰이 다시 생길 시점이나 다른 요청이 끝날 때 깨어난다
+            wake = lane.bucket.seconds_until_token() if position == 0 else remaining
+            self._cond.wait(timeout=min(max(wake, 0.05), remaining, 1.0))
+
+    def _take_token(self, lane):
+        """(self._cond를 잡은 상태) 레인 버킷에서 토큰 하나를 가져옴. 공유 버킷은 lock을 잠깐 놓고 가져온다"""
+        if lane.spare_tokens:
+            lane.spare_tokens -= 1
+            return True
+        if not lane.bucket.remote:
+            return lane.bucket.try_take()
+        if lane.taking:
+            return False  # 다른 스레드가 가져오는 중이면 끝날 때 깨어나서 다시 봄
+        lane.taking = True
+        self._cond.release()  # 다른 레인과 슬롯 반납이 이 왕복을 기다리지 않게
+        try:
+            return lane.bucket.try_take()
+        finally:
+            self._cond.acquire()
+            lane.taking = False
+            self._cond.notify_all()
+
+    def _finish(self, lane, student):
+        lane.rounds[student] -= 1
+        if lane.rounds[student] <= 0:
+            del lane.rounds[student]
+
+    def stats(self):
+        with self._cond:
+            return {
+                name: {
+                    "running": lane.running,
+                    "waiting": len(lane.waiting),
+                    "completed": lane.completed,
+                    "timed_out": lane.timed_out,
+                }
+                for name, lane in self._lanes.items()
+            }
@@ -0,0 +1,186 @@
+import time
+
+import streamlit as st
+
+from app_core import (
+    chat_turn, collect_image_jobs, get_blob_store, get_gallery, image_tier, poll_image_jobs, render_chat_history,
+    start_image_job,
+)
+import prompts
+import final_prompts
+
+
+# =========================================================
+# 3. 캐릭터/배경 이미지 생성
+# =========================================================
+
+def render():
+    st.header("3. 캐릭터/배경 이미지 생성")
+    st.markdown("🎨 **목표:** 여러분의 이야기에 등장하는 캐릭터나 배경 이미지를 직접 만들어 볼 수 있어요.")
+
+    # 세션 상태 초기화 또는 로드 (프롬프트가 바뀌면 ID도 바뀌므로 ID만 비교)
+    if "messages_image_generation" not in st.session_state or \
+       prompts.prompt_id_of(st.session_state.messages_image_generation) != prompts.IMAGE_GENERATION:
+        st.session_state.messages_image_generation = [
+            prompts.system_message(prompts.IMAGE_GENERATION)
+        ]
+        st.session_state.image_prompt_collected = False
+        st.session_state.generated_image_id = None
+        st.session_state.image_input_submitted = False
+        st.session_state.final_dalle_prompt = "" # 최종 DALL-E 프롬프트 저장용
+        st.session_state.image_final_prompt = None # submit_image_prompt로 받은 ImagePrompt
+        st.session_state.image_generation_disabled = False
+        st.session_state.image_generation_disable_until = 0
+        st.session_state.image_jobs = []
+        st.session_state.image_drafts = []  # 초안 미리보기 묶음 [{prompt, korean, image_keys}]
+
+    # 캐릭터/배경 선택 라디오 버튼
+    image_type = st.radio("어떤 이미지를 만들고 싶나요?", ["캐릭터 이미지", "배경 이미지"], key="image_type_radio")
+    
+    # 초기 프롬프트 입력창 (첫 제출 전까지 보임)
+    if not st.session_state.image_input_submitted:
+        initial_prompt = st.text_area(f"{image_type}에 대해 설명해주세요. (예: '용감한 기사', '신비로운 숲')", key="initial_image_prompt")
+        if st.button("프롬프트 구체화 시작") and initial_prompt:
+            if chat_turn(st.session_state.messages_image_generation, initial_prompt, tools=[final_prompts.IMAGE_PROMPT_TOOL]):
+                st.session_state.image_input_submitted = True # 스토리 제출 시 이 플래그를 True로 설정
+                st.rerun() # 플래그 변경 후 페이지를 새로고침하여 채팅 UI를 표시
+        if not st.session_state.image_input_submitted and initial_prompt:
+              st.info("⬆️ '프롬프트 구체화 시작' 버튼을 눌러 GPT와 대화를 시작하세요!")
+
+
+    # 대화 기록 표시
+    render_chat_history(st.session_state.messages_image_generation, "image_generation")
+
+    # 지속적인 채팅 입력창 (초기 프롬프트 제출 후 보임)
+    if st.session_state.image_input_submitted:
+        if current_prompt := st.chat_input("GPT의 질문에 답하거나 설명을 추가해주세요."):
+            if chat_turn(st.session_state.messages_image_generation, current_prompt, tools=[final_prompts.IMAGE_PROMPT_TOOL]):
+                st.rerun()
+
+        # GPT가 submit_image_prompt 함수로 최종 프롬프트를 보냈으면 (chat_turn이 final_prompt로 보관) 수집.
+        # 초안을 보고 대화로 고쳐 달라고 해서 새 프롬프트가 오면 그것으로 바꿈
+        last_message = st.session_state.messages_image_generation[-1]
+        final_prompt = last_message.get("final_prompt") if last_message["role"] == "assistant" else None
+        if isinstance(final_prompt, final_prompts.ImagePrompt) and \
+           final_prompt.english_prompt != st.session_state.get("final_dalle_prompt"):
+            st.session_state.image_prompt_collected = True
+            st.session_state.image_final_prompt = final_prompt
+            st.session_state.final_dalle_prompt = final_prompt.english_prompt # DALL-E 모델에 전달할 영어 프롬프트
+            st.session_state.korean_dalle_prompt_display = final_prompt.korean_translation # 사용자에게 보여줄 한국어 번역
+
+            st.info(f"✨ GPT가 최종 이미지 프롬프트를 완성했어요 (DALL-E용): `{final_prompt.english_prompt}`")
+            st.success(f"💡 **[한국어 번역]** : {final_prompt.korean_translation}")
+
+    # 최종 프롬프트가 수집되었을 때 이미지 생성 버튼 및 이미지 표시
+    if st.session_state.get("image_prompt_collected", False):
+        # 버튼 활성화 여부 확인
+        is_button_disabled = st.session_state.get("image_generation_disabled", False)
+        if is_button_disabled:
+            # 비활성화 시간 확인
+            remaining_time = int(st.session_state.get("image_generation_disable_until", 0) - time.time())
+            if remaining_time > 0:
+                st.warning(f"⏰ 이미지 생성은 {remaining_time}초 후에 다시 가능합니다. 잠시 기다려주세요.")
+                # 버튼을 비활성화 상태로 렌더링
+                st.button("이미지 생성 중 (잠시 기다려주세요)", disabled=True) 
+            else:
+                # 시간 만료, 버튼 다시 활성화
+                st.session_state.image_generation_disabled = False
+                is_button_disabled = False # 버튼 상태 업데이트
+
+        # 똑같은 프롬프트로 만든 이미지가 갤러리에 있으면 새로 만들기 전에 먼저 권함
+        stored_image_id = get_gallery().find_by_prompt(st.session_state.final_dalle_prompt, st.session_state["student_name"]) \
+            if st.session_state.get("final_dalle_prompt") else None
+        if stored_image_id and stored_image_id != st.session_state.generated_image_id:
+            st.info("📁 이 프롬프트로 만든 이미지가 이미 저장되어 있어요. 기다림 없이 바로 불러올 수 있어요!")
+            if st.button("저장된 이미지 불러오기"):
+                get_gallery().add(st.session_state["student_name"], st.session_state.final_dalle_prompt, stored_image_id, image_type)
+                st.session_state.generated_image_id = stored_image_id
+                st.rerun()
+
+        # 버튼이 활성화된 경우에만 클릭 가능하도록
+        if not is_button_disabled:
+            # 빠른 초안으로 여러 번 고쳐 본 뒤, 마음에 드는 프롬프트만 최종 이미지로 만듦
+            col_draft, col_final = st.columns(2)
+            with col_draft:
+                draft_clicked = st.button(f"🧪 빠른 초안 {image_tier('draft')['n']}장 보기", use_container_width=True)
+            with col_final:
+                final_clicked = st.button("이 프롬프트로 이미지 생성하기", use_container_width=True)
+            if draft_clicked or final_clicked:
+                if st.session_state.get("final_dalle_prompt"):
+                    start_image_job(st.session_state.final_dalle_prompt, image_type, tier="draft" if draft_clicked else "final")
+                else:
+                    st.warning("먼저 GPT로부터 완성된 이미지 프롬프트를 받아야 합니다.")
+
+        # 백그라운드 이미지 작업: 끝난 것은 가져오고, 남은 것은 폴링
+        collect_image_jobs()
+        if st.session_state.get("image_jobs"):
+            poll_image_jobs()
+
+        # 초안 미리보기: 가장 최근 묶음만 펼치고 이전 묶음은 접어 둠
+        # 초안은 갤러리에 넣지 않아 저장소 정리 때 먼저 지워지므로, 없어진 이미지는 빼고 다 없어진 묶음은 버림
+        drafts, pruned = [], False
+        for draft in st.session_state.get("image_drafts") or []:
+            found = [(key, get_blob_store().thumbnail(key, max_side=256)) for key in draft["image_keys"]]
+            found = [(key, thumb) for key, thumb in found if thumb is not None]
+            if len(found) != len(draft["image_keys"]):
+                pruned = True
+                draft = {**draft, "image_keys": [key for key, _ in found]}
+            if found:
+                drafts.append((draft, [thumb for _, thumb in found]))
+        if pruned:
+            st.session_state.image_drafts = [draft for draft, _ in drafts]
+        for index in reversed(range(len(drafts))):
+            draft, thumbnails = drafts[index]
+            latest = index == len(drafts) - 1
+            with st.expander(f"🧪 초안 {index + 1}: {draft['korean'] or draft['prompt']}", expanded=latest):
+                columns = st.columns(len(thumbnails))
+                for column, thumb in zip(columns, thumbnails):
+                    with column:
+                        st.image(thumb)
+                if not is_button_disabled and st.button("이 초안의 프롬프트로 최종 이미지 만들기", key=f"finalize_draft_{index}"):
+                    st.session_state.korean_dalle_prompt_display = draft["korean"]
+                    start_image_job(draft["prompt"], image_type)
+                    st.rerun()
+
+    # 생성된(또는 갤러리에서 불러온) 이미지가 있으면 화면에 표시하고 다운로드 버튼 제공
+    # 저장소의 원본 PNG 바이트를 그대로 내려주고, 화면에는 작은 썸네일만 보냄 (리런마다 재인코딩 없음)
+    byte_im = get_blob_store().get(st.session_state.generated_image_id) if st.session_state.generated_image_id else None
+    if byte_im:
+        st.image(get_blob_store().thumbnail(st.session_state.generated_image_id), caption=f"생성된 {image_type} (프롬프트: {st.session_state.get('korean_dalle_prompt_display', '')})", use_container_width=True)
+        st.download_button(
+            label="이미지 다운로드",
+            data=byte_im,
+            file_name=f"{image_type}_generated.png",
+            mime="image/png"
+        )
+
+    # 대화 초기화 버튼
+    if st.button("이미지 생성 초기화", key="reset_image_generation_chat"):
+        st.session_state.messages_image_generation = [
+            prompts.system_message(prompts.IMAGE_GENERATION) 
+        ]
+        st.session_state.image_prompt_collected = False
+        st.session_state.generated_image_id = None
+        st.session_state.image_input_submitted = False
+        st.session_state.final_dalle_prompt = ""
+        st.session_state.image_final_prompt = None
+        st.session_state.image_generation_disabled = False 
+        st.session_state.image_generation_disable_until = 0 
+        st.session_state.image_jobs = []  # 아직 진행 중인 작업 결과는 버림 (완료되면 갤러리에는 남음)
+        st.session_state.image_drafts = []
+        st.rerun()
+
+    # 내가 만든 이미지 모아 보기 (초기화해도 남아 있음)
+    gallery_items = get_gallery().list(st.session_state["student_name"])
+    if gallery_items:
+        with st.expander(f"🖼️ 내 이미지 갤러리 ({len(gallery_items)}장)"):
+            columns = st.columns(4)
+            for i, item in enumerate(gallery_items):
+                thumb = get_blob_store().thumbnail(item["image_key"], max_side=256)
+                if thumb is None:  # 목록을 읽은 뒤 저장소 정리로 지워진 이미지
+                    continue
+                with columns[i % 4]:
+                    st.image(thumb, caption=item["kind"] or None)
+                    if st.button("불러오기", key=f"gallery_load_{item['image_key']}_{i}"):
+                        st.session_state.generated_image_id = item["image_key"]
+                        st.rerun()
@@ -0,0 +1,48 @@
+import streamlit as st
+
+from app_core import (
+    get_client_pool, get_inflight, get_interaction_log, get_log_shipper, get_metrics, get_quota,
+    get_response_cache, get_scheduler, get_shared_state,
+)
+
+
+# =========================================================
+# 5. 운영 대시보드 (선생님용)
+# =========================================================
+
+def render():
+    st.header("5. 운영 대시보드")
+    dashboard_password = st.secrets.get("dashboard_password")
+    if not dashboard_password:
+        st.warning("Secrets에 dashboard_password가 설정되어 있지 않아 대시보드를 열 수 없어요.")
+    elif not st.session_state.get("dashboard_unlocked"):
+        with st.form("dashboard_login"):
+            password_input = st.text_input("선생님 비밀번호", type="password")
+            if st.form_submit_button("열기"):
+                if password_input == dashboard_password:
+                    st.session_state.dashboard_unlocked = True
+                    st.rerun()
+                else:
+                    st.error("비밀번호가 맞지 않아요.")
+    else:
+        from dashboard import render_dashboard, render_usage_analytics
+
+        live_tab, usage_tab = st.tabs(["실시간 상태", "사용 기록 분석"])
+
+        @st.fragment(run_every=10)
+        def live_dashboard():
+            render_dashboard(get_metrics(), {
+                "API 키 상태": get_client_pool().stats(),
+                "공유 상태 저장소": get_shared_state().describe(),
+                "요청 스케줄러": get_scheduler().stats(),
+                "응답 캐시": get_response_cache().stats(),
+                "진행 중 요청 합치기": get_inflight().stats(),
+                "토큰 사용량 (오늘)": get_quota().stats(),
+                "시트 로그 전송": get_log_shipper().stats(),
+                "상호작용 기록": get_interaction_log().stats()
+            })
+
+        with live_tab:
+            live_dashboard()
+        with usage_tab:
+            render_usage_analytics(get_interaction_log())
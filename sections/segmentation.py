@@ -0,0 +1,51 @@
+import streamlit as st
+
+from app_core import ask_gpt, get_response_cache, render_chat_history
+import prompts
+
+
+# =========================================================
+# 2. 이야기 나누기 (장면 분할)
+# =========================================================
+
+def render():
+    st.header("2. 이야기 나누기")
+    st.markdown("📝 **목표:** 여러분의 이야기를 영상 제작을 위한 여러 장면으로 나누어 보세요. 각 장면은 어떤 내용으로 구성될까요?")
+
+    if "segmented_story_input" not in st.session_state:
+        st.session_state.segmented_story_input = ""
+    if "messages_segmentation" not in st.session_state:
+        st.session_state.messages_segmentation = [
+            prompts.system_message(prompts.SEGMENTATION)
+        ]
+    if "segmentation_completed" not in st.session_state:
+        st.session_state.segmentation_completed = False
+
+    story_for_segmentation = st.text_area("점검이 완료된 이야기를 여기에 붙여넣어 주세요.", value=st.session_state.segmented_story_input, key="segment_input_area")
+
+    if st.button("이야기 장면 나누기 시작") and story_for_segmentation:
+        st.session_state.segmented_story_input = story_for_segmentation
+        with st.chat_message("user"):
+            st.markdown(story_for_segmentation)
+        with st.chat_message("assistant"):
+            # 장면 나누기는 이전 결과와 무관한 단발성 요청: 시스템 프롬프트 + 이야기만 보내고 캐시 사용
+            single_shot = [st.session_state.messages_segmentation[0], {"role": "user", "content": story_for_segmentation}]
+            gpt_response = ask_gpt(single_shot, stream=True, cache=True, final=True)
+        if gpt_response is not None:
+            st.session_state.messages_segmentation.append({"role": "user", "content": story_for_segmentation})
+            st.session_state.messages_segmentation.append({"role": "assistant", "content": gpt_response})
+            st.rerun()
+
+    cache_stats = get_response_cache().stats()
+    if cache_stats["hits"] + cache_stats["misses"]:
+        st.caption(f"⚡ 응답 캐시: 적중 {cache_stats['hits']}회 / 미적중 {cache_stats['misses']}회 (적중률 {cache_stats['hit_rate']:.0%})")
+
+    render_chat_history(st.session_state.messages_segmentation, "segmentation")
+
+    if st.button("장면 나누기 초기화", key="reset_segmentation_chat"):
+        st.session_state.messages_segmentation = [
+            prompts.system_message(prompts.SEGMENTATION)
+        ]
+        st.session_state.segmented_story_input = ""
+        st.session_state.segmentation_completed = False
+        st.rerun()
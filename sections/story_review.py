@@ -0,0 +1,48 @@
+import streamlit as st
+
+from app_core import chat_turn, render_chat_history
+import prompts
+
+
+# =========================================================
+# 1. 이야기 점검하기
+# =========================================================
+
+def render():
+    st.header("1. 이야기 점검하기")
+    st.markdown("💬 **목표:** 여러분의 이야기가 영상으로 만들기에 적절한지 GPT와 함께 대화하며 점검하고 다듬어 보세요.")
+
+    # 이야기 점검하기의 시스템 프롬프트 (prompts.py에 정의, 세션에는 ID만 보관)
+    if "messages_story_review" not in st.session_state:
+        st.session_state.messages_story_review = [
+            prompts.system_message(prompts.STORY_REVIEW)
+        ]
+        # story_input_submitted가 없으면 초기 입력창만 보이고 채팅은 안 보임
+        if "story_input_submitted" not in st.session_state:
+            st.session_state.story_input_submitted = False
+
+    # Display chat messages from history (최근 턴만 펼쳐서)
+    render_chat_history(st.session_state.messages_story_review, "story_review")
+
+    # Initial story input area
+    if not st.session_state.story_input_submitted:
+        story = st.text_area("여러분이 창작한 이야기를 입력하세요.", key="initial_story_input")
+        if st.button("이야기 점검 시작") and story:
+            # Get initial GPT response
+            if chat_turn(st.session_state.messages_story_review, story):
+                st.session_state.story_input_submitted = True # 스토리 제출 시 이 플래그를 True로 설정
+                st.rerun() # 플래그 변경 후 페이지를 새로고침하여 채팅 UI를 표시
+
+    # Chat input for ongoing conversation (only visible after initial story submission)
+    if st.session_state.story_input_submitted: # story_input_submitted가 True일 때만 채팅창 표시
+        if prompt := st.chat_input("GPT에게 답변하거나 추가 질문을 해보세요."):
+            if chat_turn(st.session_state.messages_story_review, prompt):
+                st.rerun()
+
+    # Optional: A button to reset the conversation
+    if st.session_state.story_input_submitted and st.button("대화 초기화", key="reset_story_review_chat"):
+        st.session_state.messages_story_review = [
+            prompts.system_message(prompts.STORY_REVIEW)
+        ]
+        st.session_state.story_input_submitted = False
+        st.rerun()
@@ -0,0 +1,135 @@
+import streamlit as st
+import pandas as pd
+
+from app_core import chat_turn, draft_all_scenes, render_chat_history
+import prompts
+import final_prompts
+import scene_batch
+
+
+# =========================================================
+# 4. 장면별 영상 Prompt 점검
+# =========================================================
+
+def render():
+    st.header("4. 장면별 영상 Prompt 점검")
+    st.markdown("🎬 **목표:** 각 장면에 맞는 Pika 영상 프롬프트를 만들고, 더 좋은 프롬프트로 다듬어 보세요.")
+
+    st.warning("이 기능은 '2. 이야기 나누기'에서 장면 구분이 완료된 후에 사용하는 것이 좋습니다.")
+
+    # --- ✨ Pika 버전 선택 기능 (4번 섹션 내) ✨ ---
+    st.subheader("어떤 Pika 버전을 위한 프롬프트를 만드시겠어요?")
+    pika_version = st.radio(
+        "Pika 2.1은 간단한 애니메이션에, Pika 2.2는 영화 같은 영상에 적합해요.",
+        ["Pika 2.1 (간단한 애니메이션)", "Pika 2.2 (영화 같은 영상)"],
+        key="pika_version_selector_section_4" # 섹션별 고유 키 사용
+    )
+    st.info(f"선택: **{pika_version}** 버전에 맞춰 프롬프트를 도와드릴게요!")
+    st.markdown("---")
+    # --- Pika 버전 선택 기능 끝 ---
+
+    # 선택된 Pika 버전에 따라 현재 시스템 프롬프트 ID 설정
+    if pika_version == "Pika 2.1 (간단한 애니메이션)":
+        current_system_prompt = prompts.PIKA_2_1
+    else: # "Pika 2.2 (영화 같은 영상)"
+        current_system_prompt = prompts.PIKA_2_2
+
+    # 버전별 대화를 따로 보관: 버전을 바꿨다 돌아와도 기록(과 프롬프트 캐시 접두부)이 그대로 유지됨
+    video_histories = st.session_state.setdefault("video_prompt_histories", {})
+    if current_system_prompt not in video_histories:
+        video_histories[current_system_prompt] = [prompts.system_message(current_system_prompt)]
+    st.session_state.messages_video_prompt = video_histories[current_system_prompt]
+    st.session_state.setdefault("current_scene_prompt", "")
+    st.session_state.setdefault("video_prompt_finalized", False)
+
+    # --- 모든 장면 일괄 초안 (2번 장면 나누기 결과 사용) ---
+    segmentation_reply = next(
+        (m["content"] for m in reversed(st.session_state.get("messages_segmentation", [])) if m["role"] == "assistant"), ""
+    )
+    scenes = scene_batch.parse_scenes(segmentation_reply)
+    scene_drafts = st.session_state.setdefault("scene_drafts", {})  # Pika 버전(프롬프트 ID)별 장면 표
+    with st.expander("📋 모든 장면의 프롬프트 초안 한 번에 만들기", expanded=current_system_prompt in scene_drafts):
+        if not scenes:
+            st.info("'2. 이야기 나누기'에서 장면을 나누면, 모든 장면의 초안을 한 번에 만들 수 있어요.")
+        else:
+            st.caption(f"나눈 장면 {len(scenes)}개의 첫 번째 초안을 동시에 만들어요. 표에서 바로 고칠 수 있어요.")
+            if st.button("모든 장면 초안 만들기", key="draft_all_scenes"):
+                rows = draft_all_scenes(scenes, current_system_prompt)
+                if rows is not None:
+                    scene_drafts[current_system_prompt] = rows
+                    st.rerun()
+            if current_system_prompt in scene_drafts:
+                edited = st.data_editor(
+                    pd.DataFrame(scene_drafts[current_system_prompt]),
+                    key=f"scene_draft_editor_{current_system_prompt}",
+                    disabled=["장면", "상태"],
+                    hide_index=True,
+                    use_container_width=True
+                )
+                scene_drafts[current_system_prompt] = edited.to_dict("records")  # 고친 내용을 다음 리런에도 유지
+                st.download_button(
+                    "장면별 프롬프트 내려받기 (CSV)",
+                    data=edited.to_csv(index=False).encode("utf-8-sig"),
+                    file_name="scene_prompts.csv",
+                    mime="text/csv"
+                )
+    st.markdown("---")
+
+
+    # --- 입력 칸 구분 명확화 코드 시작 ---
+    st.subheader("1단계: 이 장면은 어떤 내용인가요?")
+    scene_summary = st.text_input(
+        "**이 장면을 한 문장으로 요약해주세요.** (예: 주인공이 마법의 숲에 도착하는 장면)", 
+        key="scene_summary_input",
+        placeholder="예: 주인공이 마법의 숲에 도착하는 장면"
+    )
+
+    st.subheader("2단계: 영상 프롬프트 초안을 작성해주세요.")
+    user_prompt_draft = st.text_area(
+        "**이 장면을 Pika AI 영상으로 만들려면 어떻게 표현할까요?** (구체적으로 작성해보세요!)", 
+        key="video_prompt_draft_input", 
+        value=st.session_state.current_scene_prompt,
+        placeholder="예: 소녀가 신비로운 숲길을 걷는 모습. 나뭇잎 사이로 햇살이 비치고 작은 요정들이 주변을 날아다님."
+    )
+    # --- 입력 칸 구분 명확화 코드 끝 ---
+
+    if st.button("프롬프트 점검 시작") and scene_summary and user_prompt_draft:
+        st.session_state.current_scene_prompt = user_prompt_draft
+        full_user_message = f"장면 요약: {scene_summary}\n프롬프트 초안: {user_prompt_draft}"
+        if chat_turn(st.session_state.messages_video_prompt, full_user_message, tools=[final_prompts.PIKA_PROMPT_TOOL]):
+            st.rerun()
+
+    render_chat_history(st.session_state.messages_video_prompt, f"video_prompt_{current_system_prompt}")
+
+    # video_prompt_finalized가 True가 될 때까지 채팅 입력 필드 표시
+    if not st.session_state.video_prompt_finalized:
+        if prompt := st.chat_input("GPT의 제안에 대해 이야기하거나 프롬프트를 수정해주세요. (예: '주인공이 좀 더 신났으면 좋겠어요', '배경이 더 밝았으면 좋겠어요')"):
+            if chat_turn(st.session_state.messages_video_prompt, prompt, tools=[final_prompts.PIKA_PROMPT_TOOL]):
+                st.rerun()
+
+        # GPT가 submit_pika_prompt 함수로 최종 프롬프트를 보냈는지 확인 (chat_turn이 final_prompt로 보관)
+        last_message = st.session_state.messages_video_prompt[-1]
+        final_prompt = last_message.get("final_prompt") if last_message["role"] == "assistant" else None
+        if isinstance(final_prompt, final_prompts.PikaPrompt):
+            st.session_state.setdefault("video_final_prompts", {})[current_system_prompt] = final_prompt
+
+            st.success("✅ GPT가 새로운 프롬프트 초안을 제안했어요! 마음에 드나요?")
+            st.markdown("---") 
+
+            st.subheader("💡 완성된 영상 프롬프트")
+            st.write(f"**한국어:** {final_prompt.korean_prompt}")
+            st.markdown(f"**Pika AI용 영어:** ```{final_prompt.command()}```") # 코드 블록으로 강조
+
+            st.markdown("---") 
+            st.info(f"👍 {final_prompt.encouragement}")
+            st.markdown("---")
+            st.markdown("⬆️ 이 프롬프트가 마음에 든다면 **'장면 완성!'** 이라고 말해주세요. 혹시 수정하고 싶은 부분이 있다면 어떤 점이 마음에 들지 않는지 구체적으로 설명해주세요.")
+
+
+    if st.button("프롬프트 점검 초기화", key="reset_video_prompt_chat"):
+        # 초기화 시, 현재 선택된 Pika 버전의 대화만 시스템 프롬프트부터 다시 시작
+        video_histories[current_system_prompt] = [prompts.system_message(current_system_prompt)]
+        st.session_state.get("video_final_prompts", {}).pop(current_system_prompt, None)
+        st.session_state.current_scene_prompt = ""
+        st.session_state.video_prompt_finalized = False 
+        st.rerun()
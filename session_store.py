@@ -0,0 +1,104 @@
+import json
+import sqlite3
+import threading
+import time
+
+
+# =========================================================
+# 💾 학생별 세션 상태 보관 (재접속하면 이어서 하기)
+# =========================================================
+# 대화 기록 등 세션 상태를 student_name 기준으로 SQLite에 저장한다.
+# save()는 JSON으로 바꿔 대기열에 넣기만 하고(같은 학생은 마지막 것만 남음),
+# 백그라운드 스레드가 flush_interval초마다 한 트랜잭션으로 모아서 쓴다.
+# 내용이 바뀌지 않았으면 대기열에도 넣지 않는다.
+
+class SessionStore:
+    def __init__(self, path="sessions.sqlite3", flush_interval=2.0, default=None, object_hook=None):
+        """default / object_hook: json.dumps / json.loads에 넘길 변환 함수 (직접 만든 객체 저장용)"""
+        self.flush_interval = flush_interval
+        self._default = default
+        self._object_hook = object_hook
+        self._lock = threading.Lock()
+        self._pending = {}   # 학생 -> 아직 쓰지 않은 JSON
+        self._last = {}      # 학생 -> 마지막으로 받은 JSON (변경 없는 저장 건너뛰기용)
+        self._writes = 0
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS sessions (student TEXT PRIMARY KEY, state TEXT, updated REAL)")
+        self._db.commit()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="session-store", daemon=True)
+        self._thread.start()
+
+    def _json_default(self, obj):
+        if self._default is not None:
+            try:
+                return self._default(obj)
+            except TypeError:
+                pass
+        if hasattr(obj, "item"):  # data_editor가 돌려준 numpy 숫자 등
+            return obj.item()
+        raise TypeError(f"저장할 수 없는 값: {type(obj).__name__}")
+
+    def save(self, student, state):
+        """state(dict)를 저장 대기열에 넣음. 바뀐 내용이 없으면 아무것도 하지 않음"""
+        data = json.dumps(state, ensure_ascii=False, sort_keys=True, default=self._json_default)
+        with self._lock:
+            if self._last.get(student) == data:
+                return
+            self._last[student] = data
+            self._pending[student] = data
+
+    def load(self, student):
+        """저장된 상태(dict)를 반환. 없으면 빈 dict"""
+        with self._lock:
+            data = self._pending.get(student) or self._last.get(student)
+            if data is None:
+                row = self._db.execute("SELECT state FROM sessions WHERE student = ?", (student,)).fetchone()
+                data = row[0] if row else None
+            if data is not None:
+                self._last[student] = data
+        return json.loads(data, object_hook=self._object_hook) if data else {}
+
+    def forget(self, student):
+        """학생의 저장된 상태를 지움"""
+        with self._lock:
+            self._pending.pop(student, None)
+            self._last.pop(student, None)
+            self._db.execute("DELETE FROM sessions WHERE student = ?", (student,))
+            self._db.commit()
+
+    def flush(self):
+        """대기 중인 상태를 한 번에 기록"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            if not pending:
+                return
+            now = time.time()
+            try:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?)",
+                    [(student, data, now) for student, data in pending.items()]
+                )
+                self._db.commit()
+            except sqlite3.Error:
+                self._db.rollback()
+                self._pending = {**pending, **self._pending}  # 다음 주기에 다시 시도
+                raise
+            self._writes += len(pending)
+
+    def stats(self):
+        with self._lock:
+            return {"pending": len(self._pending), "writes": self._writes, "students": len(self._last)}
+
+    def close(self):
+        self._wake.set()
+        self._thread.join(timeout=self.flush_interval + 1)
+        self.flush()
+
+    def _run(self):
+        while not self._wake.wait(self.flush_interval):
+            try:
+                self.flush()
+            except sqlite3.Error as e:
+                print(f"세션 저장 실패 (다음 주기에 다시 시도): {e}")
@@ -0,0 +1,246 @@
+import json
+import sqlite3
+import threading
+import time
+
+
+# =========================================================
+# 🔗 여러 프로세스가 함께 보는 상태 (키 상태 / 요청 토큰 / 캐시 / 쿨다운)
+# =========================================================
+# `streamlit run app.py`를 여러 개 띄워 로드 밸런서 뒤에 두면 프로세스마다 따로 세던
+# 키별 진행 중 요청 수, 429 쿨다운, 분당 요청 토큰 버킷, 응답 캐시를 여기에 모은다.
+#   - memory: 한 프로세스 안에서만 공유 (기본값, 예전과 같은 동작)
+#   - sqlite: 같은 서버의 여러 프로세스가 WAL 모드 SQLite 파일 하나를 함께 씀
+#   - redis : Redis 호환 서버 (여러 서버에 나눠 띄울 때, redis 패키지 필요)
+# 값은 JSON으로 바꿀 수 있는 것만 저장한다. 시간은 프로세스 간에 비교하므로 time.time()을 쓴다.
+
+class MemoryState:
+    multi_process = False
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values = {}  # 키 -> (값, 만료 시각 또는 None)
+
+    def _live(self, key, now):
+        entry = self._values.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= now:
+            del self._values[key]
+            return None
+        return entry
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._live(key, time.time())
+            return default if entry is None else entry[0]
+
+    def set(self, key, value, ttl=None):
+        """ttl(초)이 지나면 자동으로 사라짐"""
+        with self._lock:
+            self._values[key] = (value, time.time() + ttl if ttl else None)
+
+    def delete(self, key):
+        with self._lock:
+            self._values.pop(key, None)
+
+    def values(self, prefix):
+        """prefix로 시작하는 살아 있는 키 -> 값 dict"""
+        now = time.time()
+        with self._lock:
+            return {
+                key: entry[0] for key in [k for k in self._values if k.startswith(prefix)]
+                if (entry := self._live(key, now)) is not None
+            }
+
+    def incr(self, key, amount=1, ttl=None):
+        """정수 값을 amount만큼 더하고 새 값을 반환 (없으면 0에서 시작). ttl을 주면 바뀔 때마다 만료를 새로 잡음"""
+        now = time.time()
+        with self._lock:
+            entry = self._live(key, now)
+            value = (entry[0] if entry else 0) + amount
+            self._values[key] = (value, now + ttl if ttl else (entry[1] if entry else None))
+            return value
+
+    def take_token(self, key, rate_per_second, capacity):
+        """토큰 버킷에서 하나를 꺼냄. (꺼냈는지, 다음 토큰까지 남은 초) 반환"""
+        now = time.time()
+        with self._lock:
+            entry = self._live(key, now)
+            tokens, updated = entry[0] if entry else (capacity, now)
+            tokens, ok, wait = _refill_and_take(tokens, updated, now, rate_per_second, capacity)
+            self._values[key] = ((tokens, now), None)
+            return ok, wait
+
+    def describe(self):
+        return {"backend": "memory"}
+
+
+class SQLiteState:
+    multi_process = True
+
+    def __init__(self, path="shared_state.sqlite3", busy_timeout=5.0):
+        self.path = path
+        self._lock = threading.Lock()
+        self._last_purge = 0.0
+        # isolation_level=None: 트랜잭션을 직접 열어서(BEGIN IMMEDIATE) 프로세스 간 읽고-쓰기를 한 번에 처리
+        self._db = sqlite3.connect(path, timeout=busy_timeout, isolation_level=None, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute("CREATE TABLE IF NOT EXISTS shared_state (key TEXT PRIMARY KEY, value TEXT, expires REAL)")
+
+    def _read(self, key, now):
+        row = self._db.execute(
+            "SELECT value FROM shared_state WHERE key = ? AND (expires IS NULL OR expires > ?)", (key, now)
+        ).fetchone()
+        return None if row is None else json.loads(row[0])
+
+    def _write(self, key, value, expires):
+        self._db.execute("INSERT OR REPLACE INTO shared_state VALUES (?, ?, ?)", (key, json.dumps(value), expires))
+
+    def _update(self, fn):
+        """BEGIN IMMEDIATE로 쓰기 잠금을 잡은 채 fn(now) 실행 (다른 프로세스와 겹치지 않음)"""
+        with self._lock:
+            now = time.time()
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(now)
+                if now - self._last_purge > 60:
+                    self._db.execute("DELETE FROM shared_state WHERE expires IS NOT NULL AND expires <= ?", (now,))
+                    self._last_purge = now
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            return result
+
+    def get(self, key, default=None):
+        with self._lock:
+            value = self._read(key, time.time())
+        return default if value is None else value
+
+    def set(self, key, value, ttl=None):
+        self._update(lambda now: self._write(key, value, now + ttl if ttl else None))
+
+    def delete(self, key):
+        with self._lock:
+            self._db.execute("DELETE FROM shared_state WHERE key = ?", (key,))
+
+    def values(self, prefix):
+        # 기본 키 범위로 찾음 (prefix 바로 뒤 문자열까지)
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key, value FROM shared_state WHERE key >= ? AND key < ? AND (expires IS NULL OR expires > ?)",
+                (prefix, prefix + "\U0010ffff", time.time())
+            ).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def incr(self, key, amount=1, ttl=None):
+        def apply(now):
+            row = self._db.execute(
+                "SELECT value, expires FROM shared_state WHERE key = ? AND (expires IS NULL OR expires > ?)", (key, now)
+            ).fetchone()
+            value = (json.loads(row[0]) if row else 0) + amount
+            self._write(key, value, now + ttl if ttl else (row[1] if row else None))
+            return value
+        return self._update(apply)
+
+    def take_token(self, key, rate_per_second, capacity):
+        def apply(now):
+            tokens, updated = self._read(key, now) or (capacity, now)
+            tokens, ok, wait = _refill_and_take(tokens, updated, now, rate_per_second, capacity)
+            self._write(key, (tokens, now), None)
+            return ok, wait
+        return self._update(apply)
+
+    def describe(self):
+        return {"backend": "sqlite", "path": self.path}
+
+
+# 토큰 버킷을 Redis 서버 안에서 한 번에 계산 (여러 프로세스가 동시에 꺼내도 겹치지 않음)
+_TAKE_TOKEN_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) + tonumber(now_parts[2]) / 1000000
+local rate, capacity = tonumber(ARGV[1]), tonumber(ARGV[2])
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or capacity
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local ok = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+    ok = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 60)
+return {ok, tostring(tokens)}
+"""
+
+
+class RedisState:
+    multi_process = True
+
+    def __init__(self, url="redis://localhost:6379/0", prefix="o6:"):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("shared_state backend가 redis이면 redis 패키지가 필요합니다 (pip install redis).") from e
+        self.url = url
+        self.prefix = prefix
+        self._redis = redis.Redis.from_url(url)
+        self._take_token = self._redis.register_script(_TAKE_TOKEN_SCRIPT)
+
+    def get(self, key, default=None):
+        value = self._redis.get(self.prefix + key)
+        return default if value is None else json.loads(value)
+
+    def set(self, key, value, ttl=None):
+        self._redis.set(self.prefix + key, json.dumps(value), px=int(ttl * 1000) if ttl else None)
+
+    def delete(self, key):
+        self._redis.delete(self.prefix + key)
+
+    def values(self, prefix):
+        # 이 앱 접두어 아래 키만 훑으므로 SCAN 범위가 작다
+        keys = list(self._redis.scan_iter(match=self.prefix + prefix + "*", count=100))
+        if not keys:
+            return {}
+        start = len(self.prefix)
+        return {
+            key.decode("utf-8")[start:]: json.loads(value)
+            for key, value in zip(keys, self._redis.mget(keys)) if value is not None
+        }
+
+    def incr(self, key, amount=1, ttl=None):
+        pipe = self._redis.pipeline()
+        pipe.incrby(self.prefix + key, amount)
+        if ttl:
+            pipe.expire(self.prefix + key, int(ttl) + 1)
+        return pipe.execute()[0]
+
+    def take_token(self, key, rate_per_second, capacity):
+        ok, tokens = self._take_token(keys=[self.prefix + key], args=[rate_per_second, capacity])
+        tokens = float(tokens)
+        return bool(ok), 0.0 if tokens >= 1 else (1 - tokens) / rate_per_second
+
+    def describe(self):
+        return {"backend": "redis", "url": self.url.split("@")[-1]}  # 비밀번호는 화면에 보이지 않게
+
+
+def _refill_and_take(tokens, updated, now, rate_per_second, capacity):
+    """(남은 토큰, 꺼냈는지, 다음 토큰까지 남은 초)"""
+    tokens = min(capacity, tokens + max(0.0, now - updated) * rate_per_second)
+    if tokens >= 1:
+        return tokens - 1, True, 0.0
+    return tokens, False, (1 - tokens) / rate_per_second
+
+
+def from_config(config):
+    """Secrets의 [shared_state] 표(dict)로 백엔드 생성. backend = memory(기본) / sqlite / redis"""
+    config = dict(config or {})
+    backend = config.get("backend", "memory")
+    if backend == "memory":
+        return MemoryState()
+    if backend == "sqlite":
+        return SQLiteState(config.get("path", "shared_state.sqlite3"))
+    if backend == "redis":
+        return RedisState(config.get("url", "redis://localhost:6379/0"), prefix=config.get("prefix", "o6:"))
+    raise ValueError(f"알 수 없는 shared_state backend: {backend}")